@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ProgramBuilderConfig(AppConfig):
     name = 'program_builder'
+
+    def ready(self):
+        from . import signals
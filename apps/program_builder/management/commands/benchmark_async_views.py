@@ -0,0 +1,263 @@
+import asyncio
+import io
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from ...models import Exercise, Training
+from ...utils.db_interactions import (
+    DBExercise,
+    DBPersonalRecord,
+    DBTrainingRollup,
+)
+
+# Views measured: (synchronous view, async version, with the exercise pk)
+VIEWS = {
+    'trainings_list': ('trainings_list', 'async_trainings_list', False),
+    'exercises_list': ('exercises_list', 'async_exercises_list', False),
+    'exercise_page': ('exercise_page', 'async_exercise_page', True),
+    'ajax_all_movements': (
+        'ajax_all_movements',
+        'async_ajax_all_movements',
+        False,
+    ),
+}
+
+
+def _report(results, elapsed):
+    durations = sorted(duration for duration, status in results)
+    return {
+        'requests': len(durations),
+        'errors': len([status for duration, status in results if status != 200]),
+        'per_second': len(durations) / elapsed,
+        'median_ms': statistics.median(durations) * 1000,
+        'p95_ms': durations[int(len(durations) * 0.95) - 1] * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit de requêtes concurrentes sur les vues de lecture : "
+        "vues synchrones servies en WSGI (un thread par requête) et versions "
+        "async servies en ASGI (une boucle d'événements, comme uvicorn), "
+        "sur une base SQLite temporaire"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=16,
+            help="Nombre de requêtes en cours en même temps",
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help="Nombre de requêtes par vue et par mode",
+        )
+        parser.add_argument(
+            '--trainings',
+            type=int,
+            default=500,
+            help="Nombre d'entraînements de l'utilisateur avant la mesure",
+        )
+        parser.add_argument(
+            '--view', choices=sorted(VIEWS), action='append', dest='views'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help="Affiche le résultat en JSON"
+        )
+
+    def handle(self, *args, **options):
+        database = connections['default'].settings_dict
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            self.stderr.write("La base de données n'est pas SQLite")
+            return
+
+        name = database['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            connections.close_all()
+            database['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+            try:
+                with override_settings(ALLOWED_HOSTS=['testserver']):
+                    report = self._measure(options)
+            finally:
+                connections.close_all()
+                database['NAME'] = name
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=4))
+            return
+        for view, result in report.items():
+            for mode in ('wsgi', 'asgi'):
+                self.stdout.write(
+                    "{:20} {:5} requêtes/s: {:>8.1f}  médiane: {:>7.1f} ms"
+                    "  p95: {:>7.1f} ms  ({} erreurs)".format(
+                        view,
+                        mode,
+                        result[mode]['per_second'],
+                        result[mode]['median_ms'],
+                        result[mode]['p95_ms'],
+                        result[mode]['errors'],
+                    )
+                )
+
+    def _measure(self, options):
+        call_command('migrate', verbosity=0, interactive=False)
+        user, exercise = self._create_data(options)
+        client = Client()
+        client.force_login(user)
+        cookie = '{}={}'.format(
+            settings.SESSION_COOKIE_NAME,
+            client.cookies[settings.SESSION_COOKIE_NAME].value,
+        )
+        connections.close_all()
+
+        report = {}
+        for view in options['views'] or sorted(VIEWS):
+            sync_name, async_name, with_pk = VIEWS[view]
+            args = [exercise.pk] if with_pk else []
+            report[view] = {
+                'wsgi': self._run_wsgi(
+                    reverse('program_builder:' + sync_name, args=args),
+                    cookie,
+                    options,
+                ),
+                'asgi': asyncio.run(
+                    self._run_asgi(
+                        reverse('program_builder:' + async_name, args=args),
+                        cookie,
+                        options,
+                    )
+                ),
+            }
+        return report
+
+    def _create_data(self, options):
+        user = User.objects.create_user(username='benchmark')
+        db_exercise = DBExercise()
+        exercises = [
+            db_exercise.set_exercise(
+                'benchmark {}'.format(number),
+                Exercise.FORTIME,
+                '',
+                Exercise.TIME,
+                0,
+                user,
+            )
+            for number in range(10)
+        ]
+        Exercise.objects.filter(pk=exercises[0].pk).update(is_default=True)
+
+        rng = random.Random(0)
+        Training.objects.bulk_create(
+            [
+                Training(
+                    exercise=rng.choice(exercises),
+                    founder=user,
+                    performance_type=Training.TIME,
+                    performance_value=rng.randint(60, 1800),
+                    done=True,
+                )
+                for number in range(options['trainings'])
+            ],
+            batch_size=500,
+        )
+        DBPersonalRecord().rebuild_all_personal_records()
+        DBTrainingRollup().rebuild_trainings_rollups()
+        return user, exercises[0]
+
+    def _run_wsgi(self, path, cookie, options):
+        """
+        Send the requests to the WSGI handler from a pool of threads,
+        as a threaded WSGI server does
+        """
+        handler = WSGIHandler()
+
+        def request():
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'testserver',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'testserver',
+                'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http',
+            }
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b''.join(response)
+            response.close()
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(
+                pool.map(lambda number: request(), range(options['requests']))
+            )
+        return _report(results, time.perf_counter() - start)
+
+    async def _run_asgi(self, path, cookie, options):
+        """
+        Send the requests to the ASGI handler in one event loop, at most
+        --concurrency at the same time
+        """
+        application = ASGIHandler()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', cookie.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def request():
+            statuses = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with semaphore:
+                start = time.perf_counter()
+                await application(dict(scope), receive, send)
+                return time.perf_counter() - start, statuses[0]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[request() for number in range(options['requests'])]
+        )
+        return _report(results, time.perf_counter() - start)
@@ -0,0 +1,216 @@
+import json
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, OperationalError
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from ...models import Exercise, Training
+from ...utils.db_interactions import (
+    DBExercise,
+    DBTraining,
+    DBPersonalRecord,
+    DBTrainingRollup,
+)
+from ... import views
+
+
+def _wait_until(start):
+    delay = start - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _write_trainings(user_pk, exercise_pk, start, end, results):
+    """
+    Record trainings (creation then performance, as in trainings_list)
+    until the end of the benchmark
+    """
+    db_training = DBTraining()
+    user = User.objects.get(pk=user_pk)
+    exercise = Exercise.objects.get(pk=exercise_pk)
+    rng = random.Random(user_pk)
+    operations = locked = 0
+
+    _wait_until(start)
+    while time.monotonic() < end:
+        try:
+            training = db_training.set_training(exercise, user)
+            training.performance_value = rng.randint(60, 1800)
+            training.done = True
+            training.save()
+            operations += 1
+        except OperationalError:
+            locked += 1
+    results.put(('writers', operations, locked))
+
+
+def _read_trainings_list(user_pk, start, end, results):
+    """
+    Load the trainings_list page until the end of the benchmark
+    """
+    request_factory = RequestFactory()
+    user = User.objects.get(pk=user_pk)
+    url = reverse('program_builder:trainings_list')
+    operations = locked = 0
+
+    _wait_until(start)
+    while time.monotonic() < end:
+        request = request_factory.get(url)
+        request.user = user
+        try:
+            views.trainings_list(request)
+            operations += 1
+        except OperationalError:
+            locked += 1
+    results.put(('readers', operations, locked))
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit de processus qui enregistrent des entraînements "
+        "pendant que d'autres chargent trainings_list, sur une base SQLite "
+        "temporaire, sans puis avec les PRAGMA de SQLITE_PRAGMAS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help="Durée de chaque mesure en secondes",
+        )
+        parser.add_argument(
+            '--trainings',
+            type=int,
+            default=500,
+            help="Nombre d'entraînements par utilisateur avant la mesure",
+        )
+        parser.add_argument(
+            '--json', action='store_true', help="Affiche le résultat en JSON"
+        )
+
+    def handle(self, *args, **options):
+        database = connections['default'].settings_dict
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            self.stderr.write("La base de données n'est pas SQLite")
+            return
+
+        report = {}
+        for label, pragmas in (
+            ('default', {}),
+            ('tuned', settings.SQLITE_PRAGMAS),
+        ):
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                report[label] = self._measure(database, options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=4))
+            return
+        for label, result in report.items():
+            self.stdout.write(
+                "{:8} écritures/s: {:>8.1f} ({} verrous)  "
+                "lectures/s: {:>8.1f} ({} verrous)".format(
+                    label,
+                    result['writers']['per_second'],
+                    result['writers']['locked'],
+                    result['readers']['per_second'],
+                    result['readers']['locked'],
+                )
+            )
+
+    def _measure(self, database, options):
+        """
+        Run the writers and the readers on a new temporary database
+        """
+        name = database['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            connections.close_all()
+            database['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+            try:
+                call_command('migrate', verbosity=0, interactive=False)
+                user_pks, exercise_pk = self._create_data(options)
+                return self._run_processes(user_pks, exercise_pk, options)
+            finally:
+                connections.close_all()
+                database['NAME'] = name
+
+    def _create_data(self, options):
+        users_number = max(options['writers'], options['readers'], 1)
+        users = [
+            User.objects.create_user(username='benchmark_{}'.format(number))
+            for number in range(users_number)
+        ]
+        exercise = DBExercise().set_exercise(
+            'benchmark', Exercise.FORTIME, '', Exercise.TIME, 0, users[0]
+        )
+        Exercise.objects.filter(pk=exercise.pk).update(is_default=True)
+
+        rng = random.Random(0)
+        Training.objects.bulk_create(
+            [
+                Training(
+                    exercise=exercise,
+                    founder=user,
+                    performance_type=Training.TIME,
+                    performance_value=rng.randint(60, 1800),
+                    done=True,
+                )
+                for user in users
+                for number in range(options['trainings'])
+            ],
+            batch_size=500,
+        )
+        DBPersonalRecord().rebuild_all_personal_records()
+        DBTrainingRollup().rebuild_trainings_rollups()
+        return [user.pk for user in users], exercise.pk
+
+    def _run_processes(self, user_pks, exercise_pk, options):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        start = time.monotonic() + 1
+        end = start + options['duration']
+
+        # Each process opens its own connection
+        connections.close_all()
+        processes = [
+            context.Process(
+                target=_write_trainings,
+                args=(user_pks[number], exercise_pk, start, end, results),
+            )
+            for number in range(options['writers'])
+        ] + [
+            context.Process(
+                target=_read_trainings_list,
+                args=(user_pks[number], start, end, results),
+            )
+            for number in range(options['readers'])
+        ]
+        for process in processes:
+            process.start()
+
+        report = {
+            role: {'operations': 0, 'locked': 0}
+            for role in ('writers', 'readers')
+        }
+        for process in processes:
+            role, operations, locked = results.get(
+                timeout=options['duration'] + 60
+            )
+            report[role]['operations'] += operations
+            report[role]['locked'] += locked
+        for process in processes:
+            process.join()
+
+        for result in report.values():
+            result['per_second'] = result['operations'] / options['duration']
+        return report
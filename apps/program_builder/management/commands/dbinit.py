@@ -1,63 +1,116 @@
+import json
 import os
+from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
 from ...models import (
-    Training,
     Exercise,
     MovementsPerExercise,
     MovementSettingsPerMovementsPerExercise,
     Movement,
     MovementSettings,
     Equipment,
+    Tombstone,
 )
+from ...utils.db_interactions import DBExercise
+from ...utils.caches import MovementsCatalogue
+from ...utils.registry import LookupTables
+
+CATALOGUE_PATH = Path(__file__).resolve().parent / 'data' / 'catalogue.json'
 
 
 class DBinit:
     """
-    This class creates all the objects by default for the program
+    This class creates all the objects by default for the program from
+    a declarative catalogue (see data/catalogue.json):
+        {
+            "settings": ["setting_name", ...],
+            "equipments": ["equipment_name", ...],
+            "movements": [
+                {
+                    "name": "movement_name",
+                    "equipment": "equipment_name",
+                    "settings": ["setting_name", ...]
+                },
+                ...
+            ],
+            "exercises": [
+                {
+                    "name": "exercise_name",
+                    "exercise_type": "exercise_type",
+                    "description": "description",
+                    "goal_type": "goal_type",
+                    "goal_value": "goal_value",
+                    "movements": [
+                        {
+                            "name": "movement_name",
+                            "order": "movement_order",
+                            "settings": [
+                                {
+                                    "name": "setting_name",
+                                    "value": "setting_value",
+                                },
+                                ...
+                            ]
+                        },
+                        ...
+                    ]
+                },
+                ...
+            ]
+        }
+    The objects are compared by name with the ones already in the database:
+    only the missing ones are inserted (with bulk_create) and only the
+    different ones are updated, everything in one transaction.
     """
 
+    def __init__(self, catalogue_path=CATALOGUE_PATH):
+        with open(catalogue_path, encoding='utf-8') as catalogue_file:
+            self.catalogue = json.load(catalogue_file)
+        self.db_exercise = DBExercise()
+
     def clean_db(self):
         """
-        This method clean all the db
+        This method clean all the db.
+        All the objects belong to a user (founder), so they are deleted in
+        cascade with the users: the signals skip the personal records,
+        rollups, movements documents and tombstones of the objects of a
+        deleted user. Only the tombstones of the default exercises, left for
+        all the users, are deleted afterwards
         """
-        settings = MovementSettings.objects.all()
-        if settings:
-            settings.delete()
-
-        equipments = Equipment.objects.all()
-        if equipments:
-            equipments.delete()
-
-        movements = Movement.objects.all()
-        if movements:
-            movements.delete()
+        with transaction.atomic():
+            User.objects.all().delete()
+            Tombstone.objects.all().delete()
 
-        exercises = Exercise.objects.all()
-        if exercises:
-            exercises.delete()
-
-        mvts_per_exos = MovementsPerExercise.objects.all()
-        if mvts_per_exos:
-            mvts_per_exos.delete()
-
-        settings_per_mvt_per_exo = (
-            MovementSettingsPerMovementsPerExercise.objects.all()
-        )
-        if settings_per_mvt_per_exo:
-            settings_per_mvt_per_exo.delete()
+        # Also done by the signals, unless nothing was deleted
+        MovementsCatalogue().invalidate()
+        LookupTables.invalidate()
 
-        trainings = Training.objects.all()
-        if trainings:
-            trainings.delete()
+    def start(self):
+        """
+        This method creates or updates all the objects of the catalogue
+        """
+        with transaction.atomic():
+            founder = self._get_founder()
+            settings = self._load_named_objects(
+                MovementSettings, self.catalogue["settings"], founder
+            )
+            equipments = self._load_named_objects(
+                Equipment, self.catalogue["equipments"], founder
+            )
+            movements = self._load_movements(founder, equipments, settings)
+            self._load_exercises(founder, movements, settings)
 
-        users = User.objects.all()
-        if users:
-            users.delete()
+        # bulk_create does not send the signals which invalidate the caches
+        MovementsCatalogue().invalidate()
+        LookupTables.invalidate()
 
-    def start(self):
+    def _get_founder(self):
         """
-        This method creates all the necessary settings
+        This private method returns the administrator who owns the catalogue,
+        he is created if he does not exist yet
         """
         username = os.environ['SUPERUSER_USERNAME']
         email = os.environ['SUPERUSER_EMAIL']
@@ -65,1245 +118,235 @@ class DBinit:
 
         try:
             founder = User.objects.get(username=username)
-        except:
+        except User.DoesNotExist:
             founder = User.objects.create_superuser(
                 username=username, email=email, password=password
             )
+        return founder
 
-        # We create the necessary settings
-        rep = MovementSettings.objects.create(
-            name=MovementSettings.REPETITIONS, founder=founder
-        )
-        weight = MovementSettings.objects.create(
-            name=MovementSettings.WEIGHT, founder=founder
-        )
-        dist = MovementSettings.objects.create(
-            name=MovementSettings.DISTANCE, founder=founder
-        )
-        cal = MovementSettings.objects.create(
-            name=MovementSettings.CALORIES, founder=founder
-        )
-        lest = MovementSettings.objects.create(
-            name=MovementSettings.LEST, founder=founder
-        )
-
-        # We create the necessary equipments
-        kb = Equipment.objects.create(name="kettlebell", founder=founder)
-        anyone = Equipment.objects.create(name="aucun", founder=founder)
-        ball = Equipment.objects.create(name="wallball", founder=founder)
-        drawbar = Equipment.objects.create(
-            name="barre de traction", founder=founder
-        )
-        dipbar = Equipment.objects.create(name="barre à dips", founder=founder)
-        rope = Equipment.objects.create(name="corde à sauter", founder=founder)
-        ring = Equipment.objects.create(name="anneaux", founder=founder)
-        box = Equipment.objects.create(name="box", founder=founder)
-        vest = Equipment.objects.create(name="veste lestée", founder=founder)
-        bar = Equipment.objects.create(name="barre olympique", founder=founder)
-        row = Equipment.objects.create(name="rameur", founder=founder)
-
-        # We create some movements
-        squat = Movement.objects.create(
-            name="squats", founder=founder, equipment=kb
-        )
-        squat.settings.add(rep, lest)
-
-        pushup = Movement.objects.create(
-            name="pushups", founder=founder, equipment=anyone
-        )
-        pushup.settings.add(rep, lest)
-
-        wallball = Movement.objects.create(
-            name="wallballs", founder=founder, equipment=ball
-        )
-        wallball.settings.add(rep, weight)
-
-        pullup = Movement.objects.create(
-            name="pullups", founder=founder, equipment=drawbar
-        )
-        wallball.settings.add(rep, lest)
-
-        burpees = Movement.objects.create(
-            name="burpees", founder=founder, equipment=anyone
-        )
-        burpees.settings.add(rep, lest)
-
-        situp = Movement.objects.create(
-            name="situps", founder=founder, equipment=anyone
-        )
-        burpees.settings.add(rep, lest)
-
-        boxjumps = Movement.objects.create(
-            name="box jumps", founder=founder, equipment=box
-        )
-        burpees.settings.add(rep, lest)
-
-        run = Movement.objects.create(
-            name="run", founder=founder, equipment=anyone
-        )
-        burpees.settings.add(dist, lest)
-
-        deadlift = Movement.objects.create(
-            name="deadlift", founder=founder, equipment=bar
-        )
-        deadlift.settings.add(rep, weight)
-
-        handstand_pushup = Movement.objects.create(
-            name="handstand pushup", founder=founder, equipment=anyone
-        )
-        handstand_pushup.settings.add(rep, lest)
-
-        clean = Movement.objects.create(
-            name="clean", founder=founder, equipment=bar
-        )
-        clean.settings.add(rep, weight)
-
-        ring_dips = Movement.objects.create(
-            name="ring dips", founder=founder, equipment=ring
-        )
-        ring_dips.settings.add(rep, lest)
-
-        thruster = Movement.objects.create(
-            name="thruster", founder=founder, equipment=bar
-        )
-        thruster.settings.add(rep, weight)
-
-        clean_and_jerk = Movement.objects.create(
-            name="clean and jerk", founder=founder, equipment=bar
-        )
-        clean_and_jerk.settings.add(rep, weight)
-
-        kettlebell_swing = Movement.objects.create(
-            name="kettlebell swing", founder=founder, equipment=kb
-        )
-        kettlebell_swing.settings.add(rep, weight)
-
-        snatch = Movement.objects.create(
-            name="snatch", founder=founder, equipment=bar
-        )
-        clean.settings.add(rep, weight)
-
-        row = Movement.objects.create(
-            name="rameur", founder=founder, equipment=row
-        )
-        row.settings.add(dist)
-
-        pistol = Movement.objects.create(
-            name="pistol", founder=founder, equipment=anyone
-        )
-        pistol.settings.add(rep, lest)
-
-        overhead_squat = Movement.objects.create(
-            name="overhead squat", founder=founder, equipment=bar
-        )
-        overhead_squat.settings.add(rep, weight)
-
-        double_under = Movement.objects.create(
-            name="double-unders", founder=founder, equipment=rope
-        )
-        double_under.settings.add(rep, lest)
-
-        # We create some Workouts
-
-        # BENCHMARK GIRLS -> http://www.elementcrossfit.com/benchmark-workouts/
-        # 1. Chelsea
-        chelsea = Exercise.objects.create(
-            name="chelsea",
-            exercise_type=Exercise.EMOM,
-            description="""C'est un WOD Benchmark Girls. Il faut réaliser
-                                                    un tour complet chaque minute pendant 30 minutes.
-                                                    Si l'athlète n'arrive pas à réaliser un tour complet
-                                                    pendant la minute, il est disqualifié.""",
-            goal_type=Exercise.TIME,
-            goal_value=30,
-            is_default=True,
-            founder=founder,
-        )
-        chelsea_pullup = MovementsPerExercise.objects.create(
-            exercise=chelsea, movement=pullup, movement_number=1
-        )
-        chelsea_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=chelsea_pullup, setting=rep, setting_value=5
-            )
-        )
-        chelsea_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=chelsea_pullup, setting=lest, setting_value=0
-            )
-        )
-        chelsea_pushup = MovementsPerExercise.objects.create(
-            exercise=chelsea, movement=pushup, movement_number=2
-        )
-        chelsea_pushup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=chelsea_pushup, setting=rep, setting_value=10
-            )
-        )
-        chelsea_pushup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=chelsea_pushup, setting=lest, setting_value=0
-            )
-        )
-        chelsea_squat = MovementsPerExercise.objects.create(
-            exercise=chelsea, movement=squat, movement_number=3
-        )
-        chelsea_squat_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=chelsea_squat, setting=rep, setting_value=15
-            )
-        )
-        chelsea_squat_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=chelsea_squat, setting=lest, setting_value=0
-            )
-        )
-
-        # 2. Angie
-
-        angie = Exercise.objects.create(
-            name="angie",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. Il challenge fortement votre endurance musculaire sur l'ensemble de votre corps. L'objectif est de réaliser l'ensemble des mouvements en un minimum de temps.""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-        angie_pullup = MovementsPerExercise.objects.create(
-            exercise=angie, movement=pullup, movement_number=1
-        )
-        angie_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_pullup, setting=rep, setting_value=100
-            )
-        )
-        angie_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_pullup, setting=lest, setting_value=0
-            )
-        )
-        angie_pushup = MovementsPerExercise.objects.create(
-            exercise=angie, movement=pushup, movement_number=2
-        )
-        angie_pushup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_pushup, setting=rep, setting_value=100
-            )
-        )
-        angie_pushup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_pushup, setting=lest, setting_value=0
-            )
-        )
-        angie_situp = MovementsPerExercise.objects.create(
-            exercise=angie, movement=situp, movement_number=3
-        )
-        angie_situp_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_situp, setting=rep, setting_value=100
-            )
-        )
-        angie_situp_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_situp, setting=lest, setting_value=0
-            )
-        )
-        angie_squat = MovementsPerExercise.objects.create(
-            exercise=angie, movement=squat, movement_number=4
-        )
-        angie_squat_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_squat, setting=rep, setting_value=100
-            )
-        )
-        angie_squat_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=angie_squat, setting=lest, setting_value=0
-            )
-        )
-
-        # 3. Barbara
-        barbara = Exercise.objects.create(
-            name="barbara",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. Il travaille l'ensemble du corps et fait appel à votre endurance musculaire ainsi qu'à votre cardio. L'objectif est de réaliser l'ensemble des mouvements en un minimum de temps.""",
-            goal_type=Exercise.ROUND,
-            goal_value=5,
-            is_default=True,
-            founder=founder,
-        )
-        barbara_pullup = MovementsPerExercise.objects.create(
-            exercise=barbara, movement=pullup, movement_number=1
-        )
-        barbara_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_pullup, setting=rep, setting_value=20
-            )
-        )
-        barbara_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_pullup, setting=lest, setting_value=0
-            )
-        )
-        barbara_pushup = MovementsPerExercise.objects.create(
-            exercise=barbara, movement=pushup, movement_number=2
-        )
-        barbara_pushup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_pushup, setting=rep, setting_value=30
-            )
-        )
-        barbara_pushup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_pushup, setting=lest, setting_value=0
-            )
-        )
-        barbara_situp = MovementsPerExercise.objects.create(
-            exercise=barbara, movement=situp, movement_number=3
-        )
-        barbara_situp_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_situp, setting=rep, setting_value=40
-            )
-        )
-        barbara_situp_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_situp, setting=lest, setting_value=0
-            )
-        )
-        barbara_squat = MovementsPerExercise.objects.create(
-            exercise=barbara, movement=squat, movement_number=4
-        )
-        barbara_squat_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_squat, setting=rep, setting_value=50
-            )
-        )
-        barbara_squat_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=barbara_squat, setting=lest, setting_value=0
-            )
-        )
-
-        # 4. Cindy
-        cindy = Exercise.objects.create(
-            name="cindy",
-            exercise_type=Exercise.AMRAP,
-            description="""C'est un WOD Benchmark Girls. Il travaille l'ensemble du corps et sollicite fortement le cardio. L'objectif est de faire le maximum de tours en 20 minutes.""",
-            goal_type=Exercise.TIME,
-            goal_value=20,
-            is_default=True,
-            founder=founder,
-        )
-        cindy_pullup = MovementsPerExercise.objects.create(
-            exercise=cindy, movement=pullup, movement_number=1
-        )
-        cindy_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=cindy_pullup, setting=rep, setting_value=5
-            )
-        )
-        cindy_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=cindy_pullup, setting=lest, setting_value=0
-            )
-        )
-        cindy_pushup = MovementsPerExercise.objects.create(
-            exercise=cindy, movement=pushup, movement_number=2
-        )
-        cindy_pushup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=cindy_pushup, setting=rep, setting_value=10
-            )
-        )
-        cindy_pushup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=cindy_pushup, setting=lest, setting_value=0
-            )
-        )
-        cindy_squat = MovementsPerExercise.objects.create(
-            exercise=cindy, movement=squat, movement_number=3
-        )
-        cindy_squat_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=cindy_squat, setting=rep, setting_value=15
-            )
-        )
-        cindy_squat_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=cindy_squat, setting=lest, setting_value=0
-            )
-        )
-
-        # 5. Diane
-
-        diane = Exercise.objects.create(
-            name="diane",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. C'est un format 21-15-9 qui travaille principalement sur l'explosion musculaire.""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-        diane_deadlift_21 = MovementsPerExercise.objects.create(
-            exercise=diane, movement=deadlift, movement_number=1
-        )
-        diane_deadlift_21_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_deadlift_21,
-                setting=rep,
-                setting_value=21,
-            )
-        )
-        diane_deadlift_21_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_deadlift_21,
-                setting=weight,
-                setting_value=100,
-            )
-        )
-        diane_handstand_pushup_21 = MovementsPerExercise.objects.create(
-            exercise=diane, movement=handstand_pushup, movement_number=2
-        )
-        diane_handstand_pushup_21_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_handstand_pushup_21,
-                setting=rep,
-                setting_value=21,
-            )
-        )
-        diane_handstand_pushup_21_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_handstand_pushup_21,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        diane_deadlift_15 = MovementsPerExercise.objects.create(
-            exercise=diane, movement=deadlift, movement_number=3
-        )
-        diane_deadlift_15_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_deadlift_15,
-                setting=rep,
-                setting_value=15,
-            )
-        )
-        diane_deadlift_15_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_deadlift_15,
-                setting=weight,
-                setting_value=100,
-            )
-        )
-        diane_handstand_pushup_15 = MovementsPerExercise.objects.create(
-            exercise=diane, movement=handstand_pushup, movement_number=4
-        )
-        diane_handstand_pushup_15_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_handstand_pushup_15,
-                setting=rep,
-                setting_value=15,
-            )
-        )
-        diane_handstand_pushup_15_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_handstand_pushup_15,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        diane_deadlift_9 = MovementsPerExercise.objects.create(
-            exercise=diane, movement=deadlift, movement_number=5
-        )
-        diane_deadlift_9_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_deadlift_9,
-                setting=rep,
-                setting_value=9,
-            )
-        )
-        diane_deadlift_9_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_deadlift_9,
-                setting=weight,
-                setting_value=100,
-            )
-        )
-        diane_handstand_pushup_9 = MovementsPerExercise.objects.create(
-            exercise=diane, movement=handstand_pushup, movement_number=6
-        )
-        diane_handstand_pushup_9_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_handstand_pushup_9,
-                setting=rep,
-                setting_value=9,
-            )
-        )
-        diane_handstand_pushup_9_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=diane_handstand_pushup_9,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-
-        # 6. Elizabeth
-
-        elizabeth = Exercise.objects.create(
-            name="elizabeth",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. C'est un format 21-15-9 qui travaille principalement sur l'explosion musculaire. Il fait également mal au niveau du cardio!""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-
-        elizabeth_clean_21 = MovementsPerExercise.objects.create(
-            exercise=elizabeth, movement=clean, movement_number=1
-        )
-        elizabeth_clean_21_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_clean_21,
-                setting=rep,
-                setting_value=21,
-            )
-        )
-        elizabeth_clean_21_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_clean_21,
-                setting=weight,
-                setting_value=60,
-            )
-        )
-        elizabeth_ring_dips_21 = MovementsPerExercise.objects.create(
-            exercise=elizabeth, movement=ring_dips, movement_number=2
-        )
-        elizabeth_ring_dips_21_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_ring_dips_21,
-                setting=rep,
-                setting_value=21,
-            )
-        )
-        elizabeth_ring_dips_21_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_ring_dips_21,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        elizabeth_clean_15 = MovementsPerExercise.objects.create(
-            exercise=elizabeth, movement=clean, movement_number=3
-        )
-        elizabeth_clean_15_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_clean_15,
-                setting=rep,
-                setting_value=15,
-            )
-        )
-        elizabeth_clean_15_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_clean_15,
-                setting=weight,
-                setting_value=60,
-            )
-        )
-        elizabeth_ring_dips_15 = MovementsPerExercise.objects.create(
-            exercise=elizabeth, movement=ring_dips, movement_number=4
-        )
-        elizabeth_ring_dips_15_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_ring_dips_15,
-                setting=rep,
-                setting_value=15,
-            )
-        )
-        elizabeth_ring_dips_15_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_ring_dips_15,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        elizabeth_clean_9 = MovementsPerExercise.objects.create(
-            exercise=elizabeth, movement=clean, movement_number=5
-        )
-        elizabeth_clean_9_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_clean_9,
-                setting=rep,
-                setting_value=9,
-            )
-        )
-        elizabeth_clean_9_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_clean_9,
-                setting=weight,
-                setting_value=60,
-            )
-        )
-        elizabeth_ring_dips_9 = MovementsPerExercise.objects.create(
-            exercise=elizabeth, movement=ring_dips, movement_number=6
-        )
-        elizabeth_ring_dips_9_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_ring_dips_9,
-                setting=rep,
-                setting_value=9,
-            )
-        )
-        elizabeth_ring_dips_9_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=elizabeth_ring_dips_9,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-
-        # 7. Fran
-
-        fran = Exercise.objects.create(
-            name="fran",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. C'est un format 21-15-9 qui travaille principalement sur l'explosion musculaire et le cardio. C'est un entraînement rapide mais intense!""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-
-        fran_thruster_21 = MovementsPerExercise.objects.create(
-            exercise=fran, movement=thruster, movement_number=1
-        )
-        fran_thruster_21_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_thruster_21,
-                setting=rep,
-                setting_value=21,
-            )
-        )
-        fran_thruster_21_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_thruster_21,
-                setting=weight,
-                setting_value=40,
-            )
-        )
-        fran_pullup_21 = MovementsPerExercise.objects.create(
-            exercise=fran, movement=pullup, movement_number=2
-        )
-        fran_pullup_21_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_pullup_21, setting=rep, setting_value=21
-            )
-        )
-        fran_pullup_21_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_pullup_21, setting=lest, setting_value=0
-            )
-        )
-        fran_thruster_15 = MovementsPerExercise.objects.create(
-            exercise=fran, movement=thruster, movement_number=3
-        )
-        fran_thruster_15_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_thruster_15,
-                setting=rep,
-                setting_value=15,
-            )
-        )
-        fran_thruster_15_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_thruster_15,
-                setting=weight,
-                setting_value=40,
-            )
-        )
-        fran_pullup_15 = MovementsPerExercise.objects.create(
-            exercise=fran, movement=pullup, movement_number=4
-        )
-        fran_pullup_15_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_pullup_15, setting=rep, setting_value=15
-            )
-        )
-        fran_pullup_15_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_pullup_15, setting=lest, setting_value=0
-            )
-        )
-        fran_thruster_9 = MovementsPerExercise.objects.create(
-            exercise=fran, movement=thruster, movement_number=5
-        )
-        fran_thruster_9_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_thruster_9, setting=rep, setting_value=9
-            )
-        )
-        fran_thruster_9_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_thruster_9,
-                setting=weight,
-                setting_value=40,
-            )
-        )
-        fran_pullup_9 = MovementsPerExercise.objects.create(
-            exercise=fran, movement=pullup, movement_number=6
-        )
-        fran_pullup_9_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_pullup_9, setting=rep, setting_value=9
-            )
-        )
-        fran_pullup_9_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=fran_pullup_9, setting=lest, setting_value=0
-            )
-        )
-
-        # 8. Grace
-
-        grace = Exercise.objects.create(
-            name="grace",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. L'objectif est de faire 30 clean and jerk le plus rapidement possible!""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-
-        grace_clean_and_jerk = MovementsPerExercise.objects.create(
-            exercise=grace, movement=clean_and_jerk, movement_number=1
-        )
-        grace_clean_and_jerk_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=grace_clean_and_jerk,
-                setting=rep,
-                setting_value=30,
-            )
-        )
-        grace_clean_and_jerk_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=grace_clean_and_jerk,
-                setting=weight,
-                setting_value=60,
-            )
-        )
-
-        # 9. Helen
-
-        helen = Exercise.objects.create(
-            name="helen",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. C'est un exercice qui sollicite fortement les épaules et le cardios. L'objectif est de réaliser les 3 tours le plus rapidement possible.""",
-            goal_type=Exercise.ROUND,
-            goal_value=3,
-            is_default=True,
-            founder=founder,
-        )
-
-        helen_run = MovementsPerExercise.objects.create(
-            exercise=helen, movement=run, movement_number=1
-        )
-        helen_run_dist = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=helen_run, setting=dist, setting_value=400
-            )
-        )
-        helen_run_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=helen_run, setting=lest, setting_value=0
-            )
-        )
-        helen_kettlebell_swing = MovementsPerExercise.objects.create(
-            exercise=helen, movement=kettlebell_swing, movement_number=2
-        )
-        helen_kettlebell_swing_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=helen_kettlebell_swing,
-                setting=rep,
-                setting_value=21,
-            )
-        )
-        helen_kettlebell_swing_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=helen_kettlebell_swing,
-                setting=weight,
-                setting_value=24,
-            )
-        )
-
-        helen_pullup = MovementsPerExercise.objects.create(
-            exercise=helen, movement=pullup, movement_number=3
-        )
-        helen_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=helen_pullup, setting=rep, setting_value=12
-            )
-        )
-        helen_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=helen_pullup, setting=lest, setting_value=0
-            )
-        )
-
-        # 10. Isabel
-
-        isabel = Exercise.objects.create(
-            name="isabel",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. L'objectif est de faire 30 snatch le plus rapidement possible!""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-
-        isabel_snatch = MovementsPerExercise.objects.create(
-            exercise=isabel, movement=snatch, movement_number=1
-        )
-        isabel_snatch_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=isabel_snatch, setting=rep, setting_value=30
-            )
-        )
-        isabel_snatch_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=isabel_snatch,
-                setting=weight,
-                setting_value=60,
-            )
-        )
-
-        # 11. Jackie
-
-        jackie = Exercise.objects.create(
-            name="jackie",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls très cardio qui va vous brûler les épaules!""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-        jackie_row = MovementsPerExercise.objects.create(
-            exercise=jackie, movement=row, movement_number=1
-        )
-        jackie_row_dist = MovementSettingsPerMovementsPerExercise(
-            exercise_movement=jackie_row, setting=dist, setting_value=1000
-        )
-        jackie_thruster = MovementsPerExercise.objects.create(
-            exercise=jackie, movement=thruster, movement_number=2
-        )
-        jackie_thruster_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=jackie_thruster,
-                setting=rep,
-                setting_value=50,
-            )
-        )
-        jackie_thruster_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=jackie_thruster,
-                setting=weight,
-                setting_value=20,
-            )
-        )
-        jackie_pullup = MovementsPerExercise.objects.create(
-            exercise=jackie, movement=pullup, movement_number=3
-        )
-        jackie_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=jackie_pullup, setting=rep, setting_value=30
-            )
-        )
-        jackie_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=jackie_pullup, setting=lest, setting_value=0
-            )
-        )
-
-        # 12. Karen
-
-        karen = Exercise.objects.create(
-            name="karen",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. L'objectif est de faire 150 wallball shots le plus rapidement possible!""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
-
-        karen_wallball = MovementsPerExercise.objects.create(
-            exercise=karen, movement=wallball, movement_number=1
-        )
-        karen_wallball_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=karen_wallball,
-                setting=rep,
-                setting_value=150,
-            )
-        )
-        karen_wallball_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=karen_wallball,
-                setting=weight,
-                setting_value=9,
-            )
-        )
-
-        # 13. Mary
-
-        mary = Exercise.objects.create(
-            name="mary",
-            exercise_type=Exercise.AMRAP,
-            description="""C'est un WOD Benchmark Girls. L'objectif est de faire le plus de tours possible en 20 minutes.""",
-            goal_type=Exercise.TIME,
-            goal_value=20,
-            is_default=True,
-            founder=founder,
-        )
-
-        mary_handstand_pushup = MovementsPerExercise.objects.create(
-            exercise=mary, movement=handstand_pushup, movement_number=1
-        )
-        mary_handstand_pushup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=mary_handstand_pushup,
-                setting=rep,
-                setting_value=5,
-            )
-        )
-        mary_handstand_pushup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=mary_handstand_pushup,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        mary_pistol = MovementsPerExercise.objects.create(
-            exercise=mary, movement=pistol, movement_number=2
-        )
-        mary_pistol_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=mary_pistol, setting=rep, setting_value=10
-            )
-        )
-        mary_pistol_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=mary_pistol, setting=lest, setting_value=0
-            )
-        )
-        mary_pullup = MovementsPerExercise.objects.create(
-            exercise=mary, movement=pullup, movement_number=3
-        )
-        mary_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=mary_pullup, setting=rep, setting_value=15
-            )
-        )
-        mary_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=mary_pullup, setting=lest, setting_value=0
-            )
-        )
-
-        # 14. Nancy
-
-        nancy = Exercise.objects.create(
-            name="nancy",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. L'objectif est de réaliser 5 tours le plus rapidement possible.""",
-            goal_type=Exercise.ROUND,
-            goal_value=5,
-            is_default=True,
-            founder=founder,
-        )
-
-        nancy_run = MovementsPerExercise.objects.create(
-            exercise=nancy, movement=run, movement_number=1
-        )
-        nancy_run_dist = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=nancy_run, setting=dist, setting_value=400
-            )
-        )
-        nancy_run_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=nancy_run, setting=lest, setting_value=0
-            )
-        )
-        nancy_overhead_squat = MovementsPerExercise.objects.create(
-            exercise=nancy, movement=overhead_squat, movement_number=2
-        )
-        nancy_overhead_squat_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=nancy_overhead_squat,
-                setting=rep,
-                setting_value=15,
-            )
+    def _load_named_objects(self, model, names, founder):
+        """
+        This private method creates the objects (settings or equipments)
+        missing in the database and returns all of them in a dict {name: object}
+        """
+        existing_names = set(
+            model.objects.filter(name__in=names).values_list('name', flat=True)
         )
-        nancy_overhead_squat_weight = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=nancy_overhead_squat,
-                setting=weight,
-                setting_value=40,
-            )
+        model.objects.bulk_create(
+            [
+                model(name=name, founder=founder)
+                for name in names
+                if name not in existing_names
+            ]
         )
+        return {obj.name: obj for obj in model.objects.filter(name__in=names)}
 
-        # 15. Annie
+    def _load_movements(self, founder, equipments, settings):
+        """
+        This private method creates the missing movements, updates the
+        equipment of the existing ones and makes their settings match the
+        catalogue. It returns all the movements in a dict {name: movement}
+        """
+        movements_dict = self.catalogue["movements"]
+        names = [movement_dict["name"] for movement_dict in movements_dict]
+        existing = {
+            movement.name: movement
+            for movement in Movement.objects.filter(name__in=names)
+        }
+
+        new_movements = []
+        changed_movements = []
+        for movement_dict in movements_dict:
+            equipment = equipments[movement_dict["equipment"]]
+            movement = existing.get(movement_dict["name"])
+            if movement is None:
+                new_movements.append(
+                    Movement(
+                        name=movement_dict["name"],
+                        founder=founder,
+                        equipment=equipment,
+                    )
+                )
+            elif movement.equipment_id != equipment.pk:
+                movement.equipment = equipment
+                changed_movements.append(movement)
+        Movement.objects.bulk_create(new_movements)
+        Movement.objects.bulk_update(changed_movements, ['equipment'])
+
+        movements = {
+            movement.name: movement
+            for movement in Movement.objects.filter(name__in=names)
+        }
+
+        # The settings of the movements are set through the association table
+        through = Movement.settings.through
+        expected = {
+            (movements[movement_dict["name"]].pk, settings[setting_name].pk)
+            for movement_dict in movements_dict
+            for setting_name in movement_dict["settings"]
+        }
+        current = {
+            (row.movement_id, row.movementsettings_id): row.pk
+            for row in through.objects.filter(
+                movement_id__in=[movement.pk for movement in movements.values()]
+            )
+        }
+        through.objects.filter(
+            pk__in=[pk for pair, pk in current.items() if pair not in expected]
+        ).delete()
+        through.objects.bulk_create(
+            [
+                through(movement_id=movement_pk, movementsettings_id=setting_pk)
+                for movement_pk, setting_pk in sorted(expected)
+                if (movement_pk, setting_pk) not in current
+            ]
+        )
+
+        return movements
+
+    def _load_exercises(self, founder, movements, settings):
+        """
+        This private method creates the missing default exercises and updates
+        the existing ones. When the movements or the settings of an exercise
+        differ from the catalogue, they are all registered again
+        """
+        exercises_dict = self.catalogue["exercises"]
+        names = [exercise_dict["name"] for exercise_dict in exercises_dict]
+        existing = {
+            exercise.name: exercise
+            for exercise in Exercise.objects.filter(
+                is_default=True, name__in=names
+            )
+        }
+
+        new_exercises = []
+        changed_exercises = []
+        exercises_to_link = []
+        fields = ['exercise_type', 'description', 'goal_type', 'goal_value']
+        for exercise_dict in exercises_dict:
+            exercise = existing.get(exercise_dict["name"])
+            if exercise is None:
+                new_exercises.append(
+                    Exercise(
+                        name=exercise_dict["name"],
+                        founder=founder,
+                        is_default=True,
+                        **{field: exercise_dict[field] for field in fields},
+                    )
+                )
+                exercises_to_link.append(exercise_dict)
+                continue
+
+            if any(
+                getattr(exercise, field) != exercise_dict[field]
+                for field in fields
+            ):
+                for field in fields:
+                    setattr(exercise, field, exercise_dict[field])
+                changed_exercises.append(exercise)
+            if self._get_structure(exercise) != exercise_dict["movements"]:
+                exercises_to_link.append(exercise_dict)
+
+        for exercise in changed_exercises:
+            # bulk_update does not send the signal renewing the version,
+            # nor set updated_at (auto_now)
+            exercise.movements_version += 1
+            exercise.updated_at = timezone.now()
+        Exercise.objects.bulk_create(new_exercises)
+        Exercise.objects.bulk_update(
+            changed_exercises, fields + ['movements_version', 'updated_at']
+        )
+        if not exercises_to_link:
+            return
+
+        exercises = {
+            exercise.name: exercise
+            for exercise in Exercise.objects.filter(
+                is_default=True,
+                name__in=[
+                    exercise_dict["name"] for exercise_dict in exercises_to_link
+                ],
+            )
+        }
+        MovementsPerExercise.objects.filter(
+            exercise__in=exercises.values()
+        ).delete()
+
+        links = [
+            (
+                MovementsPerExercise(
+                    exercise=exercises[exercise_dict["name"]],
+                    movement=movements[movement_dict["name"]],
+                    movement_number=movement_dict["order"],
+                ),
+                movement_dict,
+            )
+            for exercise_dict in exercises_to_link
+            for movement_dict in exercise_dict["movements"]
+        ]
+        movements_linked = MovementsPerExercise.objects.bulk_create(
+            [link for link, movement_dict in links]
+        )
+        if movements_linked and movements_linked[0].pk is None:
+            # The database does not return the primary keys of a bulk
+            # insert (SQLite): the rows are read again in their order
+            movements_linked = MovementsPerExercise.objects.filter(
+                exercise__in=exercises.values()
+            ).order_by('pk')
+
+        MovementSettingsPerMovementsPerExercise.objects.bulk_create(
+            [
+                MovementSettingsPerMovementsPerExercise(
+                    exercise_movement=movement_linked,
+                    setting=settings[setting_dict["name"]],
+                    setting_value=setting_dict["value"],
+                )
+                for movement_linked, (link, movement_dict) in zip(
+                    movements_linked, links
+                )
+                for setting_dict in movement_dict["settings"]
+            ],
+            batch_size=500,
+        )
+        # bulk_create does not send the signals rebuilding the documents
+        self.db_exercise.refresh_movements_documents(
+            pk__in=[exercise.pk for exercise in exercises.values()]
+        )
+
+    def _get_structure(self, exercise):
+        """
+        This private method returns the movements of an exercise (from its
+        movements document) in the same format as the catalogue
+        """
+        return [
+            {
+                "name": movement_dict["name"],
+                "order": movement_dict["order"],
+                "settings": movement_dict["settings"],
+            }
+            for movement_dict in exercise.movements_document
+        ]
 
-        annie = Exercise.objects.create(
-            name="annie",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Girls. C'est un exercise dégressif qu'il faut réaliser le plus rapidement possible""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
 
-        annie_double_under_50 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=double_under, movement_number=1
-        )
-        annie_double_under_50_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_50,
-                setting=rep,
-                setting_value=50,
-            )
-        )
-        annie_double_under_50_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_50,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        annie_situp_50 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=situp, movement_number=2
-        )
-        annie_situp_50_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_50, setting=rep, setting_value=50
-            )
-        )
-        annie_situp_50_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_50, setting=lest, setting_value=0
-            )
-        )
-        annie_double_under_40 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=double_under, movement_number=3
-        )
-        annie_double_under_40_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_40,
-                setting=rep,
-                setting_value=40,
-            )
-        )
-        annie_double_under_40_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_40,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        annie_situp_40 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=situp, movement_number=4
-        )
-        annie_situp_40_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_40, setting=rep, setting_value=40
-            )
-        )
-        annie_situp_40_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_40, setting=lest, setting_value=0
-            )
-        )
-        annie_double_under_30 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=double_under, movement_number=5
-        )
-        annie_double_under_30_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_30,
-                setting=rep,
-                setting_value=30,
-            )
-        )
-        annie_double_under_30_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_30,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        annie_situp_30 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=situp, movement_number=6
-        )
-        annie_situp_30_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_30, setting=rep, setting_value=30
-            )
-        )
-        annie_situp_30_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_30, setting=lest, setting_value=0
-            )
-        )
-        annie_double_under_20 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=double_under, movement_number=7
-        )
-        annie_double_under_20_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_20,
-                setting=rep,
-                setting_value=20,
-            )
-        )
-        annie_double_under_20_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_20,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        annie_situp_20 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=situp, movement_number=8
-        )
-        annie_situp_20_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_20, setting=rep, setting_value=20
-            )
-        )
-        annie_situp_20_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_20, setting=lest, setting_value=0
-            )
-        )
-        annie_double_under_10 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=double_under, movement_number=9
-        )
-        annie_double_under_10_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_10,
-                setting=rep,
-                setting_value=10,
-            )
-        )
-        annie_double_under_10_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_double_under_10,
-                setting=lest,
-                setting_value=0,
-            )
-        )
-        annie_situp_10 = MovementsPerExercise.objects.create(
-            exercise=annie, movement=situp, movement_number=10
-        )
-        annie_situp_10_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_10, setting=rep, setting_value=10
-            )
-        )
-        annie_situp_10_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=annie_situp_10, setting=lest, setting_value=0
-            )
-        )
-
-        # BENCHMARK HERO
-        # 1. Murph
-        murph = Exercise.objects.create(
-            name="murph",
-            exercise_type=Exercise.FORTIME,
-            description="""C'est un WOD Benchmark Hero. Certainement l'un des wods benchmarks les plus dur. L'objectif est de réaliser le plus rapidement possible l'ensemble des mouvements le plus rapidement possible avec un gilet lesté de 9 kg.""",
-            goal_type=Exercise.ROUND,
-            goal_value=1,
-            is_default=True,
-            founder=founder,
-        )
+class Command(BaseCommand):
+    help = "Initialise la base de données avec le catalogue par défaut"
 
-        murph_run_1 = MovementsPerExercise.objects.create(
-            exercise=murph, movement=run, movement_number=1
-        )
-        murph_run_1_dist = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_run_1, setting=dist, setting_value=1600
-            )
-        )
-        murph_run_1_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_run_1, setting=lest, setting_value=9
-            )
-        )
-        murph_pullup = MovementsPerExercise.objects.create(
-            exercise=murph, movement=pullup, movement_number=2
-        )
-        murph_pullup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_pullup, setting=rep, setting_value=100
-            )
-        )
-        murph_pullup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_pullup, setting=lest, setting_value=9
-            )
-        )
-        murph_pushup = MovementsPerExercise.objects.create(
-            exercise=murph, movement=pushup, movement_number=3
-        )
-        murph_pushup_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_pushup, setting=rep, setting_value=200
-            )
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help="N'applique que les différences sans vider la base",
         )
-        murph_pushup_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_pushup, setting=lest, setting_value=9
-            )
-        )
-        murph_squat = MovementsPerExercise.objects.create(
-            exercise=murph, movement=squat, movement_number=4
-        )
-        murph_squat_rep = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_squat, setting=rep, setting_value=300
-            )
-        )
-        murph_squat_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_squat, setting=lest, setting_value=9
-            )
-        )
-        murph_run_2 = MovementsPerExercise.objects.create(
-            exercise=murph, movement=run, movement_number=5
+        parser.add_argument(
+            '--catalogue',
+            default=CATALOGUE_PATH,
+            help="Chemin du fichier JSON du catalogue",
         )
-        murph_run_2_dist = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_run_2, setting=dist, setting_value=1600
-            )
-        )
-        murph_run_2_lest = (
-            MovementSettingsPerMovementsPerExercise.objects.create(
-                exercise_movement=murph_run_2, setting=lest, setting_value=9
-            )
-        )
-
 
-class Command(BaseCommand):
     def handle(self, *args, **options):
-        db_init = DBinit()
-        db_init.clean_db()
+        db_init = DBinit(options['catalogue'])
+        if not options['upsert']:
+            db_init.clean_db()
         db_init.start()
 
-        self.stdout.write("Base de données initialisée")
\ No newline at end of file
+        self.stdout.write("Base de données initialisée")
@@ -0,0 +1,55 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from ...utils.treatments import DataTreatment
+
+
+class Command(BaseCommand):
+    help = "Importe les entraînements d'un fichier CSV ou JSON pour un utilisateur"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier CSV ou JSON à importer")
+        parser.add_argument(
+            '--user',
+            required=True,
+            help="Nom de l'utilisateur à qui appartiennent les entraînements",
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json'],
+            help="Format du fichier (déduit de l'extension par défaut)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Nombre d'entraînements insérés par requête",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(
+                "L'utilisateur {} n'existe pas".format(options['user'])
+            )
+
+        file_format = options['format'] or (
+            os.path.splitext(options['path'])[1].lstrip('.').lower()
+        )
+        try:
+            with open(
+                options['path'], encoding='utf-8-sig', newline=''
+            ) as text_file:
+                imported_number = DataTreatment().import_trainings_from_file(
+                    text_file, file_format, user, options['batch_size']
+                )
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError("L'import a échoué. {}".format(e))
+
+        self.stdout.write(
+            "{} entraînements importés pour {}".format(
+                imported_number, user.username
+            )
+        )
@@ -0,0 +1,74 @@
+import io
+import pstats
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Liste les derniers profils cProfile enregistrés et résume "
+        "les fonctions les plus coûteuses"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'name',
+            nargs='?',
+            help="Nom (ou début du nom) du profil à résumer",
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help="Nombre de profils listés",
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=15,
+            help="Nombre de fonctions affichées dans un résumé",
+        )
+        parser.add_argument(
+            '--sort',
+            default='cumulative',
+            help="Clé de tri pstats (cumulative, tottime, calls...)",
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(settings.PROFILING_DIR)
+        dumps = sorted(
+            directory.glob('*.prof'),
+            key=lambda dump: dump.stat().st_mtime,
+            reverse=True,
+        )
+        if not dumps:
+            self.stdout.write("Aucun profil dans {}".format(directory))
+            return
+
+        if options['name']:
+            matches = [
+                dump for dump in dumps if dump.name.startswith(options['name'])
+            ]
+            if not matches:
+                raise CommandError(
+                    "Aucun profil ne correspond à {}".format(options['name'])
+                )
+            self._summarize(matches[0], options['top'], options['sort'])
+            return
+
+        for dump in dumps[: options['limit']]:
+            stats = pstats.Stats(str(dump), stream=io.StringIO())
+            self.stdout.write(
+                "{}  {:>9.3f}s  {:>8} appels".format(
+                    dump.stem, stats.total_tt, stats.total_calls
+                )
+            )
+
+    def _summarize(self, dump, top, sort):
+        summary = io.StringIO()
+        stats = pstats.Stats(str(dump), stream=summary)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+        self.stdout.write(dump.stem)
+        self.stdout.write(summary.getvalue())
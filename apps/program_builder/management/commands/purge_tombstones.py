@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ...utils.db_interactions import DBTombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les traces des exercices et entraînements supprimés "
+        "plus anciennes que SYNC_TOMBSTONES_RETENTION jours (les clients "
+        "qui se synchronisent plus tard reçoivent tout leur compte)"
+    )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONES_RETENTION)
+        tombstones_number, deleted = DBTombstone().del_tombstones_before(before)
+
+        self.stdout.write(
+            "{} traces de suppression effacées".format(tombstones_number)
+        )
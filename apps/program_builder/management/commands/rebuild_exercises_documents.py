@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from ...utils.db_interactions import DBExercise
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit le document des mouvements de chaque exercice "
+        "depuis les tables de liens"
+    )
+
+    def handle(self, *args, **options):
+        exercises_number = DBExercise().refresh_movements_documents()
+
+        self.stdout.write(
+            "{} documents d'exercices reconstruits".format(exercises_number)
+        )
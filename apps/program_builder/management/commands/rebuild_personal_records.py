@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from ...utils.db_interactions import DBPersonalRecord
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les records personnels à partir des entraînements"
+
+    def handle(self, *args, **options):
+        db_record = DBPersonalRecord()
+        records_number = db_record.rebuild_all_personal_records()
+
+        self.stdout.write(
+            "{} records personnels reconstruits".format(records_number)
+        )
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from ...utils.db_interactions import DBTrainingRollup
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les bilans quotidiens et hebdomadaires des entraînements"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help="Nom de l'utilisateur dont les bilans sont reconstruits "
+            "(tous les utilisateurs par défaut)",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    "L'utilisateur {} n'existe pas".format(options['user'])
+                )
+
+        days_number, weeks_number = (
+            DBTrainingRollup().rebuild_trainings_rollups(user)
+        )
+
+        self.stdout.write(
+            "{} bilans quotidiens et {} bilans hebdomadaires reconstruits".format(
+                days_number, weeks_number
+            )
+        )
@@ -0,0 +1,72 @@
+# Generated by Django 3.1.14 on 2026-10-18 07:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def build_personal_records(apps, schema_editor):
+    """
+    Fill the personal records from the trainings already registered
+    (same rules as DBPersonalRecord.rebuild_all_personal_records)
+    """
+    Training = apps.get_model('program_builder', 'Training')
+    PersonalRecord = apps.get_model('program_builder', 'PersonalRecord')
+
+    records = {}
+    trainings = (
+        Training.objects.filter(performance_value__isnull=False)
+        .exclude(performance_value=0)
+        .select_related('exercise')
+        .order_by('date', 'pk')
+    )
+    for training in trainings.iterator():
+        goal_type = training.exercise.goal_type
+        key = (training.founder_id, training.exercise_id)
+        record = records.get(key)
+        if goal_type == 'duree':
+            is_better = record is None or training.performance_value > record.performance_value
+        elif goal_type in ('round', 'distance'):
+            is_better = record is None or training.performance_value < record.performance_value
+        else:
+            is_better = False
+        if is_better:
+            records[key] = PersonalRecord(
+                user_id=training.founder_id,
+                exercise_id=training.exercise_id,
+                training_id=training.pk,
+                performance_value=training.performance_value,
+                date=training.date,
+            )
+    PersonalRecord.objects.bulk_create(records.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('program_builder', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('performance_value', models.IntegerField()),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='program_builder.exercise')),
+                ('training', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='program_builder.training', verbose_name='the training which set the record')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name="the record's owner")),
+            ],
+            options={
+                'verbose_name': 'record personnel',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='personalrecord',
+            constraint=models.UniqueConstraint(fields=('user', 'exercise'), name='unique_personal_record'),
+        ),
+        migrations.RunPython(build_personal_records, migrations.RunPython.noop),
+    ]
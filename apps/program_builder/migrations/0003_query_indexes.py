@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('program_builder', '0002_personalrecord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(condition=models.Q(is_default=True), fields=['is_default'], name='exercise_default_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementsperexercise',
+            index=models.Index(fields=['exercise', 'movement_number'], name='mvt_per_exo_exo_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['founder', '-date', '-id'], name='training_founder_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['founder', 'exercise', '-date'], name='training_founder_exo_date_idx'),
+        ),
+    ]
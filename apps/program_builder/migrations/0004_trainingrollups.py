@@ -0,0 +1,92 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:13
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_trainings_rollups(apps, schema_editor):
+    """
+    Fill the daily and weekly rollups from the trainings already done
+    (same rules as DBTrainingRollup.rebuild_trainings_rollups)
+    """
+    Training = apps.get_model('program_builder', 'Training')
+    TrainingDailyRollup = apps.get_model('program_builder', 'TrainingDailyRollup')
+    TrainingWeeklyRollup = apps.get_model('program_builder', 'TrainingWeeklyRollup')
+
+    rollups = {}
+    trainings = Training.objects.filter(done=True).values_list(
+        'founder_id', 'date', 'exercise__exercise_type', 'performance_type', 'performance_value'
+    )
+    for user_pk, date, exercise_type, performance_type, performance_value in trainings.iterator():
+        day = date.date()
+        week = day - datetime.timedelta(days=day.weekday())
+        for key in (('day', user_pk, day), ('week', user_pk, week)):
+            values = rollups.setdefault(key, {
+                'trainings_done': 0, 'total_time': 0, 'exercise_types': {},
+            })
+            values['trainings_done'] += 1
+            if performance_type == 'duree' and performance_value:
+                values['total_time'] += performance_value
+            values['exercise_types'][exercise_type] = values['exercise_types'].get(exercise_type, 0) + 1
+
+    TrainingDailyRollup.objects.bulk_create(
+        [TrainingDailyRollup(user_id=user_pk, day=day, **values)
+         for (period, user_pk, day), values in rollups.items() if period == 'day'],
+        batch_size=500,
+    )
+    TrainingWeeklyRollup.objects.bulk_create(
+        [TrainingWeeklyRollup(user_id=user_pk, week=week, **values)
+         for (period, user_pk, week), values in rollups.items() if period == 'week'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('program_builder', '0003_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingWeeklyRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trainings_done', models.PositiveIntegerField(default=0)),
+                ('total_time', models.PositiveIntegerField(default=0, verbose_name="seconds of the 'duree' trainings done")),
+                ('exercise_types', models.JSONField(default=dict, verbose_name='trainings done per exercise type')),
+                ('week', models.DateField(verbose_name='monday of the ISO week')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name="the rollup's owner")),
+            ],
+            options={
+                'verbose_name': 'bilan hebdomadaire',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrainingDailyRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trainings_done', models.PositiveIntegerField(default=0)),
+                ('total_time', models.PositiveIntegerField(default=0, verbose_name="seconds of the 'duree' trainings done")),
+                ('exercise_types', models.JSONField(default=dict, verbose_name='trainings done per exercise type')),
+                ('day', models.DateField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name="the rollup's owner")),
+            ],
+            options={
+                'verbose_name': 'bilan quotidien',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trainingweeklyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'week'), name='unique_training_weekly_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='trainingdailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='unique_training_daily_rollup'),
+        ),
+        migrations.RunPython(build_trainings_rollups, migrations.RunPython.noop),
+    ]
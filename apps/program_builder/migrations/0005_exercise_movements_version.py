@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('program_builder', '0004_trainingrollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='movements_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+def build_movements_documents(apps, schema_editor):
+    """
+    Fill the movements document of the existing exercises from the link
+    tables (same structure as DBExercise.refresh_movements_documents)
+    """
+    Exercise = apps.get_model('program_builder', 'Exercise')
+    MovementsPerExercise = apps.get_model('program_builder', 'MovementsPerExercise')
+    MovementSettingsPerMovementsPerExercise = apps.get_model(
+        'program_builder', 'MovementSettingsPerMovementsPerExercise'
+    )
+
+    settings = {}
+    settings_linked = MovementSettingsPerMovementsPerExercise.objects.order_by('pk').values_list(
+        'exercise_movement_id', 'setting__name', 'setting_value'
+    )
+    for movement_linked_pk, name, value in settings_linked.iterator():
+        settings.setdefault(movement_linked_pk, []).append({"name": name, "value": value})
+
+    documents = {}
+    movements_linked = MovementsPerExercise.objects.order_by('movement_number', 'pk').values_list(
+        'pk', 'exercise_id', 'movement_id', 'movement__name', 'movement_number'
+    )
+    for pk, exercise_pk, movement_pk, name, order in movements_linked.iterator():
+        documents.setdefault(exercise_pk, []).append({
+            "id": movement_pk,
+            "name": name,
+            "order": order,
+            "settings": settings.get(pk, []),
+        })
+
+    exercises = list(Exercise.objects.filter(pk__in=list(documents)).only('pk'))
+    for exercise in exercises:
+        exercise.movements_document = documents[exercise.pk]
+    Exercise.objects.bulk_update(exercises, ['movements_document'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('program_builder', '0005_exercise_movements_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='movements_document',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(build_movements_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('program_builder', '0007_sync_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(condition=models.Q(done=False), fields=['founder'], name='training_founder_todo_idx'),
+        ),
+    ]
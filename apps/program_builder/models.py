@@ -33,10 +33,179 @@ class Training(models.Model):
     )
     performance_value = models.IntegerField(null=True)
 
+    # Last change, read by the sync API (see DataTreatment.get_changes_since)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Trainings of a user changed since the last sync
+            models.Index(
+                fields=['founder', 'updated_at'],
+                name='training_founder_updated_idx',
+            ),
+            # Trainings of a user from the most recent (trainings list)
+            models.Index(
+                fields=['founder', '-date', '-id'],
+                name='training_founder_date_idx',
+            ),
+            # Trainings of a user for one exercise (exercise page, records)
+            models.Index(
+                fields=['founder', 'exercise', '-date'],
+                name='training_founder_exo_date_idx',
+            ),
+            # Trainings of a user not done yet (counters, the trainings
+            # done are summed from the rollups)
+            models.Index(
+                fields=['founder'],
+                name='training_founder_todo_idx',
+                condition=models.Q(done=False),
+            ),
+        ]
+
     def __str__(self):
         return "{} - {}".format(self.exercise.name, self.date)
 
 
+class PersonalRecord(models.Model):
+    """
+    This class represents the personal record of a user for an exercise.
+    It is kept up to date each time a training is saved or deleted so
+    the record is read directly instead of being computed from all the
+    trainings of the user
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name="the record's owner"
+    )
+    exercise = models.ForeignKey('Exercise', on_delete=models.CASCADE)
+    training = models.ForeignKey(
+        'Training',
+        on_delete=models.SET_NULL,
+        null=True,
+        verbose_name="the training which set the record",
+    )
+    performance_value = models.IntegerField()
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'record personnel'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'exercise'], name='unique_personal_record'
+            ),
+        ]
+
+    def __str__(self):
+        return "{} - {} : {}".format(
+            self.user.username, self.exercise.name, self.performance_value
+        )
+
+
+class TrainingRollup(models.Model):
+    """
+    This abstract class represents the summary of the trainings done by a
+    user over a period. The rollups are kept up to date each time a
+    training is saved or deleted so the dashboards read a few rows instead
+    of all the trainings of the user
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name="the rollup's owner"
+    )
+    trainings_done = models.PositiveIntegerField(default=0)
+    total_time = models.PositiveIntegerField(
+        default=0, verbose_name="seconds of the 'duree' trainings done"
+    )
+    exercise_types = models.JSONField(
+        default=dict, verbose_name="trainings done per exercise type"
+    )
+
+    class Meta:
+        abstract = True
+
+
+class TrainingDailyRollup(TrainingRollup):
+    """
+    This class represents the trainings done by a user in one day
+    """
+
+    day = models.DateField()
+
+    class Meta:
+        verbose_name = 'bilan quotidien'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day'], name='unique_training_daily_rollup'
+            ),
+        ]
+
+    def __str__(self):
+        return "{} - {} : {}".format(
+            self.user.username, self.day, self.trainings_done
+        )
+
+
+class TrainingWeeklyRollup(TrainingRollup):
+    """
+    This class represents the trainings done by a user in one ISO week
+    """
+
+    week = models.DateField(verbose_name="monday of the ISO week")
+
+    class Meta:
+        verbose_name = 'bilan hebdomadaire'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'week'], name='unique_training_weekly_rollup'
+            ),
+        ]
+
+    def __str__(self):
+        return "{} - {} : {}".format(
+            self.user.username, self.week, self.trainings_done
+        )
+
+
+class Tombstone(models.Model):
+    """
+    This class represents the deletion of an exercise or of a training,
+    so the sync API can tell the clients to remove it. The tombstones of
+    the default exercises have no user: they concern all the users
+    """
+
+    EXERCISE = "exercise"
+    TRAINING = "training"
+    MODEL_NAMES = (
+        (EXERCISE, 'exercise'),
+        (TRAINING, 'training'),
+    )
+
+    model_name = models.CharField(max_length=20, choices=MODEL_NAMES)
+    object_pk = models.PositiveIntegerField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        verbose_name="the owner of the deleted object",
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'suppression'
+        indexes = [
+            # Deletions of a user since the last sync
+            models.Index(
+                fields=['user', 'deleted_at'],
+                name='tombstone_user_deleted_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return "{} {} : {}".format(
+            self.model_name, self.object_pk, self.deleted_at
+        )
+
+
 class Exercise(models.Model):
     """
     This class represents the exercises created
@@ -82,6 +251,16 @@ class Exercise(models.Model):
         User, on_delete=models.CASCADE, verbose_name="the execise's creator"
     )
     is_default = models.BooleanField(default=False)
+    # Incremented each time the exercise, its movements or their settings
+    # change, so its cached structure and fragments are renewed
+    movements_version = models.PositiveIntegerField(default=0)
+    # Copy of the movements and their settings read with the exercise,
+    # rebuilt from the link tables (the source of truth) each time they
+    # change: see DBExercise.refresh_movements_documents
+    movements_document = models.JSONField(default=list, editable=False)
+    # Last change of the exercise or of its movements document, read by
+    # the sync API
+    updated_at = models.DateTimeField(auto_now=True)
     movements = models.ManyToManyField(
         'Movement',
         through='MovementsPerExercise',
@@ -91,6 +270,20 @@ class Exercise(models.Model):
 
     class Meta:
         verbose_name = 'exercice'
+        indexes = [
+            # Only the default exercises are indexed: they are read with
+            # the exercises of a user (founder=user OR is_default=True)
+            models.Index(
+                fields=['is_default'],
+                name='exercise_default_idx',
+                condition=models.Q(is_default=True),
+            ),
+            # Exercises of a user changed since the last sync
+            models.Index(
+                fields=['founder', 'updated_at'],
+                name='exercise_founder_updated_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -107,6 +300,7 @@ class MovementsPerExercise(models.Model):
     movement = models.ForeignKey('Movement', on_delete=models.CASCADE)
 
     movement_number = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     movement_settings = models.ManyToManyField(
         'MovementSettings',
@@ -115,6 +309,15 @@ class MovementsPerExercise(models.Model):
         verbose_name="settings value per movement for one exercise",
     )
 
+    class Meta:
+        indexes = [
+            # Movements of an exercise in their order
+            models.Index(
+                fields=['exercise', 'movement_number'],
+                name='mvt_per_exo_exo_number_idx',
+            ),
+        ]
+
     def __str__(self):
         return "{} - {} - {}".format(
             self.exercise.name, self.movement.name, self.movement_number
@@ -139,6 +342,7 @@ class MovementSettingsPerMovementsPerExercise(models.Model):
         verbose_name="the setting linked to the movement associated to the exercise",
     )
     setting_value = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return "{} : {} -> {} : {}".format(
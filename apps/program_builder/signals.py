@@ -0,0 +1,235 @@
+import threading
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+from .models import (
+    Training,
+    Exercise,
+    Movement,
+    MovementSettings,
+    Equipment,
+    Tombstone,
+    MovementsPerExercise,
+    MovementSettingsPerMovementsPerExercise,
+)
+from .utils.db_interactions import (
+    DBExercise,
+    DBPersonalRecord,
+    DBTrainingRollup,
+    DBTombstone,
+)
+from .utils.caches import MovementsCatalogue
+from .utils.registry import LookupTables
+
+
+# Primary keys of the objects being deleted in this thread, per model:
+# the receivers of the rows deleted in cascade leave out the work which
+# would be lost with their parent
+_deletions = threading.local()
+
+
+def _get_deleting_pks(model):
+    if not hasattr(_deletions, "pks"):
+        _deletions.pks = {}
+    return _deletions.pks.setdefault(model, set())
+
+
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=Exercise)
+@receiver(pre_delete, sender=MovementsPerExercise)
+def start_deletion(sender, instance, **kwargs):
+    _get_deleting_pks(sender).add(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=MovementsPerExercise)
+def end_deletion(sender, instance, **kwargs):
+    _get_deleting_pks(sender).discard(instance.pk)
+
+
+@receiver(post_save, sender=Training)
+def update_personal_record(sender, instance, raw=False, **kwargs):
+    """
+    Each time a training is saved, the personal record of its founder
+    for its exercise is updated with the new performance
+    """
+    if raw:
+        return
+    DBPersonalRecord().set_personal_record_from_training(instance)
+
+
+@receiver(post_delete, sender=Training)
+def refresh_personal_record(sender, instance, **kwargs):
+    """
+    When a training with a performance is deleted, the personal record
+    is computed again without it (unless the record is deleted with the
+    exercise or the user)
+    """
+    if (
+        instance.performance_value
+        and instance.exercise_id not in _get_deleting_pks(Exercise)
+        and instance.founder_id not in _get_deleting_pks(User)
+    ):
+        DBPersonalRecord().refresh_personal_record(
+            instance.founder_id, instance.exercise_id
+        )
+
+
+@receiver(post_save, sender=Training)
+def update_trainings_rollups(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Each time a training is saved, the daily and weekly rollups of its
+    date are computed again (a new training not done changes nothing)
+    """
+    if raw or (created and not instance.done):
+        return
+    DBTrainingRollup().refresh_trainings_rollups(
+        instance.founder_id, instance.date
+    )
+
+
+@receiver(post_delete, sender=Training)
+def refresh_trainings_rollups(sender, instance, **kwargs):
+    """
+    When a training done is deleted, the rollups of its date are
+    computed again without it (unless they are deleted with the user)
+    """
+    if instance.done and instance.founder_id not in _get_deleting_pks(User):
+        DBTrainingRollup().refresh_trainings_rollups(
+            instance.founder_id, instance.date
+        )
+
+
+@receiver(post_delete, sender=Training)
+def set_training_tombstone(sender, instance, **kwargs):
+    """
+    A deleted training leaves a tombstone so the sync API tells the
+    clients of its founder to remove it (unless the founder is deleted)
+    """
+    if instance.founder_id in _get_deleting_pks(User):
+        return
+    DBTombstone().set_tombstone(
+        Tombstone.TRAINING, instance.pk, instance.founder_id
+    )
+
+
+@receiver(post_delete, sender=Exercise)
+def set_exercise_tombstone(sender, instance, **kwargs):
+    """
+    A deleted exercise leaves a tombstone for its founder (unless the
+    founder is deleted), or for all the users when it is a default exercise
+    """
+    if instance.is_default:
+        user_pk = None
+    elif instance.founder_id in _get_deleting_pks(User):
+        return
+    else:
+        user_pk = instance.founder_id
+    DBTombstone().set_tombstone(Tombstone.EXERCISE, instance.pk, user_pk)
+
+
+@receiver(post_save, sender=Movement)
+@receiver(post_delete, sender=Movement)
+@receiver(post_save, sender=MovementSettings)
+@receiver(post_delete, sender=MovementSettings)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+@receiver(m2m_changed, sender=Movement.settings.through)
+def invalidate_movements_catalogue(sender, **kwargs):
+    """
+    The movements catalogue is built again after any change of a movement,
+    of its settings or of an equipment
+    """
+    MovementsCatalogue().invalidate()
+
+
+@receiver(post_save, sender=MovementSettings)
+@receiver(post_delete, sender=MovementSettings)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def refresh_lookup_tables(sender, **kwargs):
+    """
+    The in-process tables of the settings and the equipments are loaded
+    again after any change of one of them
+    """
+    LookupTables.invalidate()
+
+
+@receiver(pre_save, sender=Exercise)
+def bump_exercise_version(sender, instance, raw=False, **kwargs):
+    """
+    A changed exercise gets a new version so its cached structure
+    (shared by all the users when it is a default one) is renewed
+    """
+    if raw or instance._state.adding:
+        return
+    instance.movements_version += 1
+
+
+@receiver(post_save, sender=MovementsPerExercise)
+@receiver(post_delete, sender=MovementsPerExercise)
+def refresh_exercise_movements_document(sender, instance, raw=False, **kwargs):
+    """
+    The movements document of an exercise (and its cached blocks) is
+    rebuilt when one of its movements is added, changed or removed,
+    except when the exercise itself is deleted
+    """
+    if raw or instance.exercise_id in _get_deleting_pks(Exercise):
+        return
+    DBExercise().refresh_movements_documents(pk=instance.exercise_id)
+
+
+@receiver(post_save, sender=MovementSettingsPerMovementsPerExercise)
+@receiver(post_delete, sender=MovementSettingsPerMovementsPerExercise)
+def refresh_exercise_settings_document(sender, instance, raw=False, **kwargs):
+    """
+    The movements document of an exercise (and its cached blocks) is
+    rebuilt when one of the settings of its movements is added, changed
+    or removed, except when its movement is deleted too (the movement
+    rebuilds it, see above)
+    """
+    if raw or instance.exercise_movement_id in _get_deleting_pks(MovementsPerExercise):
+        return
+    DBExercise().refresh_movements_documents(
+        movementsperexercise=instance.exercise_movement_id
+    )
+
+
+@receiver(post_save, sender=Movement)
+@receiver(post_save, sender=MovementSettings)
+def refresh_exercises_names_document(sender, instance, created=False, raw=False, **kwargs):
+    """
+    The movements documents show the names of the movements and of the
+    settings: the exercises using a renamed one are rebuilt
+    """
+    if raw or created:
+        return
+    if sender is Movement:
+        DBExercise().refresh_movements_documents(
+            movementsperexercise__movement=instance
+        )
+    else:
+        DBExercise().refresh_movements_documents(
+            movementsperexercise__movementsettingspermovementsperexercise__setting=instance
+        )
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Each new SQLite connection is tuned with the PRAGMA of SQLITE_PRAGMAS
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute('PRAGMA {} = {}'.format(name, value))
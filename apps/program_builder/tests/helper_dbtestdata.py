@@ -1,7 +1,9 @@
 #! /usr/bin/env python3
 # coding: utf-8
-from datetime import datetime
+import random
+from datetime import datetime, timedelta
 from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
 
 from program_builder.models import (
     Training,
@@ -12,6 +14,12 @@ from program_builder.models import (
     Equipment,
     MovementSettingsPerMovementsPerExercise,
 )
+from program_builder.utils.db_interactions import (
+    DBExercise,
+    DBTraining,
+    DBPersonalRecord,
+    DBTrainingRollup,
+)
 
 
 class TestDatabase:
@@ -251,3 +259,129 @@ class TestDatabase:
             date=date,
             performance_type=Training.ROUND,
         )
+
+    @staticmethod
+    def create_synthetic(
+        users=3,
+        exercises=20,
+        movements_per_exercise=4,
+        trainings_per_user=200,
+        seed=0,
+    ):
+        """
+        Create the test database then a synthetic volume of data on top of it:
+            - users named bench_user_<n>
+            - default exercises named bench_exercise_<n>, each one with
+            movements_per_exercise movements and two settings per movement
+            - trainings_per_user trainings for each bench user, one per day
+        Everything is inserted with bulk_create, the movements documents, the
+        personal records and the rollups are built afterwards. The users are
+        returned
+        """
+        TestDatabase.create()
+        rng = random.Random(seed)
+        db_exercise = DBExercise()
+        db_training = DBTraining()
+
+        admin_user = User.objects.get(username='admin_user')
+        movements = list(Movement.objects.order_by('pk'))
+        settings = list(MovementSettings.objects.order_by('pk'))[:2]
+
+        # We create the users
+        password = make_password('bench_password')
+        User.objects.bulk_create(
+            [
+                User(username='bench_user_{}'.format(number), password=password)
+                for number in range(users)
+            ]
+        )
+        bench_users = list(
+            User.objects.filter(username__startswith='bench_user_')
+        )
+
+        # We create the exercises with their movements and settings
+        exercise_types = [
+            exercise_type for exercise_type, label in Exercise.EXERCISE_TYPE
+        ]
+        Exercise.objects.bulk_create(
+            [
+                Exercise(
+                    name='bench_exercise_{}'.format(number),
+                    exercise_type=exercise_types[number % len(exercise_types)],
+                    description="synthetic exercise",
+                    goal_type=db_exercise._define_goal_type(
+                        exercise_types[number % len(exercise_types)]
+                    ),
+                    goal_value=rng.randint(1, 30),
+                    is_default=True,
+                    founder=admin_user,
+                )
+                for number in range(exercises)
+            ]
+        )
+        bench_exercises = list(
+            Exercise.objects.filter(
+                name__startswith='bench_exercise_'
+            ).order_by('pk')
+        )
+        MovementsPerExercise.objects.bulk_create(
+            [
+                MovementsPerExercise(
+                    exercise=exercise,
+                    movement=rng.choice(movements),
+                    movement_number=number,
+                )
+                for exercise in bench_exercises
+                for number in range(1, movements_per_exercise + 1)
+            ],
+            batch_size=500,
+        )
+        MovementSettingsPerMovementsPerExercise.objects.bulk_create(
+            [
+                MovementSettingsPerMovementsPerExercise(
+                    exercise_movement=exercise_movement,
+                    setting=setting,
+                    setting_value=rng.randint(0, 50),
+                )
+                for exercise_movement in MovementsPerExercise.objects.filter(
+                    exercise__in=bench_exercises
+                )
+                for setting in settings
+            ],
+            batch_size=500,
+        )
+        # bulk_create does not send the signals building the movements
+        # documents
+        db_exercise.refresh_movements_documents(
+            pk__in=[exercise.pk for exercise in bench_exercises]
+        )
+
+        # We create the trainings, most of them are done
+        start_date = datetime(2015, 1, 1)
+        trainings = []
+        for user in bench_users:
+            for number in range(trainings_per_user):
+                exercise = rng.choice(bench_exercises)
+                done = rng.random() < 0.8
+                trainings.append(
+                    Training(
+                        exercise=exercise,
+                        founder=user,
+                        date=start_date + timedelta(days=number),
+                        performance_type=db_training._set_performance_type(
+                            exercise
+                        ),
+                        performance_value=rng.randint(60, 1800)
+                        if done
+                        else None,
+                        done=done,
+                    )
+                )
+        Training.objects.bulk_create(trainings, batch_size=500)
+
+        # bulk_create does not send the signals updating the records
+        # and the rollups
+        DBPersonalRecord().rebuild_all_personal_records()
+        DBTrainingRollup().rebuild_trainings_rollups()
+
+        return bench_users
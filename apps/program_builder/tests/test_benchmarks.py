@@ -0,0 +1,172 @@
+#! /usr/bin/env python3
+# coding: utf-8
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.core.cache import cache
+
+from program_builder.models import Exercise, Movement
+from program_builder.utils.registry import LookupTables
+from .helper_dbtestdata import TestDatabase
+
+# Volume of synthetic data, can be increased with environment variables:
+# BENCHMARK_USERS=10 BENCHMARK_TRAININGS_PER_USER=5000 ./manage.py test ...
+SCALE = {
+    'users': int(os.getenv('BENCHMARK_USERS', 3)),
+    'exercises': int(os.getenv('BENCHMARK_EXERCISES', 20)),
+    'movements_per_exercise': int(
+        os.getenv('BENCHMARK_MOVEMENTS_PER_EXERCISE', 4)
+    ),
+    'trainings_per_user': int(os.getenv('BENCHMARK_TRAININGS_PER_USER', 200)),
+}
+
+# Maximum number of queries per view, whatever the volume of data
+# (the session and the user of the request are included)
+QUERIES_BUDGET = {
+    'exercises_list': 5,
+    'exercise_page': 4,
+    'trainings_list': 8,
+    'ajax_all_movements': 4,
+    # The movements document of the new exercise is built in the request
+    'add_exercise': 13,
+}
+
+# The JSON report is written in this file if the variable is set
+REPORT_PATH = os.getenv('BENCHMARK_REPORT')
+
+
+class ViewsBenchmarkTestCase(TestCase):
+    """
+    This class measures the number of queries, the time and the peak of
+    memory of the program_builder views on a synthetic database.
+    A test fails when a view exceeds its budget of queries
+    """
+
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bench_users = TestDatabase.create_synthetic(**SCALE)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if REPORT_PATH:
+            report = {
+                'date': datetime.now().isoformat(),
+                'scale': SCALE,
+                'budget': QUERIES_BUDGET,
+                'results': cls.results,
+            }
+            with open(REPORT_PATH, 'w') as report_file:
+                json.dump(report, report_file, indent=4, sort_keys=True)
+
+    def setUp(self):
+        self.user = self.bench_users[0]
+        self.client.force_login(self.user)
+        cache.clear()
+        # The lookup tables are loaded once for the life of the process
+        LookupTables.invalidate()
+        LookupTables().get_setting_by_name("repetitions")
+
+    def measure(self, view_name, request):
+        """
+        Run the request and record its number of queries, its duration
+        and its peak of memory
+        """
+        tracemalloc.start()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        duration = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.results[view_name] = {
+            'status_code': response.status_code,
+            'queries': len(queries),
+            'time_ms': round(duration * 1000, 2),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+        self.assertLess(response.status_code, 400)
+        self.assertLessEqual(
+            len(queries),
+            QUERIES_BUDGET[view_name],
+            "{} made {} queries:\n{}".format(
+                view_name,
+                len(queries),
+                "\n".join(query['sql'] for query in queries),
+            ),
+        )
+        return response
+
+    def test_synthetic_exercises_have_movements(self):
+        """
+        The pages measured render the movements of the synthetic exercises
+        """
+        self.assertFalse(
+            Exercise.objects.filter(
+                name__startswith='bench_exercise_', movements_document=[]
+            ).exists()
+        )
+
+    def test_exercises_list(self):
+        self.measure(
+            'exercises_list',
+            lambda: self.client.get(reverse('program_builder:exercises_list')),
+        )
+
+    def test_exercise_page(self):
+        exercise = Exercise.objects.filter(is_default=True).last()
+        self.measure(
+            'exercise_page',
+            lambda: self.client.get(
+                reverse('program_builder:exercise_page', args=(exercise.pk,))
+            ),
+        )
+
+    def test_trainings_list(self):
+        self.measure(
+            'trainings_list',
+            lambda: self.client.get(reverse('program_builder:trainings_list')),
+        )
+
+    def test_ajax_all_movements(self):
+        self.measure(
+            'ajax_all_movements',
+            lambda: self.client.get(
+                reverse('program_builder:ajax_all_movements')
+            ),
+        )
+
+    def test_add_exercise(self):
+        movements = list(Movement.objects.all()[:3])
+        exercise_dict = {
+            "name": "bench new exercise",
+            "exerciseType": "FORTIME",
+            "description": "benchmark",
+            "goalType": "Nombre de tours",
+            "goalValue": 5,
+            "movements": [
+                {
+                    "name": movement.name,
+                    "order": order,
+                    "settings": [{"name": "repetitions", "value": 10}],
+                }
+                for order, movement in enumerate(movements, start=1)
+            ],
+        }
+        self.measure(
+            'add_exercise',
+            lambda: self.client.post(
+                reverse('program_builder:add_exercise'),
+                json.dumps(exercise_dict),
+                content_type='application/json',
+            ),
+        )
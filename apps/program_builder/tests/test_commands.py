@@ -0,0 +1,291 @@
+#! /usr/bin/env python3
+# coding: utf-8
+import os
+import cProfile
+import tempfile
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.core.management import call_command, CommandError
+from django.contrib.auth.models import User
+
+from program_builder.models import (
+    Training,
+    TrainingDailyRollup,
+    Exercise,
+    MovementsPerExercise,
+    Movement,
+    MovementSettings,
+    Equipment,
+    Tombstone,
+)
+from program_builder.management.commands.dbinit import DBinit
+from .helper_dbtestdata import TestDatabase
+
+SUPERUSER_ENV = {
+    'SUPERUSER_USERNAME': 'admin_user',
+    'SUPERUSER_EMAIL': 'test@test.com',
+    'SUPERUSER_PASSWORD': 'admin_password',
+}
+
+
+class TestDBinitCommand(TestCase):
+    """
+    This class tests the dbinit command
+    """
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, SUPERUSER_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.catalogue = DBinit().catalogue
+        call_command('dbinit', stdout=open(os.devnull, 'w'))
+
+    def test_dbinit_loads_the_catalogue(self):
+        """
+        This test checks all the objects of the catalogue are created
+        """
+        self.assertEqual(
+            MovementSettings.objects.count(), len(self.catalogue["settings"])
+        )
+        self.assertEqual(
+            Equipment.objects.count(), len(self.catalogue["equipments"])
+        )
+        self.assertEqual(
+            Movement.objects.count(), len(self.catalogue["movements"])
+        )
+        self.assertEqual(
+            Exercise.objects.filter(is_default=True).count(),
+            len(self.catalogue["exercises"]),
+        )
+        self.assertEqual(
+            MovementsPerExercise.objects.count(),
+            sum(
+                len(exercise["movements"])
+                for exercise in self.catalogue["exercises"]
+            ),
+        )
+
+    def test_dbinit_clean_db(self):
+        """
+        This test checks the reset empties the tables through the ORM
+        without refreshing the objects of the deleted users, and leaves
+        no tombstone, even with trainings of the users
+        """
+        DBinit().clean_db()
+        TestDatabase.create()
+        DBinit().clean_db()
+
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Training.objects.exists())
+        self.assertFalse(Exercise.objects.exists())
+        self.assertFalse(Tombstone.objects.exists())
+
+        # The rows are collected and deleted per table, no personal record,
+        # rollup or movements document is computed again
+        TestDatabase.create()
+        with self.assertNumQueries(36):
+            DBinit().clean_db()
+
+    def test_dbinit_upsert_only_applies_differences(self):
+        """
+        This test checks the upsert mode keeps the users and restores
+        what differs from the catalogue
+        """
+        User.objects.create_user(username='ordinary_user', password='test')
+        chelsea = Exercise.objects.get(name="chelsea")
+        chelsea.movementsperexercise_set.first().delete()
+        Exercise.objects.filter(pk=chelsea.pk).update(goal_value=1)
+
+        call_command('dbinit', upsert=True, stdout=open(os.devnull, 'w'))
+
+        chelsea_dict = [
+            exercise
+            for exercise in self.catalogue["exercises"]
+            if exercise["name"] == "chelsea"
+        ][0]
+        chelsea = Exercise.objects.get(name="chelsea")
+        self.assertTrue(User.objects.filter(username='ordinary_user').exists())
+        self.assertEqual(chelsea.goal_value, chelsea_dict["goal_value"])
+        self.assertEqual(
+            chelsea.movementsperexercise_set.count(),
+            len(chelsea_dict["movements"]),
+        )
+        self.assertEqual(
+            Exercise.objects.filter(is_default=True).count(),
+            len(self.catalogue["exercises"]),
+        )
+
+    def test_dbinit_upsert_without_difference_inserts_nothing(self):
+        """
+        This test checks a second run only reads the database
+        """
+        movements_linked = list(
+            MovementsPerExercise.objects.values_list('pk', flat=True)
+        )
+
+        call_command('dbinit', upsert=True, stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(
+            list(MovementsPerExercise.objects.values_list('pk', flat=True)),
+            movements_linked,
+        )
+
+
+class TestListProfilesCommand(TestCase):
+    """
+    This class tests the list_profiles command
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(PROFILING_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        profiler = cProfile.Profile()
+        profiler.runcall(sorted, range(1000))
+        for name in ('20260101-000000_GET_app-trainings_user1',
+                     '20260102-000000_GET_app-exercices_user1'):
+            profiler.dump_stats(str(self.directory / (name + '.prof')))
+
+    def test_list_profiles(self):
+        out = StringIO()
+        call_command('list_profiles', stdout=out)
+        self.assertIn('GET_app-trainings_user1', out.getvalue())
+        self.assertIn('GET_app-exercices_user1', out.getvalue())
+
+    def test_summarize_one_profile(self):
+        out = StringIO()
+        call_command('list_profiles', '20260101', stdout=out)
+        self.assertIn('GET_app-trainings_user1', out.getvalue())
+        self.assertIn('sorted', out.getvalue())
+
+    def test_summarize_unknown_profile(self):
+        with self.assertRaises(CommandError):
+            call_command('list_profiles', 'unknown', stdout=StringIO())
+
+
+class TestImportTrainingsCommand(TestCase):
+    """
+    This class tests the import_trainings command
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'trainings.csv'
+        self.path.write_text(
+            'date,exercise,performance_type,performance_value\n'
+            + ''.join(
+                '2019-03-{:02d},connie,duree,0:04:{:02d}\n'.format(day, day)
+                for day in range(1, 31)
+            )
+        )
+
+    def test_import_trainings(self):
+        out = StringIO()
+        call_command(
+            'import_trainings',
+            str(self.path),
+            user='new_user',
+            batch_size=7,
+            stdout=out,
+        )
+        self.assertIn('30 entraînements importés', out.getvalue())
+        self.assertEqual(
+            Training.objects.filter(founder__username='new_user').count(), 33
+        )
+
+    def test_import_trainings_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_trainings', str(self.path), user='unknown'
+            )
+
+
+class TestRebuildTrainingsRollupsCommand(TestCase):
+    """
+    This class tests the rebuild_trainings_rollups command
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def test_rebuild_trainings_rollups_of_one_user(self):
+        TrainingDailyRollup.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_trainings_rollups', user='new_user', stdout=out)
+        self.assertIn('3 bilans quotidiens', out.getvalue())
+        self.assertEqual(
+            TrainingDailyRollup.objects.filter(
+                user__username='new_user'
+            ).count(),
+            3,
+        )
+        self.assertFalse(
+            TrainingDailyRollup.objects.filter(
+                user__username='ordinary_user'
+            ).exists()
+        )
+
+
+class TestRebuildExercisesDocumentsCommand(TestCase):
+    """
+    This class tests the rebuild_exercises_documents command
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def test_rebuild_exercises_documents(self):
+        documents = dict(
+            Exercise.objects.values_list('pk', 'movements_document')
+        )
+        Exercise.objects.update(movements_document=[])
+
+        out = StringIO()
+        call_command('rebuild_exercises_documents', stdout=out)
+
+        self.assertIn(
+            "{} documents d'exercices".format(len(documents)), out.getvalue()
+        )
+        self.assertEqual(
+            dict(Exercise.objects.values_list('pk', 'movements_document')),
+            documents,
+        )
+
+
+class TestPurgeTombstonesCommand(TestCase):
+    """
+    This class tests the purge_tombstones command
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def test_purge_tombstones(self):
+        Exercise.objects.get(name="connie").delete()
+        Tombstone.objects.filter(model_name=Tombstone.TRAINING).update(
+            deleted_at=datetime(2000, 1, 1)
+        )
+
+        out = StringIO()
+        call_command('purge_tombstones', stdout=out)
+
+        self.assertIn("2 traces", out.getvalue())
+        self.assertEqual(
+            list(Tombstone.objects.values_list('model_name', flat=True)),
+            [Tombstone.EXERCISE],
+        )
@@ -1,6 +1,11 @@
 #! /usr/bin/env python3
 # coding: utf-8
+from datetime import date, datetime, timedelta
+from unittest import mock, skipUnless
 from django.test import TestCase
+from django.core.cache import cache
+from asgiref.sync import async_to_sync
+from django.db import connection, DatabaseError
 from django.contrib.auth.models import User
 from django.db.models import Q
 
@@ -12,12 +17,21 @@ from program_builder.models import (
     MovementSettings,
     Equipment,
     MovementSettingsPerMovementsPerExercise,
+    PersonalRecord,
+    TrainingDailyRollup,
+    TrainingWeeklyRollup,
+    Tombstone,
 )
 from program_builder.utils.db_interactions import (
     DBMovement,
     DBExercise,
     DBTraining,
+    DBPersonalRecord,
+    DBTrainingRollup,
+    DBTombstone,
+    database_sync_to_async,
 )
+from program_builder.utils.registry import LookupTables
 from .helper_dbtestdata import TestDatabase
 
 
@@ -87,6 +101,132 @@ class TestDBMovement(TestCase):
         self.assertEqual(movement.settings.all().count(), 4)
 
 
+class TestDatabaseSyncToAsync(TestCase):
+    """
+    This class tests the connections of the threads of database_sync_to_async
+    """
+
+    @mock.patch('program_builder.utils.db_interactions.close_old_connections')
+    def test_old_connections_closed_around_the_call(self, close_old_connections):
+        self.assertEqual(async_to_sync(database_sync_to_async(lambda: 42))(), 42)
+        self.assertEqual(close_old_connections.call_count, 2)
+
+        def fail():
+            raise DatabaseError()
+
+        with self.assertRaises(DatabaseError):
+            async_to_sync(database_sync_to_async(fail))()
+        self.assertEqual(close_old_connections.call_count, 4)
+
+
+class TestLookupTables(TestCase):
+    """
+    This class tests the in-process tables of the settings and equipments
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        LookupTables.invalidate()
+        self.lookup_tables = LookupTables()
+
+    def test_lookups_without_query_once_loaded(self):
+        """
+        This test checks the tables are loaded once then give the objects
+        from their name or their primary key without query
+        """
+
+        # We load the tables: one query per model
+        with self.assertNumQueries(2):
+            weight = self.lookup_tables.get_setting_by_name(
+                MovementSettings.WEIGHT
+            )
+
+        # We test
+        kettlebell = Equipment.objects.get(name="kettlebell")
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.lookup_tables.get_setting_by_pk(weight.pk), weight
+            )
+            self.assertEqual(
+                self.lookup_tables.get_equipment_by_name("kettlebell").pk,
+                kettlebell.pk,
+            )
+            self.assertEqual(
+                self.lookup_tables.get_equipment_by_pk(kettlebell.pk).name,
+                "kettlebell",
+            )
+
+    def test_unknown_name_raises_does_not_exist(self):
+        """
+        This test checks an unknown name raises DoesNotExist, after one
+        new load of the tables
+        """
+
+        self.lookup_tables.get_settings_by_names([])
+        with self.assertNumQueries(2):
+            with self.assertRaises(MovementSettings.DoesNotExist):
+                self.lookup_tables.get_settings_by_names(
+                    [MovementSettings.WEIGHT, "unknown"]
+                )
+
+    def test_tables_refreshed_after_change(self):
+        """
+        This test checks a renamed equipment is found with its new name,
+        and a setting added without signal (bulk_create) is found too
+        """
+
+        # We load the tables then change them
+        self.lookup_tables.get_equipment_by_name("balle")
+        ball = Equipment.objects.get(name="balle")
+        ball.name = "medecine ball"
+        ball.save()
+        MovementSettings.objects.bulk_create(
+            [MovementSettings(name=MovementSettings.LEST, founder=ball.founder)]
+        )
+
+        # We test
+        self.assertEqual(
+            self.lookup_tables.get_equipment_by_pk(ball.pk).name,
+            "medecine ball",
+        )
+        self.assertEqual(
+            self.lookup_tables.get_setting_by_name(MovementSettings.LEST).name,
+            MovementSettings.LEST,
+        )
+        with self.assertRaises(Equipment.DoesNotExist):
+            self.lookup_tables.get_equipment_by_name("balle")
+
+
+    def test_tables_refreshed_after_change_in_another_process(self):
+        """
+        This test checks the tables are loaded again when another process
+        changed the shared version
+        """
+
+        # We load the tables, then another process renames an equipment
+        self.lookup_tables.get_equipment_by_name("balle")
+        ball = Equipment.objects.get(name="balle")
+        Equipment.objects.filter(pk=ball.pk).update(name="medecine ball")
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.lookup_tables.get_equipment_by_pk(ball.pk).name, "balle"
+            )
+        cache.set(LookupTables.VERSION_CACHE_KEY, "other process version")
+
+        # We test
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                self.lookup_tables.get_equipment_by_pk(ball.pk).name,
+                "medecine ball",
+            )
+
+
 class TestDBExercise(TestCase):
     """
     This class tests all the methods
@@ -217,6 +357,159 @@ class TestDBExercise(TestCase):
         self.assertEqual(rep_value.exercise_movement.exercise, connie)
         self.assertEqual(rep_value.exercise_movement.movement, pushup)
 
+    def test_movements_version_follows_the_changes(self):
+        """
+        This test checks the version of an exercise is incremented when its
+        movements or the exercise itself change, and only its version
+        """
+        connie = Exercise.objects.get(name="connie")
+        connie_version = connie.movements_version
+        other_versions = dict(
+            Exercise.objects.exclude(pk=connie.pk).values_list(
+                'pk', 'movements_version'
+            )
+        )
+
+        link = MovementsPerExercise.objects.filter(exercise=connie).first()
+        link.movement_number = 5
+        link.save()
+        connie.refresh_from_db()
+        connie.description = "new description"
+        connie.save()
+
+        connie.refresh_from_db()
+        self.assertEqual(connie.movements_version, connie_version + 2)
+        self.assertEqual(
+            dict(
+                Exercise.objects.exclude(pk=connie.pk).values_list(
+                    'pk', 'movements_version'
+                )
+            ),
+            other_versions,
+        )
+
+    def test_movements_document_follows_the_links(self):
+        """
+        This test checks the movements document of an exercise is rebuilt
+        when a setting value of one of its movements or the name of one
+        of its movements changes
+        """
+        connie = Exercise.objects.get(name="connie")
+        setting_linked = MovementSettingsPerMovementsPerExercise.objects.filter(
+            exercise_movement__exercise=connie
+        ).first()
+        setting_linked.setting_value = 99
+        setting_linked.save()
+        movement = setting_linked.exercise_movement.movement
+        movement.name = "renamed movement"
+        movement.save()
+
+        connie.refresh_from_db()
+        lookup_tables = LookupTables()
+        expected = [
+            {
+                "id": movement_linked.movement.pk,
+                "name": movement_linked.movement.name,
+                "order": movement_linked.movement_number,
+                "settings": [
+                    {
+                        "name": lookup_tables.get_setting_by_pk(
+                            linked.setting_id
+                        ).name,
+                        "value": linked.setting_value,
+                    }
+                    for linked in MovementSettingsPerMovementsPerExercise.objects.filter(
+                        exercise_movement=movement_linked
+                    ).order_by('pk')
+                ],
+            }
+            for movement_linked in MovementsPerExercise.objects.filter(
+                exercise=connie
+            ).order_by('movement_number', 'pk')
+        ]
+        self.assertEqual(connie.movements_document, expected)
+        self.assertIn(
+            "renamed movement",
+            [movement_dict["name"] for movement_dict in expected],
+        )
+        self.assertIn(
+            99,
+            [
+                setting_dict["value"]
+                for movement_dict in expected
+                for setting_dict in movement_dict["settings"]
+            ],
+        )
+
+    def test_movements_document_after_link_deletions(self):
+        """
+        This test checks deleting a movement of an exercise rebuilds its
+        document once (not once per setting), and deleting the exercise
+        does not rebuild it at all
+        """
+        connie = Exercise.objects.get(name="connie")
+        movement_linked = MovementsPerExercise.objects.filter(exercise=connie).first()
+        movement_pk = movement_linked.movement_id
+
+        movement_linked.delete()
+
+        connie.refresh_from_db()
+        self.assertNotIn(
+            movement_pk, [movement_dict["id"] for movement_dict in connie.movements_document]
+        )
+
+        # the exercise and its related rows, their deletes, the rollups
+        # (5 queries per training) and the tombstones: no document rebuilt
+        with self.assertNumQueries(24):
+            Exercise.objects.get(pk=connie.pk).delete()
+
+    def test_refresh_movements_documents(self):
+        """
+        This test checks the documents are rebuilt from the link tables
+        only for the exercises selected
+        """
+        connie = Exercise.objects.get(name="connie")
+        document = connie.movements_document
+        Exercise.objects.update(movements_document=[])
+
+        refreshed = self.db_exo.refresh_movements_documents(pk=connie.pk)
+
+        self.assertEqual(refreshed, 1)
+        connie.refresh_from_db()
+        self.assertEqual(connie.movements_document, document)
+        self.assertFalse(
+            Exercise.objects.exclude(pk=connie.pk)
+            .exclude(movements_document=[])
+            .exists()
+        )
+
+    def test_get_user_exercises_changed_since(self):
+        """
+        This test checks only the exercises of the user and the default
+        ones changed after since are returned, a change of the movements
+        counting as a change of the exercise
+        """
+
+        new_user = User.objects.get(username="new_user")
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        connie = Exercise.objects.get(name="connie")
+        since = datetime(2020, 1, 1)
+        Exercise.objects.update(updated_at=since)
+
+        self.assertFalse(
+            self.db_exo.get_user_exercises_changed_since(new_user, since).exists()
+        )
+
+        self.db_exo.refresh_movements_documents(pk=connie.pk)
+        Exercise.objects.filter(name="chelsea").update(
+            updated_at=since + timedelta(days=1)
+        )
+
+        self.assertEqual(
+            set(self.db_exo.get_user_exercises_changed_since(new_user, since)),
+            {a_chelsea, connie},
+        )
+
 
 class TestDBTraining(TestCase):
     """
@@ -265,6 +558,55 @@ class TestDBTraining(TestCase):
         # We test
         self.assertEqual(trainings.count(), 3)
 
+    def test_get_all_trainings_from_one_user_with_cursor(self):
+        """
+        This test checks only the trainings older than the cursor are returned
+        """
+        # We get the founder
+        founder = User.objects.get(username="new_user")
+        trainings = list(
+            self.db_training.get_all_trainings_from_one_user(founder)
+        )
+
+        # We apply the method from the first training
+        cursor = (trainings[0].date, trainings[0].pk)
+        older_trainings = self.db_training.get_all_trainings_from_one_user(
+            founder, cursor
+        )
+
+        # We test
+        self.assertEqual(list(older_trainings), trainings[1:])
+
+    def test_count_trainings_from_one_user(self):
+        """
+        This test checks the counters of the trainings of a user
+        """
+        # We get the founder
+        founder = User.objects.get(username="ordinary_user")
+
+        # We apply the method
+        counters = self.db_training.count_trainings_from_one_user(founder)
+
+        # We test
+        self.assertEqual(
+            counters, {"trainings_number": 2, "trainings_done_number": 1}
+        )
+
+        # The trainings done are read from the rollups
+        training = Training.objects.get(founder=founder, done=False)
+        training.done = True
+        training.save()
+        with self.assertNumQueries(2):
+            counters = self.db_training.count_trainings_from_one_user(founder)
+        self.assertEqual(
+            counters, {"trainings_number": 2, "trainings_done_number": 2}
+        )
+        TrainingWeeklyRollup.objects.filter(user=founder).delete()
+        self.assertEqual(
+            self.db_training.count_trainings_from_one_user(founder),
+            {"trainings_number": 0, "trainings_done_number": 0},
+        )
+
     def test_get_all_trainings_from_one_user_from_one_exercise(self):
         """
         This test checks if the method get_all_trainings_from_one_user_from_one_exercise
@@ -284,4 +626,423 @@ class TestDBTraining(TestCase):
         )
 
         # We test
-        self.assertEqual(trainings.count(), 2)
\ No newline at end of file
+        self.assertEqual(trainings.count(), 2)
+
+    def test_get_trainings_changed_since_from_one_user(self):
+        """
+        This test checks only the trainings of the user changed after
+        since are returned, in compact dicts
+        """
+
+        founder = User.objects.get(username="new_user")
+        since = datetime(2020, 1, 1)
+        Training.objects.update(updated_at=since)
+        training = Training.objects.filter(founder=founder).first()
+        training.done = True
+        training.save()
+
+        trainings = list(
+            self.db_training.get_trainings_changed_since_from_one_user(founder, since)
+        )
+
+        self.assertEqual(
+            trainings,
+            [
+                {
+                    "id": training.pk,
+                    "date": training.date,
+                    "exercise_id": training.exercise_id,
+                    "done": True,
+                    "performance_type": training.performance_type,
+                    "performance_value": training.performance_value,
+                }
+            ],
+        )
+        self.assertEqual(
+            len(self.db_training.get_trainings_changed_since_from_one_user(founder)),
+            Training.objects.filter(founder=founder).count(),
+        )
+
+
+class TestDBPersonalRecord(TestCase):
+    """
+    This class tests all the methods
+    from DBPersonalRecord
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.db_record = DBPersonalRecord()
+        self.founder = User.objects.get(username="new_user")
+        self.connie = Exercise.objects.get(name="connie")
+
+    def test_records_created_when_trainings_are_saved(self):
+        """
+        This test checks the records are registered with the trainings
+        of the test database
+        """
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+
+        records = self.db_record.get_all_personal_records_values(self.founder)
+
+        self.assertEqual(records, {a_chelsea.pk: 15, self.connie.pk: 230})
+        record = PersonalRecord.objects.get(
+            user=self.founder, exercise=self.connie
+        )
+        self.assertEqual(record.training.performance_value, 230)
+
+    def test_record_updated_with_a_better_performance(self):
+        """
+        This test checks a new lower performance on a 'round' exercise
+        becomes the record and a worse one does not
+        """
+        training = Training.objects.create(
+            exercise=self.connie,
+            founder=self.founder,
+            performance_type=Training.TIME,
+        )
+        training.performance_value = 400
+        training.save()
+        self.assertEqual(
+            self.db_record.get_one_personal_record_value(
+                self.connie, self.founder
+            ),
+            230,
+        )
+
+        training.performance_value = 200
+        training.save()
+        record = PersonalRecord.objects.get(
+            user=self.founder, exercise=self.connie
+        )
+        self.assertEqual(record.performance_value, 200)
+        self.assertEqual(record.training, training)
+
+    def test_record_refreshed_when_training_deleted(self):
+        """
+        This test checks the record falls back on the next best training
+        when the training holding it is deleted
+        """
+        Training.objects.get(
+            exercise=self.connie, performance_value=230
+        ).delete()
+
+        self.assertEqual(
+            self.db_record.get_one_personal_record_value(
+                self.connie, self.founder
+            ),
+            330,
+        )
+
+    def test_rebuild_all_personal_records(self):
+        """
+        This test checks the rebuild gives back the records kept up to date
+        """
+        records = list(
+            PersonalRecord.objects.order_by('pk').values_list(
+                'user', 'exercise', 'training', 'performance_value'
+            )
+        )
+        PersonalRecord.objects.all().delete()
+
+        records_number = self.db_record.rebuild_all_personal_records()
+
+        self.assertEqual(records_number, len(records))
+        self.assertEqual(
+            sorted(
+                PersonalRecord.objects.values_list(
+                    'user', 'exercise', 'training', 'performance_value'
+                )
+            ),
+            sorted(records),
+        )
+
+    def test_count_trainings_with_pb_from_one_user(self):
+        """
+        This test checks the trainings holding a personal record are counted
+        """
+        db_training = DBTraining()
+
+        self.assertEqual(
+            db_training.count_trainings_with_pb_from_one_user(self.founder), 2
+        )
+
+
+class TestDBTrainingRollup(TestCase):
+    """
+    This class tests all the methods
+    from DBTrainingRollup
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.db_rollup = DBTrainingRollup()
+        self.founder = User.objects.get(username="new_user")
+        self.connie = Exercise.objects.get(name="connie")
+
+    def _get_rollups(self, model):
+        return list(
+            model.objects.values(
+                'user', 'trainings_done', 'total_time', 'exercise_types'
+            ).order_by('user', 'trainings_done', 'total_time')
+        )
+
+    def test_rollups_created_when_trainings_are_saved(self):
+        """
+        This test checks the rollups are registered with the trainings
+        done of the test database
+        """
+        daily_rollups = self.db_rollup.get_daily_rollups_from_one_user(
+            self.founder
+        )
+
+        self.assertEqual(
+            [rollup.day for rollup in daily_rollups],
+            [date(2018, 3, 8), date(2018, 4, 5), date(2018, 5, 2)],
+        )
+        self.assertEqual(daily_rollups[1].trainings_done, 1)
+        self.assertEqual(daily_rollups[1].total_time, 230)
+        self.assertEqual(
+            daily_rollups[1].exercise_types, {Exercise.FORTIME: 1}
+        )
+        self.assertEqual(daily_rollups[0].total_time, 0)
+        self.assertEqual(
+            [
+                rollup.week
+                for rollup in self.db_rollup.get_weekly_rollups_from_one_user(
+                    self.founder
+                )
+            ],
+            [date(2018, 3, 5), date(2018, 4, 2), date(2018, 4, 30)],
+        )
+
+    def test_rollups_updated_when_a_training_is_done_or_deleted(self):
+        """
+        This test checks the day and the week of a training are updated
+        when it is done then deleted
+        """
+        training = Training.objects.create(
+            exercise=self.connie,
+            founder=self.founder,
+            date=datetime(2018, 5, 4, 18, 30),
+            performance_type=Training.TIME,
+        )
+        self.assertFalse(
+            TrainingDailyRollup.objects.filter(day=date(2018, 5, 4)).exists()
+        )
+
+        training.performance_value = 100
+        training.done = True
+        training.save()
+
+        week = TrainingWeeklyRollup.objects.get(
+            user=self.founder, week=date(2018, 4, 30)
+        )
+        self.assertEqual(week.trainings_done, 2)
+        self.assertEqual(week.total_time, 430)
+        self.assertEqual(week.exercise_types, {Exercise.FORTIME: 2})
+
+        training.delete()
+
+        self.assertFalse(
+            TrainingDailyRollup.objects.filter(day=date(2018, 5, 4)).exists()
+        )
+        week.refresh_from_db()
+        self.assertEqual(week.trainings_done, 1)
+        self.assertEqual(week.total_time, 330)
+
+    def test_rebuild_trainings_rollups(self):
+        """
+        This test checks the rebuild gives the same rollups as the
+        incremental updates
+        """
+        daily_rollups = self._get_rollups(TrainingDailyRollup)
+        weekly_rollups = self._get_rollups(TrainingWeeklyRollup)
+        TrainingDailyRollup.objects.all().delete()
+
+        # grouped query, savepoint, 2 deletes, 2 inserts, release
+        with self.assertNumQueries(7):
+            days_number, weeks_number = (
+                self.db_rollup.rebuild_trainings_rollups()
+            )
+
+        self.assertEqual((days_number, weeks_number), (4, 4))
+        self.assertEqual(
+            self._get_rollups(TrainingDailyRollup), daily_rollups
+        )
+        self.assertEqual(
+            self._get_rollups(TrainingWeeklyRollup), weekly_rollups
+        )
+
+
+class TestDBTombstone(TestCase):
+    """
+    This class tests all the methods
+    from DBTombstone
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.db_tombstone = DBTombstone()
+        self.new_user = User.objects.get(username="new_user")
+        self.ordinary_user = User.objects.get(username="ordinary_user")
+
+    def test_tombstones_set_when_exercises_are_deleted(self):
+        """
+        This test checks the deletion of an exercise leaves a tombstone for
+        its founder (for all the users when it is a default one) and one
+        for each of its trainings
+        """
+
+        connie = Exercise.objects.get(name="connie")
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        connie_trainings = list(connie.training_set.values_list('pk', flat=True))
+        a_chelsea_trainings = list(
+            a_chelsea.training_set.filter(founder=self.new_user).values_list('pk', flat=True)
+        )
+        exercise_pks = [connie.pk, a_chelsea.pk]
+        since = datetime.now() - timedelta(seconds=1)
+
+        connie.delete()
+        a_chelsea.delete()
+
+        deleted = self.db_tombstone.get_deleted_pks_since(self.new_user, since)
+        self.assertEqual(deleted[Tombstone.EXERCISE], exercise_pks)
+        self.assertEqual(
+            sorted(deleted[Tombstone.TRAINING]),
+            sorted(connie_trainings + a_chelsea_trainings),
+        )
+        self.assertEqual(
+            self.db_tombstone.get_deleted_pks_since(self.ordinary_user, since)[Tombstone.EXERCISE],
+            exercise_pks[1:],
+        )
+        self.assertEqual(
+            self.db_tombstone.get_deleted_pks_since(self.new_user, datetime.now() + timedelta(seconds=1)),
+            {Tombstone.EXERCISE: [], Tombstone.TRAINING: []},
+        )
+
+    def test_no_tombstone_when_users_are_deleted(self):
+        """
+        This test checks deleting a user with exercises and trainings
+        leaves no tombstone pointing to him, but one for his default
+        exercises which concern all the users and for the trainings of
+        the other users on them
+        """
+
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        a_chelsea_pk = a_chelsea.pk
+        o_user_training_pks = list(
+            a_chelsea.training_set.filter(founder=self.ordinary_user).values_list('pk', flat=True)
+        )
+
+        self.new_user.delete()
+        User.objects.get(username="admin_user").delete()
+
+        self.assertFalse(Exercise.objects.filter(name="connie").exists())
+        self.assertEqual(
+            sorted(Tombstone.objects.values_list('model_name', 'object_pk', 'user')),
+            [(Tombstone.EXERCISE, a_chelsea_pk, None)]
+            + [(Tombstone.TRAINING, pk, self.ordinary_user.pk) for pk in o_user_training_pks],
+        )
+
+    def test_del_tombstones_before(self):
+        """
+        This test checks only the tombstones older than before are deleted
+        """
+
+        self.db_tombstone.set_tombstone(Tombstone.TRAINING, 1, self.new_user.pk)
+        Tombstone.objects.update(deleted_at=datetime(2020, 1, 1))
+        self.db_tombstone.set_tombstone(Tombstone.TRAINING, 2, self.new_user.pk)
+
+        self.db_tombstone.del_tombstones_before(datetime(2020, 1, 2))
+
+        self.assertEqual(
+            list(Tombstone.objects.values_list('object_pk', flat=True)), [2]
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN output checked for SQLite")
+class TestQueryIndexes(TestCase):
+    """
+    This class checks with EXPLAIN that the main queries
+    from db_interactions use an index
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.founder = User.objects.get(username="new_user")
+        self.connie = Exercise.objects.get(name="connie")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotRegex(plan, r"(?m)SCAN program_builder_\w+$")
+
+    def test_trainings_from_one_user_use_index(self):
+        trainings = DBTraining().get_all_trainings_from_one_user(self.founder)
+        self.assertUsesIndex(trainings, 'training_founder_date_idx')
+
+    def test_trainings_from_one_user_from_one_exercise_use_index(self):
+        trainings = (
+            DBTraining().get_all_trainings_from_one_user_from_one_exercise(
+                self.connie, self.founder
+            )
+        )
+        self.assertUsesIndex(trainings, 'training_founder_exo_date_idx')
+
+    def test_trainings_todo_from_one_user_use_index(self):
+        trainings = Training.objects.filter(founder=self.founder, done=False)
+        self.assertUsesIndex(trainings, 'training_founder_todo_idx')
+
+    def test_user_exercises_use_index(self):
+        exercises = DBExercise().get_all_user_exercises(self.founder)
+        self.assertUsesIndex(exercises, 'exercise_default_idx')
+
+    def test_movements_linked_to_exercise_use_index(self):
+        movements = DBExercise().get_all_movements_linked_to_exercise(
+            self.connie
+        ).order_by('movement_number')
+        self.assertUsesIndex(movements, 'mvt_per_exo_exo_number_idx')
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite only")
+class TestSQLitePragmas(TestCase):
+    """
+    This class checks the PRAGMA of SQLITE_PRAGMAS are applied
+    to the connections
+    """
+
+    def get_pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA {}'.format(name))
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connection(self):
+        self.assertEqual(self.get_pragma('synchronous'), 1)
+        self.assertEqual(self.get_pragma('busy_timeout'), 5000)
+        self.assertEqual(self.get_pragma('cache_size'), -20000)
+        self.assertEqual(self.get_pragma('temp_store'), 2)
@@ -0,0 +1,212 @@
+#! /usr/bin/env python3
+# coding: utf-8
+import contextvars
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    modify_settings,
+    override_settings,
+)
+from django.urls import reverse
+
+from fitlg_project.middleware import (
+    RequestRecord,
+    _current_record,
+    _install_wrappers,
+    _timed,
+)
+from program_builder.utils.treatments import DataTreatment
+from .helper_dbtestdata import TestDatabase
+
+
+@modify_settings(
+    MIDDLEWARE={
+        'prepend': 'fitlg_project.middleware.'
+        'PerformanceInstrumentationMiddleware'
+    }
+)
+class PerformanceInstrumentationMiddlewareTestCase(TestCase):
+    """
+    This class tests the PerformanceInstrumentationMiddleware
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def setUp(self):
+        self.client.login(username='ordinary_user', password='ordinary_user')
+
+    def _server_timing(self, response):
+        return dict(
+            (
+                metric.split(';')[0].strip(),
+                float(metric.split('dur=')[1].split(';')[0]),
+            )
+            for metric in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('program_builder:trainings_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries"'
+        )
+        timings = self._server_timing(response)
+        self.assertEqual(
+            set(timings), {'db', 'treatment', 'template', 'total'}
+        )
+        self.assertGreater(timings['treatment'], 0)
+        self.assertGreater(timings['template'], 0)
+        self.assertLessEqual(timings['db'], timings['total'])
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_slow_request_is_logged(self):
+        with self.assertLogs('fitlg.performance', level='WARNING') as logs:
+            self.client.get(reverse('program_builder:exercises_list'))
+        log = json.loads(logs.records[0].getMessage())
+        self.assertEqual(
+            log['path'], reverse('program_builder:exercises_list')
+        )
+        self.assertEqual(log['status'], 200)
+        self.assertGreater(log['queries'], 0)
+        self.assertLessEqual(len(log['slowest_queries']), 5)
+
+    def test_fast_request_is_not_logged(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('fitlg.performance', level='WARNING'):
+                self.client.get(reverse('program_builder:exercises_list'))
+
+    def test_concurrent_treatments_are_each_counted(self):
+        barrier = threading.Barrier(2)
+
+        def treatment():
+            barrier.wait()
+            time.sleep(0.05)
+
+        timed_treatment = _timed('treatment', treatment)
+        record = RequestRecord()
+        token = _current_record.set(record)
+        try:
+            threads = [
+                threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(timed_treatment,),
+                )
+                for _ in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            _current_record.reset(token)
+        self.assertGreaterEqual(record.durations['treatment'], 0.1)
+
+    def test_generator_methods_are_not_wrapped(self):
+        _install_wrappers()
+        self.assertTrue(
+            getattr(
+                DataTreatment.get_all_movements_in_dict,
+                '_performance_timed',
+                False,
+            )
+        )
+        self.assertFalse(
+            getattr(
+                DataTreatment.iter_trainings_export_per_user,
+                '_performance_timed',
+                False,
+            )
+        )
+
+
+@modify_settings(
+    MIDDLEWARE={
+        'prepend': 'fitlg_project.middleware.'
+        'PerformanceInstrumentationMiddleware'
+    }
+)
+class AsyncPerformanceInstrumentationTestCase(TransactionTestCase):
+    """
+    This class tests the queries of the async views, run in the threads of
+    database_sync_to_async, are counted by the middleware
+    """
+
+    def setUp(self):
+        TestDatabase.create()
+        cache.clear()
+        user = User.objects.get(username="ordinary_user")
+        self.client.force_login(user)
+        self.async_client.force_login(user)
+
+    def _queries_number(self, response):
+        return int(response['Server-Timing'].split('desc="')[1].split()[0])
+
+    def test_async_view_queries_are_counted(self):
+        sync_response = self.client.get(
+            reverse('program_builder:exercises_list')
+        )
+        response = async_to_sync(self.async_client.get)(
+            reverse('program_builder:async_exercises_list')
+        )
+        self.assertEqual(response.status_code, 200)
+        # Same reads as the synchronous view, plus the PRAGMA of the new
+        # connections of the threads (the test client starts a new event
+        # loop, so new threads, for each request)
+        self.assertGreaterEqual(
+            self._queries_number(response),
+            self._queries_number(sync_response),
+        )
+
+
+class ProfilingMiddlewareTestCase(TestCase):
+    """
+    This class tests the ProfilingMiddleware
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(PROFILING_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_staff_request_is_profiled_with_query_parameter(self):
+        self.client.login(username='admin_user', password='admin_password')
+        response = self.client.get(
+            reverse('program_builder:trainings_list'), {'profile': '1'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 1)
+        summary = next(self.directory.glob('*.txt')).read_text()
+        self.assertIn('cumulative', summary)
+        self.assertIn('treatments.py', summary)
+
+    def test_staff_request_is_profiled_with_header(self):
+        self.client.login(username='admin_user', password='admin_password')
+        self.client.get(
+            reverse('program_builder:trainings_list'), HTTP_X_PROFILE='1'
+        )
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 1)
+
+    def test_ordinary_user_request_is_not_profiled(self):
+        self.client.login(username='ordinary_user', password='ordinary_user')
+        self.client.get(
+            reverse('program_builder:trainings_list'), {'profile': '1'}
+        )
+        self.assertEqual(list(self.directory.iterdir()), [])
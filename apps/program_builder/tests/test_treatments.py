@@ -1,7 +1,10 @@
 #! /usr/bin/env python3
 # coding: utf-8
-from datetime import datetime
+import io
+import json
+from datetime import datetime, timedelta
 from django.test import TestCase
+from django.core.cache import cache
 from django.contrib.auth.models import User
 
 from program_builder.models import (
@@ -12,9 +15,12 @@ from program_builder.models import (
     Movement,
     MovementSettings,
     Equipment,
+    PersonalRecord,
+    TrainingDailyRollup,
 )
-from program_builder.utils.treatments import DataTreatment
+from program_builder.utils.treatments import DataTreatment, UnknownNamesError
 from program_builder.utils.db_interactions import DBMovement
+from program_builder.utils.registry import LookupTables
 from .helper_dbtestdata import TestDatabase
 
 
@@ -35,6 +41,10 @@ class TestDataTreatment(TestCase):
     def setUp(self):
 
         self.treatment = DataTreatment()
+        cache.clear()
+        # The lookup tables are loaded once for the life of the process
+        LookupTables.invalidate()
+        LookupTables().get_settings_by_names([])
 
     def test_get_all_movements_in_dict(self):
         """
@@ -237,6 +247,97 @@ class TestDataTreatment(TestCase):
         )
         self.assertEqual(angie_wallball_weight.setting_value, 18)
 
+    def test_register_exercise_from_dict_constant_queries(self):
+        """
+        This test checks the number of queries does not depend on the
+        number of movements and settings
+        """
+
+        # We get the user
+        founder = User.objects.get(username="new_user")
+
+        # We create the dict with many movements
+        exercise_dict = {
+            "name": "long workout",
+            "exerciseType": "FORTIME",
+            "description": "workout de test",
+            "goalType": "Nombre de tours",
+            "goalValue": 1,
+            "movements": [
+                {
+                    "name": name,
+                    "order": order,
+                    "settings": [
+                        {"name": "repetitions", "value": order},
+                        {"name": "poids", "value": 10},
+                    ],
+                }
+                for order, name in enumerate(
+                    ["squat", "pushup", "wallball", "pullup"] * 5, start=1
+                )
+            ],
+        }
+
+        # We apply the method: savepoint, exercise, movements,
+        # movements associated (insert + select with SQLite),
+        # settings values, movements document (exercise, movements,
+        # settings, update), release savepoint (the settings come from the
+        # lookup tables)
+        with self.assertNumQueries(11):
+            exercise = self.treatment.register_exercise_from_dict(
+                exercise_dict, founder
+            )
+
+        # We test
+        movements_linked = MovementsPerExercise.objects.filter(
+            exercise=exercise
+        ).order_by('movement_number')
+        self.assertEqual(movements_linked.count(), 20)
+        self.assertEqual(movements_linked[4].movement.name, "squat")
+        self.assertEqual(
+            MovementSettingsPerMovementsPerExercise.objects.get(
+                exercise_movement=movements_linked[4],
+                setting__name="repetitions",
+            ).setting_value,
+            5,
+        )
+
+    def test_register_exercise_from_dict_unknown_movement(self):
+        """
+        This test checks nothing is registered when a movement is unknown
+        """
+
+        # We get the user
+        founder = User.objects.get(username="new_user")
+        exercises_number = Exercise.objects.count()
+
+        # We create the dict
+        exercise_dict = {
+            "name": "broken workout",
+            "exerciseType": "FORTIME",
+            "description": "workout de test",
+            "goalType": "Nombre de tours",
+            "goalValue": 1,
+            "movements": [
+                {"name": "squat", "order": 1, "settings": []},
+                {"name": "unknown", "order": 2, "settings": []},
+            ],
+        }
+
+        # We test
+        with self.assertRaises(UnknownNamesError) as error:
+            self.treatment.register_exercise_from_dict(exercise_dict, founder)
+        self.assertEqual(error.exception.names, {"movements": ["unknown"]})
+        self.assertEqual(Exercise.objects.count(), exercises_number)
+
+        exercise_dict["movements"][0]["settings"] = [{"name": "unknown setting", "value": 1}]
+        with self.assertRaises(UnknownNamesError) as error:
+            self.treatment.register_exercise_from_dict(exercise_dict, founder)
+        self.assertEqual(
+            error.exception.names,
+            {"movements": ["unknown"], "settings": ["unknown setting"]},
+        )
+
     def test_register_exercise_from_dict_success_running_exercise(self):
 
         # We get the user
@@ -409,6 +510,7 @@ class TestDataTreatment(TestCase):
                 "goal_type": a_chelsea_training.exercise.goal_type,
                 "goal_value": a_chelsea_training.exercise.goal_value,
                 "is_default": a_chelsea_training.exercise.is_default,
+                "movements_version": a_chelsea_training.exercise.movements_version,
                 "pb": 15,
                 "movements": [
                     {
@@ -458,6 +560,7 @@ class TestDataTreatment(TestCase):
                 "goal_type": connie_first_training.exercise.goal_type,
                 "goal_value": connie_first_training.exercise.goal_value,
                 "is_default": connie_first_training.exercise.is_default,
+                "movements_version": connie_first_training.exercise.movements_version,
                 "pb": 230,
                 "movements": [
                     {
@@ -543,6 +646,7 @@ class TestDataTreatment(TestCase):
             "goal_type": connie.goal_type,
             "goal_value": connie.goal_value,
             "is_default": connie.is_default,
+            "movements_version": connie.movements_version,
             "pb": 230,
             "movements": [
                 {
@@ -645,6 +749,7 @@ class TestDataTreatment(TestCase):
                 "goal_type": connie_training.exercise.goal_type,
                 "goal_value": connie_training.exercise.goal_value,
                 "is_default": connie_training.exercise.is_default,
+                "movements_version": connie_training.exercise.movements_version,
                 "pb": 230,
                 "movements": [
                     {
@@ -756,6 +861,7 @@ class TestDataTreatment(TestCase):
                 "goal_type": a_chelsea_training.exercise.goal_type,
                 "goal_value": a_chelsea_training.exercise.goal_value,
                 "is_default": a_chelsea_training.exercise.is_default,
+                "movements_version": a_chelsea_training.exercise.movements_version,
                 "pb": 0,
                 "movements": [
                     {
@@ -952,6 +1058,7 @@ class TestDataTreatment(TestCase):
                     "goal_type": connie_second_training.exercise.goal_type,
                     "goal_value": connie_second_training.exercise.goal_value,
                     "is_default": connie_second_training.exercise.is_default,
+                    "movements_version": connie_second_training.exercise.movements_version,
                     "pb": 230,
                     "movements": [
                         {
@@ -997,6 +1104,7 @@ class TestDataTreatment(TestCase):
                     "goal_type": connie_first_training.exercise.goal_type,
                     "goal_value": connie_first_training.exercise.goal_value,
                     "is_default": connie_first_training.exercise.is_default,
+                    "movements_version": connie_first_training.exercise.movements_version,
                     "pb": 230,
                     "movements": [
                         {
@@ -1042,6 +1150,7 @@ class TestDataTreatment(TestCase):
                     "goal_type": a_chelsea_training.exercise.goal_type,
                     "goal_value": a_chelsea_training.exercise.goal_value,
                     "is_default": a_chelsea_training.exercise.is_default,
+                    "movements_version": a_chelsea_training.exercise.movements_version,
                     "pb": 15,
                     "movements": [
                         {
@@ -1092,6 +1201,144 @@ class TestDataTreatment(TestCase):
         # We test
         self.assertEqual(trainings, result)
 
+    def test_get_all_trainings_per_user_in_dict_exercise_serialized_once(self):
+        """
+        This test checks the number of queries does not grow with the number
+        of trainings sharing the same exercise
+        """
+
+        # We get the user and add several trainings on the same exercise
+        new_user = User.objects.get(username="new_user")
+        connie = Exercise.objects.get(name="connie", founder=new_user)
+        for performance_value in range(100, 120):
+            Training.objects.create(
+                exercise=connie,
+                founder=new_user,
+                performance_type=Training.TIME,
+                performance_value=performance_value,
+                done=True,
+            )
+
+        # We apply the method: trainings, exercises (with their movements
+        # document), pb
+        with self.assertNumQueries(3):
+            trainings = self.treatment.get_all_trainings_per_user_in_dict(
+                new_user
+            )
+
+        # We test
+        self.assertEqual(len(trainings), 23)
+        connie_trainings = [
+            training
+            for training in trainings
+            if training["exercise"]["id"] == connie.pk
+        ]
+        self.assertEqual(len(connie_trainings), 22)
+        for training in connie_trainings:
+            self.assertEqual(training["exercise"]["pb"], 100)
+
+    def test_get_one_default_exercise_with_the_pb_of_each_user(self):
+        """
+        This test checks a default exercise is read with the pb of each user,
+        its structure is the same for all of them
+        """
+
+        # We prepare the data: one pb for one user only
+        chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        admin_user = User.objects.get(username="admin_user")
+        ordinary_user = User.objects.get(username="ordinary_user")
+        PersonalRecord.objects.filter(exercise=chelsea).delete()
+        PersonalRecord.objects.create(
+            exercise=chelsea, user=admin_user, performance_value=25
+        )
+
+        # We apply the method: exercise, pb
+        admin_dict = self.treatment.get_one_exercise_in_dict_linked_to_one_user(
+            chelsea.pk, admin_user
+        )
+        with self.assertNumQueries(2):
+            ordinary_dict = (
+                self.treatment.get_one_exercise_in_dict_linked_to_one_user(
+                    chelsea.pk, ordinary_user
+                )
+            )
+
+        # We test
+        self.assertEqual(admin_dict["pb"], 25)
+        self.assertEqual(ordinary_dict["pb"], 0)
+        admin_dict.pop("pb")
+        ordinary_dict.pop("pb")
+        self.assertEqual(admin_dict, ordinary_dict)
+
+    def test_get_one_exercise_in_dict_single_row_fetch(self):
+        """
+        This test checks an exercise is read without its link tables:
+        its movements come from its movements document
+        """
+        new_user = User.objects.get(username="new_user")
+        connie = Exercise.objects.get(name="connie", founder=new_user)
+
+        # exercise, pb
+        with self.assertNumQueries(2):
+            exercise_dict = (
+                self.treatment.get_one_exercise_in_dict_linked_to_one_user(
+                    connie.pk, new_user
+                )
+            )
+
+        self.assertEqual(exercise_dict["movements"], connie.movements_document)
+        self.assertTrue(exercise_dict["movements"])
+
+    def test_default_exercise_renewed_after_change(self):
+        """
+        This test checks a change of a default exercise is read at once
+        """
+
+        # We prepare the data
+        chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        ordinary_user = User.objects.get(username="ordinary_user")
+        self.treatment.get_one_exercise_in_dict_linked_to_one_user(
+            chelsea.pk, ordinary_user
+        )
+
+        # We apply the change
+        chelsea.description = "a new description"
+        chelsea.save()
+        exercise_dict = self.treatment.get_one_exercise_in_dict_linked_to_one_user(
+            chelsea.pk, ordinary_user
+        )
+
+        # We test
+        self.assertEqual(exercise_dict["description"], "a new description")
+        self.assertEqual(exercise_dict["movements_version"], chelsea.movements_version)
+
+    def test_get_trainings_page_per_user_in_dict(self):
+        """
+        This test checks the pages of trainings follow each other
+        without missing or repeating a training
+        """
+
+        # We get the user
+        new_user = User.objects.get(username="new_user")
+        all_trainings = self.treatment.get_all_trainings_per_user_in_dict(
+            new_user
+        )
+
+        # We apply the method
+        first_page, cursor = self.treatment.get_trainings_page_per_user_in_dict(
+            new_user, page_size=2
+        )
+        second_page, last_cursor = (
+            self.treatment.get_trainings_page_per_user_in_dict(
+                new_user, cursor, page_size=2
+            )
+        )
+
+        # We test
+        self.assertEqual(first_page + second_page, all_trainings)
+        self.assertIsNotNone(cursor)
+        self.assertIsNone(last_cursor)
+
     def test_get_all_trainings_per_user_linked_to_an_exercise(self):
         """
         This test checks if the method get_all_trainings_per_user_linked_to_an_exercise
@@ -1160,6 +1407,7 @@ class TestDataTreatment(TestCase):
                     "goal_type": connie_second_training.exercise.goal_type,
                     "goal_value": connie_second_training.exercise.goal_value,
                     "is_default": connie_second_training.exercise.is_default,
+                    "movements_version": connie_second_training.exercise.movements_version,
                     "pb": 230,
                     "movements": [
                         {
@@ -1205,6 +1453,7 @@ class TestDataTreatment(TestCase):
                     "goal_type": connie_first_training.exercise.goal_type,
                     "goal_value": connie_first_training.exercise.goal_value,
                     "is_default": connie_first_training.exercise.is_default,
+                    "movements_version": connie_first_training.exercise.movements_version,
                     "pb": 230,
                     "movements": [
                         {
@@ -1246,4 +1495,325 @@ class TestDataTreatment(TestCase):
         )
 
         # We test
-        self.assertEqual(trainings, result)
\ No newline at end of file
+        self.assertEqual(trainings, result)
+
+    def test_iter_trainings_export_per_user(self):
+        """
+        This test checks the method iter_trainings_export_per_user yields
+        flat rows, durations formatted, in one query
+        """
+
+        # We get the user
+        new_user = User.objects.get(username="new_user")
+        connie = Exercise.objects.get(name="connie", founder=new_user)
+        training = Training.objects.filter(
+            founder=new_user, exercise=connie
+        ).latest('date')
+
+        # We apply the method
+        with self.assertNumQueries(1):
+            rows = list(self.treatment.iter_trainings_export_per_user(new_user))
+
+        # We test
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            rows[0],
+            {
+                "id": training.pk,
+                "date": "2018-05-02T00:00:00",
+                "exercise": "connie",
+                "exercise_type": Exercise.FORTIME,
+                "done": True,
+                "performance_type": Training.TIME,
+                "performance_value": "0:05:30",
+            },
+        )
+        self.assertEqual(rows[2]["performance_value"], 15)
+
+    def test_import_trainings_from_file_csv(self):
+        """
+        This test checks the method import_trainings_from_file inserts the
+        trainings by batches and refreshes the personal records
+        """
+
+        # We get the user
+        new_user = User.objects.get(username="new_user")
+        connie = Exercise.objects.get(name="connie", founder=new_user)
+        rows = ["date,exercise,done,performance_type,performance_value"]
+        rows += [
+            "2019-01-{:02d},Connie,,duree,0:03:{:02d}".format(day, day)
+            for day in range(1, 26)
+        ]
+        rows.append("2019-02-01,connie,False,,")
+        csv_file = io.StringIO("\n".join(rows))
+
+        # We apply the method
+        imported_number = self.treatment.import_trainings_from_file(
+            csv_file, "csv", new_user, batch_size=10
+        )
+
+        # We test
+        self.assertEqual(imported_number, 26)
+        trainings = Training.objects.filter(founder=new_user, exercise=connie)
+        self.assertEqual(trainings.count(), 28)
+        last_training = trainings.latest('date')
+        self.assertFalse(last_training.done)
+        self.assertIsNone(last_training.performance_value)
+        self.assertEqual(last_training.performance_type, Training.TIME)
+        self.assertEqual(
+            PersonalRecord.objects.get(
+                user=new_user, exercise=connie
+            ).performance_value,
+            181,
+        )
+        self.assertTrue(trainings.get(performance_value=181).done)
+
+    def test_import_trainings_from_file_json_export(self):
+        """
+        This test checks a JSON export can be imported again
+        """
+
+        # We get the user and export his trainings
+        ordinary_user = User.objects.get(username="ordinary_user")
+        exported = list(
+            self.treatment.iter_trainings_export_per_user(ordinary_user)
+        )
+
+        # We apply the method
+        imported_number = self.treatment.import_trainings_from_file(
+            io.StringIO(json.dumps(exported)), "json", ordinary_user
+        )
+
+        # We test
+        self.assertEqual(imported_number, 2)
+        trainings = list(
+            self.treatment.iter_trainings_export_per_user(ordinary_user)
+        )
+        for training in trainings:
+            del training["id"]
+        for training in exported:
+            del training["id"]
+        self.assertCountEqual(trainings, exported + exported)
+
+    def test_import_trainings_from_file_invalid_row(self):
+        """
+        This test checks nothing is imported when a row is not valid
+        """
+
+        # We get the user
+        new_user = User.objects.get(username="new_user")
+        trainings_number = Training.objects.count()
+
+        for row, error in (
+            ("2019-01-01,unknown,duree,0:03:00", "exercice inconnu"),
+            ("2019-01-01,connie,weight,12", "type de performance inconnu"),
+            ("2019-01-01,connie,round,twelve", "Entraînement 2"),
+            (
+                "2021-03-01T10:00:00+02:00,connie,round,12",
+                "Entraînement 2: date avec fuseau horaire",
+            ),
+        ):
+            csv_file = io.StringIO(
+                "date,exercise,performance_type,performance_value\n"
+                "2019-01-01,connie,duree,0:03:00\n" + row
+            )
+            with self.assertRaisesRegex(ValueError, error):
+                self.treatment.import_trainings_from_file(
+                    csv_file, "csv", new_user
+                )
+
+        # We test
+        self.assertEqual(Training.objects.count(), trainings_number)
+
+    def test_get_progression_per_user_linked_to_an_exercise(self):
+        """
+        This test checks the performances are grouped by period in one query
+        """
+
+        # We get the user and add trainings: two in the week of 2018-05-02
+        new_user = User.objects.get(username="new_user")
+        connie = Exercise.objects.get(name="connie", founder=new_user)
+        for day, performance_value in ((3, 300), (4, None)):
+            Training.objects.create(
+                exercise=connie,
+                founder=new_user,
+                date=datetime(2018, 5, day),
+                performance_type=Training.TIME,
+                performance_value=performance_value,
+            )
+
+        # We apply the method
+        with self.assertNumQueries(1):
+            series = (
+                self.treatment.get_progression_per_user_linked_to_an_exercise(
+                    connie.pk, new_user, "week"
+                )
+            )
+        monthly_series = (
+            self.treatment.get_progression_per_user_linked_to_an_exercise(
+                connie.pk, new_user, "month"
+            )
+        )
+
+        # We test: connie has 'round' as goal_type, the lowest is the best
+        self.assertEqual(
+            series,
+            [
+                {
+                    "date": "2018-04-02",
+                    "best": 230,
+                    "worst": 230,
+                    "average": 230,
+                    "count": 1,
+                },
+                {
+                    "date": "2018-04-30",
+                    "best": 300,
+                    "worst": 330,
+                    "average": 315,
+                    "count": 2,
+                },
+            ],
+        )
+        self.assertEqual(
+            [bucket["date"] for bucket in monthly_series],
+            ["2018-04-01", "2018-05-01"],
+        )
+
+    def test_get_changes_since(self):
+        """
+        This test checks a sync with a cursor returns only the exercises
+        and trainings changed since it and the deleted ones, and a sync
+        without cursor the whole account
+        """
+
+        new_user = User.objects.get(username="new_user")
+        connie = Exercise.objects.get(name="connie")
+        full = self.treatment.get_changes_since(new_user)
+
+        self.assertTrue(full["full"])
+        self.assertEqual(
+            len(full["exercises"]), Exercise.objects.filter(is_default=True).count() + 1
+        )
+        self.assertEqual(
+            len(full["trainings"]), Training.objects.filter(founder=new_user).count()
+        )
+
+        since = datetime.now() - timedelta(minutes=1)
+        Exercise.objects.update(updated_at=since - timedelta(minutes=1))
+        Training.objects.update(updated_at=since - timedelta(minutes=1))
+        cursor = self.treatment.tools.encode_sync_cursor(since)
+        training = Training.objects.filter(founder=new_user, exercise=connie).first()
+        deleted_training_pk = training.pk
+        training.delete()
+        MovementSettingsPerMovementsPerExercise.objects.filter(
+            exercise_movement__exercise=connie
+        ).update(setting_value=42)
+        self.treatment.db_exercise.refresh_movements_documents(pk=connie.pk)
+
+        changes = self.treatment.get_changes_since(new_user, cursor)
+
+        self.assertFalse(changes["full"])
+        self.assertEqual([exercise["id"] for exercise in changes["exercises"]], [connie.pk])
+        self.assertEqual(changes["trainings"], [])
+        self.assertEqual(changes["deleted"]["training"], [deleted_training_pk])
+        self.assertEqual(changes["deleted"]["exercise"], [])
+        self.assertEqual(
+            changes["personal_records"],
+            self.treatment.get_all_pb_linked_to_one_user(new_user),
+        )
+        self.assertGreater(
+            self.treatment.tools.decode_sync_cursor(changes["cursor"]), since
+        )
+
+    def test_get_changes_since_with_too_old_cursor(self):
+        """
+        This test checks a cursor older than the tombstones gives a full sync
+        """
+
+        new_user = User.objects.get(username="new_user")
+        cursor = self.treatment.tools.encode_sync_cursor(datetime(2000, 1, 1))
+
+        changes = self.treatment.get_changes_since(new_user, cursor)
+
+        self.assertTrue(changes["full"])
+        self.assertEqual(
+            len(changes["trainings"]), Training.objects.filter(founder=new_user).count()
+        )
+
+    def test_record_performances_from_list(self):
+        """
+        This test checks the performances are registered with one
+        bulk_update and the personal records and rollups are refreshed
+        """
+
+        new_user = User.objects.get(username="new_user")
+        connie = Exercise.objects.get(name="connie")
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        connie_training = Training.objects.get(founder=new_user, exercise=connie, performance_value=230)
+        a_chelsea_training = Training.objects.get(founder=new_user, exercise=a_chelsea)
+
+        result = self.treatment.record_performances_from_list(
+            [
+                {"training_pk": connie_training.pk, "performance_value": "00:02:00"},
+                {"training_pk": str(a_chelsea_training.pk), "performance_value": 12},
+            ],
+            new_user,
+        )
+
+        self.assertEqual(
+            {training["id"]: training["performance_value"] for training in result["trainings"]},
+            {connie_training.pk: 120, a_chelsea_training.pk: 12},
+        )
+        self.assertEqual(result["personal_records"], {connie.pk: 120, a_chelsea.pk: 12})
+        self.assertEqual(
+            PersonalRecord.objects.get(user=new_user, exercise=connie).training_id,
+            connie_training.pk,
+        )
+        self.assertEqual(
+            TrainingDailyRollup.objects.get(user=new_user, day=connie_training.date.date()).total_time,
+            120,
+        )
+        connie_training.refresh_from_db()
+        self.assertTrue(connie_training.done)
+        self.assertGreater(connie_training.updated_at, datetime.now() - timedelta(minutes=1))
+
+    def test_record_performances_from_list_of_another_user(self):
+        """
+        This test checks nothing is registered if one training belongs
+        to another user or one entry is not valid
+        """
+
+        new_user = User.objects.get(username="new_user")
+        own_training = Training.objects.filter(founder=new_user).first()
+        other_training = Training.objects.exclude(founder=new_user).first()
+
+        with self.assertRaises(ValueError):
+            self.treatment.record_performances_from_list(
+                [
+                    {"training_pk": own_training.pk, "performance_value": 1},
+                    {"training_pk": other_training.pk, "performance_value": 1},
+                ],
+                new_user,
+            )
+        with self.assertRaises(ValueError):
+            self.treatment.record_performances_from_list(
+                [{"training_pk": own_training.pk, "performance_value": "abc"}],
+                new_user,
+            )
+        with self.assertRaises(ValueError):
+            self.treatment.record_performances_from_list([{"performance_value": 1}], new_user)
+        for performance_value in (None, "", 12.7):
+            with self.assertRaisesRegex(ValueError, "Entrée 2: entrée non valide"):
+                self.treatment.record_performances_from_list(
+                    [
+                        {"training_pk": own_training.pk, "performance_value": 1},
+                        {"training_pk": own_training.pk, "performance_value": performance_value},
+                    ],
+                    new_user,
+                )
+
+        self.assertEqual(
+            Training.objects.get(pk=own_training.pk).performance_value,
+            own_training.performance_value,
+        )
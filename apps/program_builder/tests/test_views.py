@@ -1,9 +1,18 @@
 #! /usr/bin/env python3
 # coding: utf-8
-from django.test import TestCase
+import base64
+import csv
+import json
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import TestCase, TransactionTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django.utils.http import urlencode
+from django.core.cache import cache
 from django.contrib.auth.models import User
 
+from program_builder.utils.caches import MovementsCatalogue
 from program_builder.utils.db_interactions import DBMovement
 from program_builder.models import (
     Training,
@@ -66,6 +75,51 @@ class AjaxAllMovementsPageTestCase(TestCase):
         )
         self.assertEqual(response.status_code, 302)
 
+    def test_movements_list_page_not_modified(self):
+        cache.clear()
+        self.client.login(username='user', password='test-view')
+        response = self.client.get(
+            reverse('program_builder:ajax_all_movements')
+        )
+        response = self.client.get(
+            reverse('program_builder:ajax_all_movements'),
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_movements_list_page_reads_the_catalogue_once(self):
+        cache.clear()
+        self.client.login(username='user', password='test-view')
+        with mock.patch.object(
+            MovementsCatalogue, 'get', autospec=True,
+            side_effect=MovementsCatalogue.get,
+        ) as get_catalogue:
+            response = self.client.get(
+                reverse('program_builder:ajax_all_movements')
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_catalogue.call_count, 1)
+
+    def test_movements_list_page_invalidated_on_movement_change(self):
+        cache.clear()
+        self.client.login(username='user', password='test-view')
+        response = self.client.get(
+            reverse('program_builder:ajax_all_movements')
+        )
+        self.assertEqual(response.json(), [])
+
+        user = User.objects.get(username='user')
+        equipment = Equipment.objects.create(name="box", founder=user)
+        Movement.objects.create(
+            name="box jump", founder=user, equipment=equipment
+        )
+        response = self.client.get(
+            reverse('program_builder:ajax_all_movements'),
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["name"], "box jump")
+
 
 class ExercisesListPageTestCase(TestCase):
     """
@@ -122,6 +176,121 @@ class ExercisePageTestCase(TestCase):
         )
         self.assertEqual(response.status_code, 302)
 
+    def test_exercise_page_movements_block_cached_until_changed(self):
+        cache.clear()
+        user = User.objects.get(username='ordinary_user')
+        self.client.login(username='ordinary_user', password='ordinary_user')
+        o_chelsea_exercise = Exercise.objects.get(name="chelsea", founder=user)
+        url = reverse(
+            'program_builder:exercise_page', args=(o_chelsea_exercise.pk,)
+        )
+        setting = MovementSettingsPerMovementsPerExercise.objects.filter(
+            exercise_movement__exercise=o_chelsea_exercise
+        ).first()
+        self.client.get(url)
+
+        # An update without signal keeps the cached block
+        MovementSettingsPerMovementsPerExercise.objects.filter(
+            pk=setting.pk
+        ).update(setting_value=987)
+        self.assertNotContains(self.client.get(url), '987')
+
+        # A saved change renews the block
+        setting.setting_value = 654
+        setting.save()
+        self.assertContains(self.client.get(url), '654')
+
+
+class AddExerciseTestCase(TestCase):
+    """
+    This class tests the add_exercise view
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def test_add_exercise_with_unknown_names(self):
+        self.client.login(username='new_user', password='new_user')
+        exercises_number = Exercise.objects.count()
+        exercise_dict = {
+            "name": "unknown names workout",
+            "exerciseType": "FORTIME",
+            "description": "workout de test",
+            "goalType": "Nombre de tours",
+            "goalValue": 1,
+            "movements": [
+                {
+                    "name": "squat",
+                    "order": 1,
+                    "settings": [{"name": "unknown setting", "value": 10}],
+                },
+                {"name": "unknown movement", "order": 2, "settings": []},
+            ],
+        }
+        response = self.client.post(
+            reverse('program_builder:add_exercise'),
+            json.dumps(exercise_dict),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["unknown_names"],
+            {"movements": ["unknown movement"], "settings": ["unknown setting"]},
+        )
+        self.assertEqual(Exercise.objects.count(), exercises_number)
+
+
+class ExerciseProgressionTestCase(TestCase):
+    """
+    This class tests the ajax_exercise_progression view
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def test_exercise_progression_when_logged(self):
+        self.client.login(username='new_user', password='new_user')
+        connie = Exercise.objects.get(name='connie')
+        response = self.client.get(
+            reverse(
+                'program_builder:ajax_exercise_progression',
+                args=[connie.pk],
+            ),
+            {'period': 'month'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [bucket['date'] for bucket in response.json()],
+            ['2018-04-01', '2018-05-01'],
+        )
+
+    def test_exercise_progression_with_unknown_period(self):
+        self.client.login(username='new_user', password='new_user')
+        connie = Exercise.objects.get(name='connie')
+        response = self.client.get(
+            reverse(
+                'program_builder:ajax_exercise_progression',
+                args=[connie.pk],
+            ),
+            {'period': 'year'},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_exercise_progression_when_not_logged(self):
+        connie = Exercise.objects.get(name='connie')
+        response = self.client.get(
+            reverse(
+                'program_builder:ajax_exercise_progression',
+                args=[connie.pk],
+            )
+        )
+        self.assertEqual(response.status_code, 302)
+
 
 class TrainingsListTestCase(TestCase):
     """
@@ -144,6 +313,337 @@ class TrainingsListTestCase(TestCase):
         response = self.client.get(reverse('program_builder:trainings_list'))
         self.assertEqual(response.status_code, 302)
 
+    def test_trainings_list_page_with_invalid_cursor(self):
+        self.client.login(username='user', password='test-view')
+        response = self.client.get(
+            reverse('program_builder:trainings_list'), {'cursor': 'wrong'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_trainings_list_page_with_aware_cursor(self):
+        self.client.login(username='user', password='test-view')
+        cursor = base64.urlsafe_b64encode(
+            b"2021-03-01T10:00:00+02:00|1"
+        ).decode()
+        response = self.client.get(
+            reverse('program_builder:trainings_list'), {'cursor': cursor}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ApiSyncTestCase(TestCase):
+    """
+    This class tests the api_sync view
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def setUp(self):
+        self.client.login(username='new_user', password='new_user')
+
+    def test_api_sync_without_cursor(self):
+        response = self.client.get(reverse('program_builder:api_sync'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["full"])
+        self.assertEqual(
+            len(response.json()["trainings"]),
+            Training.objects.filter(founder__username='new_user').count(),
+        )
+
+    def test_api_sync_after_exercise_deletion(self):
+        cursor = self.client.get(reverse('program_builder:api_sync')).json()["cursor"]
+        connie = Exercise.objects.get(name="connie")
+        self.client.get(
+            reverse('program_builder:delete_exercise', args=[connie.pk]),
+            HTTP_REFERER='/',
+        )
+
+        response = self.client.get(
+            reverse('program_builder:api_sync'), {'since': cursor}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["full"])
+        self.assertEqual(response.json()["deleted"]["exercise"], [connie.pk])
+        self.assertEqual(len(response.json()["deleted"]["training"]), 2)
+
+    def test_api_sync_with_invalid_cursor(self):
+        response = self.client.get(
+            reverse('program_builder:api_sync'), {'since': 'wrong'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_sync_with_aware_cursor(self):
+        cursor = base64.urlsafe_b64encode(
+            b"2021-03-01T10:00:00+02:00"
+        ).decode()
+        response = self.client.get(
+            reverse('program_builder:api_sync'), {'since': cursor}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_sync_when_not_logged(self):
+        self.client.logout()
+        response = self.client.get(reverse('program_builder:api_sync'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ApiRecordPerformancesTestCase(TestCase):
+    """
+    This class tests the api_record_performances view
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def setUp(self):
+        self.client.login(username='new_user', password='new_user')
+        self.url = reverse('program_builder:api_record_performances')
+
+    def _post(self, performances):
+        return self.client.post(
+            self.url, json.dumps(performances), content_type='application/json'
+        )
+
+    def test_api_record_performances(self):
+        trainings = Training.objects.filter(founder__username='new_user')
+        response = self._post(
+            [
+                {"training_pk": training.pk, "performance_value": 100}
+                for training in trainings
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["trainings"]), len(trainings))
+        self.assertEqual(
+            set(Training.objects.filter(founder__username='new_user').values_list('performance_value', flat=True)),
+            {100},
+        )
+
+    def test_api_record_performances_of_another_user(self):
+        training = Training.objects.exclude(founder__username='new_user').first()
+        response = self._post(
+            [{"training_pk": training.pk, "performance_value": 100}]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertNotEqual(
+            Training.objects.get(pk=training.pk).performance_value, 100
+        )
+
+    def test_api_record_performances_with_invalid_json(self):
+        response = self.client.post(
+            self.url, 'wrong', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self._post({"training_pk": 1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_record_performances_with_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_api_record_performances_when_not_logged(self):
+        self.client.logout()
+        response = self._post([])
+        self.assertEqual(response.status_code, 302)
+
+
+class TrainingsExportTestCase(TestCase):
+    """
+    This class tests the trainings export views
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def _content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_trainings_export_csv_when_logged(self):
+        self.client.login(username='new_user', password='new_user')
+        response = self.client.get(
+            reverse('program_builder:trainings_export_csv')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(self._content(response).splitlines()))
+        self.assertEqual(rows[0][0], 'id')
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][2], 'connie')
+        self.assertEqual(rows[1][6], '0:05:30')
+
+    def test_trainings_export_json_when_logged(self):
+        self.client.login(username='new_user', password='new_user')
+        response = self.client.get(
+            reverse('program_builder:trainings_export_json')
+        )
+        self.assertEqual(response.status_code, 200)
+        trainings = json.loads(self._content(response))
+        self.assertEqual(len(trainings), 3)
+        self.assertEqual(trainings[0]['performance_value'], '0:05:30')
+
+    def test_trainings_export_json_without_training(self):
+        User.objects.create_user(username='empty', password='empty')
+        self.client.login(username='empty', password='empty')
+        response = self.client.get(
+            reverse('program_builder:trainings_export_json')
+        )
+        self.assertEqual(json.loads(self._content(response)), [])
+
+    def test_trainings_export_when_not_logged(self):
+        response = self.client.get(
+            reverse('program_builder:trainings_export_csv')
+        )
+        self.assertEqual(response.status_code, 302)
+
+
+class TrainingsImportTestCase(TestCase):
+    """
+    This class tests the trainings import view
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        TestDatabase.create()
+
+    def test_trainings_import_csv(self):
+        self.client.login(username='new_user', password='new_user')
+        uploaded_file = SimpleUploadedFile(
+            'trainings.csv',
+            b'date,exercise,performance_type,performance_value\n'
+            b'2019-01-01,connie,duree,0:03:00\n'
+            b'2019-01-02,connie,duree,0:02:50\n',
+        )
+        response = self.client.post(
+            reverse('program_builder:trainings_import'),
+            {'file': uploaded_file},
+        )
+        self.assertRedirects(response, reverse('program_builder:trainings_list'))
+        self.assertEqual(
+            Training.objects.filter(founder__username='new_user').count(), 5
+        )
+
+    def test_trainings_import_invalid_file(self):
+        self.client.login(username='new_user', password='new_user')
+        uploaded_file = SimpleUploadedFile(
+            'trainings.json', b'[{"exercise": "unknown"}]'
+        )
+        response = self.client.post(
+            reverse('program_builder:trainings_import'),
+            {'file': uploaded_file},
+            follow=True,
+        )
+        self.assertContains(response, 'exercice inconnu')
+        self.assertEqual(
+            Training.objects.filter(founder__username='new_user').count(), 3
+        )
+
+    def test_trainings_import_when_not_logged(self):
+        response = self.client.post(
+            reverse('program_builder:trainings_import')
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Training.objects.count(), 5)
+
+
+class AsyncViewsTestCase(TransactionTestCase):
+    """
+    This class tests the async versions of the read-heavy views.
+    Their reads run in threads with their own connections, which only
+    see committed data: a TransactionTestCase is needed
+    """
+
+    def setUp(self):
+        TestDatabase.create()
+        cache.clear()
+        self.user = User.objects.get(username="ordinary_user")
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def test_async_trainings_list_same_context_as_sync(self):
+        response = async_to_sync(self.async_client.get)(
+            reverse('program_builder:async_trainings_list')
+        )
+        sync_response = self.client.get(
+            reverse('program_builder:trainings_list')
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'trainings_list.html')
+        for key in (
+            "trainings",
+            "next_cursor",
+            "trainings_number",
+            "trainings_done_number",
+            "pb_number",
+        ):
+            self.assertEqual(response.context[key], sync_response.context[key])
+
+    def test_async_trainings_list_registers_performance(self):
+        training = (
+            Training.objects.filter(founder=self.user)
+            .exclude(performance_type=Training.TIME)
+            .first()
+        )
+        response = async_to_sync(self.async_client.post)(
+            reverse('program_builder:async_trainings_list'),
+            urlencode(
+                {'training_pk': training.pk, 'performance_value': '30'}
+            ),
+            content_type='application/x-www-form-urlencoded',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        training.refresh_from_db()
+        self.assertTrue(training.done)
+        self.assertEqual(training.performance_value, 30)
+
+    async def test_async_exercises_list_page_when_logged(self):
+        response = await self.async_client.get(
+            reverse('program_builder:async_exercises_list')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'exercises_list.html')
+        self.assertEqual(
+            response.context['exercises_number'],
+            len(response.context['exercises']),
+        )
+
+    def test_async_exercise_page_when_logged(self):
+        exercise = Exercise.objects.filter(is_default=True).first()
+        response = async_to_sync(self.async_client.get)(
+            reverse(
+                'program_builder:async_exercise_page', args=[exercise.pk]
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['exercise_dict']['id'], exercise.pk)
+
+    async def test_async_movements_not_modified(self):
+        url = reverse('program_builder:async_ajax_all_movements')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(
+            url, **{'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_async_views_when_not_logged(self):
+        self.async_client.cookies.clear()
+        for name in (
+            'async_trainings_list',
+            'async_exercises_list',
+            'async_ajax_all_movements',
+        ):
+            response = await self.async_client.get(
+                reverse('program_builder:' + name)
+            )
+            self.assertEqual(response.status_code, 302)
+
 
 class ProfileTestCase(TestCase):
     """
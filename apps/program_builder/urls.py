@@ -12,11 +12,58 @@ urlpatterns = [
     path('exercices/', views.exercises_list, name="exercises_list"),
     path('add-exercise/', views.add_exercise, name="add_exercise"),
     path('exercise/<exercise_pk>/', views.exercise_page, name="exercise_page"),
+    path(
+        'exercise/<exercise_pk>/progression/',
+        views.ajax_exercise_progression,
+        name="ajax_exercise_progression",
+    ),
     path(
         'delete-exercise/<exercise_pk>/',
         views.delete_exercise,
         name="delete_exercise",
     ),
     path('trainings/', views.trainings_list, name="trainings_list"),
+    path(
+        'trainings/export.csv',
+        views.trainings_export_csv,
+        name="trainings_export_csv",
+    ),
+    path(
+        'trainings/export.json',
+        views.trainings_export_json,
+        name="trainings_export_json",
+    ),
+    path(
+        'trainings/import/',
+        views.trainings_import,
+        name="trainings_import",
+    ),
+    path(
+        'api/trainings/performances/',
+        views.api_record_performances,
+        name="api_record_performances",
+    ),
     path('profile/', views.profile, name="profile"),
+    path('api/sync/', views.api_sync, name="api_sync"),
+    # Async versions of the read-heavy views (ASGI)
+    path(
+        'async/get-all-movements/',
+        views.async_ajax_all_movements,
+        name="async_ajax_all_movements",
+    ),
+    path(
+        'async/exercices/',
+        views.async_exercises_list,
+        name="async_exercises_list",
+    ),
+    path(
+        'async/exercise/<exercise_pk>/',
+        views.async_exercise_page,
+        name="async_exercise_page",
+    ),
+    path(
+        'async/trainings/',
+        views.async_trainings_list,
+        name="async_trainings_list",
+    ),
 ]
\ No newline at end of file
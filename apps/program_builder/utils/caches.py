@@ -0,0 +1,62 @@
+#! /usr/bin/env python3
+# coding: utf-8
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .db_interactions import database_sync_to_async
+from .treatments import DataTreatment
+
+
+class MovementsCatalogue:
+    """
+    This class manages the catalogue of all the movements kept in the cache
+    of Django. It is built once and invalidated each time a movement,
+    a movement setting or an equipment is saved or deleted (see signals.py):
+        {
+            "etag": "hash of the movements",
+            "last_modified": "datetime of the build",
+            "movements": [see DataTreatment.get_all_movements_in_dict]
+        }
+    """
+
+    CACHE_KEY = "program_builder:movements_catalogue"
+
+    def get(self):
+        """
+        This method returns the catalogue from the cache or builds it
+        if there is none
+        """
+        catalogue = cache.get(self.CACHE_KEY)
+        if catalogue is None:
+            catalogue = self._build()
+            cache.set(
+                self.CACHE_KEY,
+                catalogue,
+                getattr(settings, 'MOVEMENTS_CATALOGUE_TIMEOUT', 3600),
+            )
+        return catalogue
+
+    async def aget(self):
+        """
+        Async counterpart of get, the catalogue is built in a thread
+        of the pool if it is not in the cache
+        """
+        return await database_sync_to_async(self.get)()
+
+    def invalidate(self):
+        """
+        This method removes the catalogue from the cache, it will be
+        built again at the next request
+        """
+        cache.delete(self.CACHE_KEY)
+
+    def _build(self):
+        movements = DataTreatment().get_all_movements_in_dict()
+        content = json.dumps(movements, sort_keys=True).encode()
+        return {
+            "etag": hashlib.md5(content).hexdigest(),
+            "last_modified": timezone.now().replace(microsecond=0),
+            "movements": movements,
+        }
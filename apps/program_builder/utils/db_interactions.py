@@ -1,8 +1,46 @@
 #! /usr/bin/env python3
 # coding: utf-8
-from django.db.models import Q
+import contextlib
+from asgiref.sync import sync_to_async
+from django.db import transaction, close_old_connections
+from datetime import datetime, timedelta
+from django.db.models import Q, F, Prefetch, Max, Min, Avg, Count, Sum, DateField
+from django.db.models.functions import Coalesce, Trunc
 from django.contrib.auth.models import User
-from ..models import Training, Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Movement, MovementSettings, Equipment
+from django.utils import timezone
+from ..models import Training, Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Movement, MovementSettings, Equipment, PersonalRecord, TrainingDailyRollup, TrainingWeeklyRollup, Tombstone
+from .registry import LookupTables
+
+
+# Context managers entered in the thread of each database_sync_to_async
+# call, around the function (e.g. the recording of the queries of the
+# request by fitlg_project.middleware.PerformanceInstrumentationMiddleware)
+DATABASE_THREAD_WRAPPERS = []
+
+
+def database_sync_to_async(function):
+    """
+    This function makes an awaitable of a function reading the database,
+    for the async views. Django 3.1 has no async ORM, so the function runs
+    in a thread of the pool (thread_sensitive=False) with its own connection,
+    which lets several independent reads of one request run concurrently.
+    As the request handler does for its own thread, the connection of the
+    pool thread is closed before and after the call when it is unusable or
+    older than CONN_MAX_AGE
+    """
+
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            with contextlib.ExitStack() as stack:
+                for wrapper in DATABASE_THREAD_WRAPPERS:
+                    stack.enter_context(wrapper())
+                return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
 
 class DBMovement:
     """
@@ -47,10 +85,25 @@ class DBMovement:
 
     def get_all_movements(self):
         """
-        This simple method returns all the movements registered in the database
+        This simple method returns all the movements registered in the database,
+        their equipment and their settings are found with LookupTables
+        (see get_settings_pks_per_movement)
         """
         return Movement.objects.all()
 
+    def get_settings_pks_per_movement(self):
+        """
+        This method returns in one query, without joining the settings,
+        the primary keys of the settings of each movement in a dict
+        {movement_pk: [setting_pk, ...]} (the settings are found with LookupTables)
+        """
+
+        settings_pks = {}
+        links = Movement.settings.through.objects.order_by('pk').values_list('movement_id', 'movementsettings_id')
+        for movement_pk, setting_pk in links:
+            settings_pks.setdefault(movement_pk, []).append(setting_pk)
+        return settings_pks
+
     def get_one_movement(self, name):
         """
         This simple method returns one movement according its name
@@ -68,8 +121,39 @@ class DBMovement:
         return Movement.objects.get(pk=movement_pk).delete()
 
     def get_one_movement_setting(self, name):
+        """
+        This method returns a movement setting from the in-process
+        LookupTables, without query once the table is loaded
+        """
+
+        return LookupTables().get_setting_by_name(name)
+
+    def get_movements_by_names(self, names):
+        """
+        This method returns in one query the movements with the given names
+        in a dict {name: movement}.
+        It raises Movement.DoesNotExist if one name is unknown, the unknown
+        names are in its attribute names
+        """
+
+        names = set(names)
+        movements = {movement.name: movement for movement in Movement.objects.filter(name__in=names)}
+        if len(movements) != len(names):
+            unknown_names = sorted(names - set(movements))
+            error = Movement.DoesNotExist("Unknown movements: {}".format(", ".join(unknown_names)))
+            error.names = unknown_names
+            raise error
+        return movements
+
+    def get_movement_settings_by_names(self, names):
+        """
+        This method returns the movement settings with the given names
+        in a dict {name: setting}, from the in-process LookupTables.
+        It raises MovementSettings.DoesNotExist if one name is unknown, the
+        unknown names are in its attribute names
+        """
 
-        return MovementSettings.objects.get(name=name)
+        return LookupTables().get_settings_by_names(names)
 
 class DBExercise:
     """
@@ -108,12 +192,9 @@ class DBExercise:
                                             description=description,
                                             goal_type=goal_type,
                                             goal_value=goal_value,
-                                            founder=founder)
+                                            founder=founder,
+                                            is_default=founder.is_superuser)
 
-        if founder.is_superuser:
-            exercise.is_default = True
-            exercise.save()
-            
         return exercise
 
     def set_movement_to_exercise(self, exercise, movement, movement_number):
@@ -145,6 +226,39 @@ class DBExercise:
         return exercise_movement
 
 
+    def set_movements_to_exercise(self, exercise, movements):
+        """
+        This method associates several movements to an exercise with one insert
+        and returns the associations in the same order.
+        movements is a list of tuples (movement, movement_number).
+        The exercise must not have any movement associated before
+        """
+
+        movements_linked = MovementsPerExercise.objects.bulk_create([
+            MovementsPerExercise(exercise=exercise, movement=movement, movement_number=movement_number)
+            for movement, movement_number in movements
+        ])
+        if movements_linked and movements_linked[0].pk is None:
+            # The database does not return the primary keys of a bulk insert (SQLite):
+            # the rows are read again in their order of insertion
+            movements_linked = list(MovementsPerExercise.objects.filter(exercise=exercise).order_by('pk'))
+
+        return movements_linked
+
+    def set_settings_values_to_movements_linked_to_exercise(self, settings_values):
+        """
+        This method defines with one insert the values of several settings for
+        movements associated to an exercise.
+        settings_values is a list of tuples (exercise_movement, setting, setting_value)
+        """
+
+        return MovementSettingsPerMovementsPerExercise.objects.bulk_create([
+            MovementSettingsPerMovementsPerExercise(exercise_movement=exercise_movement,
+                                                    setting=setting,
+                                                    setting_value=setting_value)
+            for exercise_movement, setting, setting_value in settings_values
+        ])
+
     def get_all_exercises(self):
 
         return Exercise.objects.all()
@@ -160,15 +274,116 @@ class DBExercise:
     def get_all_user_exercises(self, user):
         """
         Gets all the exercises created by a user + the default exercise
+        The two parts are selected separately and merged with an UNION so
+        each one uses its own index (founder and exercise_default_idx)
+        instead of a scan of the table for the OR
         TO TEST
         """
 
-        return Exercise.objects.filter(Q(founder=user) | Q(is_default=True))
+        exercise_pks = Exercise.objects.filter(founder=user).values('pk').union(
+            Exercise.objects.filter(is_default=True).values('pk'))
+        return Exercise.objects.filter(pk__in=exercise_pks)
+
+    def get_user_exercises_changed_since(self, user, since):
+        """
+        Gets the exercises of a user + the default exercises changed
+        (or whose movements changed) after the datetime since.
+        Like get_all_user_exercises, the two parts are merged with an UNION
+        so each one uses its own index
+        """
+
+        exercise_pks = Exercise.objects.filter(founder=user, updated_at__gt=since).values('pk').union(
+            Exercise.objects.filter(is_default=True, updated_at__gt=since).values('pk'))
+        return Exercise.objects.filter(pk__in=exercise_pks)
 
     def get_one_exercise_by_pk(self, exercise_pk):
 
         return Exercise.objects.get(pk=exercise_pk)
 
+    def get_exercises_by_pks(self, exercise_pks):
+        """
+        Gets several exercises without their movements
+        """
+
+        return Exercise.objects.filter(pk__in=exercise_pks)
+
+    def _prefetch_movements_and_settings(self, exercises):
+        """
+        This private method adds to an exercise queryset the prefetching of
+        the movements linked (with the movement itself) and of the settings
+        linked to each movement (the setting itself is found with LookupTables).
+        The movements are ordered by movement_number, the settings keep
+        the order of registration (primary key)
+        """
+
+        settings_linked = MovementSettingsPerMovementsPerExercise.objects.order_by('pk')
+        movements_linked = MovementsPerExercise.objects.select_related('movement').prefetch_related(
+            Prefetch('movementsettingspermovementsperexercise_set', queryset=settings_linked)
+        ).order_by('movement_number', 'pk')
+
+        return exercises.prefetch_related(Prefetch('movementsperexercise_set', queryset=movements_linked))
+
+    def refresh_movements_documents(self, **filters):
+        """
+        This method rebuilds, in one transaction, the movements_document of
+        the exercises selected by filters (e.g. pk=...,
+        movementsperexercise__movement=...) from the link tables and
+        increments their movements_version. It returns the number of
+        exercises refreshed. The document is a list of dict:
+            [
+                {
+                    "id": "movement primary_key",
+                    "name" : "movement_name",
+                    "order": "movement_order",
+                    "settings": [
+                        {
+                            "name": "setting_name",
+                            "value": "setting_value",
+                        },
+                        ...
+                    ]
+                },
+                ...
+            ]
+        """
+
+        exercise_pks = Exercise.objects.filter(**filters).values('pk')
+        # No savepoint: inside the transaction of the caller (e.g.
+        # register_exercise_from_dict) an error cancels everything anyway
+        with transaction.atomic(savepoint=False):
+            exercises = list(self._prefetch_movements_and_settings(
+                Exercise.objects.filter(pk__in=exercise_pks).only('pk')))
+            for exercise in exercises:
+                Exercise.objects.filter(pk=exercise.pk).update(
+                    movements_document=self._get_movements_document(exercise),
+                    movements_version=F('movements_version') + 1,
+                    updated_at=timezone.now())
+
+        return len(exercises)
+
+    def _get_movements_document(self, exercise):
+        """
+        This private method returns the movements document of an exercise
+        whose movements and settings are prefetched
+        """
+
+        lookup_tables = LookupTables()
+        return [
+            {
+                "id": movement_linked.movement.pk,
+                "name": movement_linked.movement.name,
+                "order": movement_linked.movement_number,
+                "settings": [
+                    {
+                        "name": lookup_tables.get_setting_by_pk(setting_linked.setting_id).name,
+                        "value": setting_linked.setting_value,
+                    }
+                    for setting_linked in movement_linked.movementsettingspermovementsperexercise_set.all()
+                ],
+            }
+            for movement_linked in exercise.movementsperexercise_set.all()
+        ]
+
     def del_exercise(self, exercise_pk):
         """
         This method deletes an exercise only if the exercise is not associated
@@ -195,6 +410,9 @@ class DBExercise:
 
 class DBTraining:
 
+    # Fields of a training sent by the sync API
+    SYNC_FIELDS = ('id', 'date', 'exercise_id', 'done', 'performance_type', 'performance_value')
+
     def set_training(self, exercise, founder):
         """
         This method set a training from an exercise
@@ -207,6 +425,26 @@ class DBTraining:
 
         return training
 
+    def set_trainings(self, trainings, batch_size=1000):
+        """
+        This method inserts a list of unsaved trainings with bulk_create.
+        The post_save signals are not sent: the personal records have to
+        be refreshed by the caller
+        """
+
+        return Training.objects.bulk_create(trainings, batch_size=batch_size)
+
+    def set_performances(self, trainings, batch_size=500):
+        """
+        This method registers the performance_value, done and updated_at of
+        a list of trainings with bulk_update. The post_save signals are not
+        sent and updated_at (auto_now) is not set: the caller sets it and
+        refreshes the personal records and the rollups
+        """
+
+        return Training.objects.bulk_update(trainings, ['performance_value', 'done', 'updated_at'],
+                                            batch_size=batch_size)
+
     def _set_performance_type(self, exercise):
         """
         This method defines the performance type for a training
@@ -223,13 +461,76 @@ class DBTraining:
 
         return performance_type
 
-    def get_all_trainings_from_one_user(self, user):
+    def get_all_trainings_from_one_user(self, user, cursor=None):
         """
         This method gets all the trainings from one user in the database
+        from the most recent to the oldest.
+        cursor is a tuple (date, pk) of the last training already read:
+        only the older trainings are returned (keyset pagination, the
+        ordering on pk breaks ties between trainings of the same date)
         """
-        
-        return Training.objects.filter(founder=user).order_by('-date')
+
+        trainings = Training.objects.filter(founder=user).order_by('-date', '-pk')
+        if cursor:
+            date, training_pk = cursor
+            trainings = trainings.filter(Q(date__lt=date) | Q(date=date, pk__lt=training_pk))
+
+        return trainings
+
+    def get_trainings_changed_since_from_one_user(self, user, since=None):
+        """
+        This method gets the trainings of a user changed after the datetime
+        since (all of them if since is None) in compact dicts:
+            {
+                "id": "training primary_key",
+                "date": "date",
+                "exercise_id": "exercise primary_key",
+                "done": "False or True",
+                "performance_type": "performance_type",
+                "performance_value": "performance_value",
+            }
+        """
+
+        trainings = Training.objects.filter(founder=user)
+        if since:
+            trainings = trainings.filter(updated_at__gt=since)
+
+        return trainings.order_by('pk').values(*self.SYNC_FIELDS)
+
+    def count_trainings_from_one_user(self, user):
+        """
+        This method counts the trainings of a user without reading the whole
+        history: the trainings done are summed from the weekly rollups
+        and the trainings not done yet are counted with a partial index
+            {
+                "trainings_number": "number of trainings",
+                "trainings_done_number": "number of trainings done",
+            }
+        """
+
+        trainings_done_number = TrainingWeeklyRollup.objects.filter(user=user).aggregate(
+            trainings_done_number=Coalesce(Sum('trainings_done'), 0))['trainings_done_number']
+        trainings_todo_number = Training.objects.filter(founder=user, done=False).count()
+
+        return {
+            "trainings_number": trainings_done_number + trainings_todo_number,
+            "trainings_done_number": trainings_done_number,
+        }
     
+    def iter_trainings_to_export_from_one_user(self, user, chunk_size=2000):
+        """
+        This method iterates over all the trainings from one user joined to
+        their exercise, from the most recent to the oldest. The rows are
+        tuples (pk, date, exercise name, exercise type, done, performance_type,
+        performance_value) fetched by chunks of chunk_size, so the memory
+        does not depend on the number of trainings
+        """
+
+        return Training.objects.filter(founder=user).order_by('-date', '-pk').values_list(
+            'pk', 'date', 'exercise__name', 'exercise__exercise_type', 'done',
+            'performance_type', 'performance_value',
+        ).iterator(chunk_size=chunk_size)
+
     def get_all_trainings_from_one_user_from_one_exercise(self, exercise, user):
         """
         This method gets all the trainings from one user in the database linked
@@ -238,10 +539,413 @@ class DBTraining:
         
         return Training.objects.filter(exercise=exercise, founder=user).order_by('-date')
 
+    PROGRESSION_PERIODS = ('day', 'week', 'month')
+
+    def get_progression_from_one_user(self, exercise_pk, user, period):
+        """
+        This method aggregates in one grouped query the performances of a user
+        for one exercise by period ('day', 'week' or 'month'), from the oldest
+        to the most recent. Each period is a dict:
+            {
+                "period": "first day of the period (date)",
+                "goal_type": "goal_type of the exercise",
+                "highest": "highest performance_value",
+                "lowest": "lowest performance_value",
+                "average": "average performance_value",
+                "count": "number of performances",
+            }
+        The trainings without performance are ignored
+        """
+
+        if period not in self.PROGRESSION_PERIODS:
+            raise ValueError("Unknown period: {}".format(period))
+
+        return Training.objects.filter(founder=user, exercise_id=exercise_pk,
+                                       performance_value__isnull=False).exclude(
+                                           performance_value=0).values(
+            period=Trunc('date', period, output_field=DateField()),
+            goal_type=F('exercise__goal_type'),
+        ).annotate(
+            highest=Max('performance_value'),
+            lowest=Min('performance_value'),
+            average=Avg('performance_value'),
+            count=Count('pk'),
+        ).order_by('period')
+
+    def get_trainings_by_pks_from_one_user(self, user, training_pks):
+        """
+        This method gets the trainings of a user among training_pks,
+        the trainings of the other users are left out
+        """
+
+        return Training.objects.filter(founder=user, pk__in=training_pks)
+
     def get_one_training_from_pk(self, training_pk):
 
         return Training.objects.get(pk=training_pk)
 
+    def count_trainings_with_pb_from_one_user(self, user):
+        """
+        This method counts the trainings of a user whose performance_value
+        is the personal record of the exercise
+        """
+
+        return Training.objects.filter(founder=user,
+                                       exercise__personalrecord__user=user,
+                                       performance_value=F('exercise__personalrecord__performance_value')).count()
+
+    async def acount_trainings_from_one_user(self, user):
+        """
+        Async counterpart of count_trainings_from_one_user
+        """
+
+        return await database_sync_to_async(self.count_trainings_from_one_user)(user)
+
+    async def acount_trainings_with_pb_from_one_user(self, user):
+        """
+        Async counterpart of count_trainings_with_pb_from_one_user
+        """
+
+        return await database_sync_to_async(self.count_trainings_with_pb_from_one_user)(user)
+
+class DBPersonalRecord:
+    """
+    This class manages all the interactions with the database concerning PersonalRecord.
+    A personal record is:
+        - the highest performance_value for exercises with 'duree' as goal_type
+        - the lowest performance_value for exercises with 'round' or 'distance'
+        - nothing for the other exercises or when there is no performance registered
+    """
+
+    def _is_better_performance(self, goal_type, performance_value, record_value):
+        """
+        This private method checks if a performance beats the current record
+        according to the goal type of the exercise
+        """
+        if goal_type == Exercise.TIME:
+            return performance_value > record_value
+        elif goal_type == Exercise.ROUND or goal_type == Exercise.DISTANCE:
+            return performance_value < record_value
+        return False
+
+    def _has_record(self, goal_type):
+
+        return goal_type in (Exercise.TIME, Exercise.ROUND, Exercise.DISTANCE)
+
+    def set_personal_record_from_training(self, training):
+        """
+        This method updates incrementally the personal record of the training's
+        founder for the training's exercise, with only the new performance
+        compared to the current record.
+        If the training was the one holding the record, the record is computed
+        again because the new performance may be worse
+        """
+
+        record = PersonalRecord.objects.filter(user_id=training.founder_id,
+                                               exercise_id=training.exercise_id).first()
+        if record and record.training_id == training.pk:
+            return self.refresh_personal_record(training.founder_id, training.exercise_id)
+
+        goal_type = training.exercise.goal_type
+        if not training.performance_value or not self._has_record(goal_type):
+            return record
+
+        if record is None:
+            record = PersonalRecord.objects.create(user_id=training.founder_id,
+                                                   exercise_id=training.exercise_id,
+                                                   training=training,
+                                                   performance_value=training.performance_value,
+                                                   date=training.date)
+        elif self._is_better_performance(goal_type, training.performance_value, record.performance_value):
+            record.training = training
+            record.performance_value = training.performance_value
+            record.date = training.date
+            record.save()
+
+        return record
+
+    def refresh_personal_record(self, user_pk, exercise_pk):
+        """
+        This method computes again the personal record of a user for one exercise
+        from his trainings (used when the training holding the record changes or
+        is deleted). The record is removed if there is no more performance
+        """
+
+        goal_type = Exercise.objects.filter(pk=exercise_pk).values_list('goal_type', flat=True).first()
+        best_training = None
+        if self._has_record(goal_type):
+            ordering = '-performance_value' if goal_type == Exercise.TIME else 'performance_value'
+            best_training = Training.objects.filter(founder_id=user_pk,
+                                                    exercise_id=exercise_pk,
+                                                    performance_value__isnull=False).exclude(
+                                                        performance_value=0).order_by(ordering, 'date', 'pk').first()
+
+        if best_training is None:
+            PersonalRecord.objects.filter(user_id=user_pk, exercise_id=exercise_pk).delete()
+            return None
+
+        record, created = PersonalRecord.objects.update_or_create(user_id=user_pk,
+                                                                  exercise_id=exercise_pk,
+                                                                  defaults={
+                                                                      "training": best_training,
+                                                                      "performance_value": best_training.performance_value,
+                                                                      "date": best_training.date,
+                                                                  })
+        return record
+
+    def rebuild_all_personal_records(self):
+        """
+        This method deletes and builds again all the personal records from the
+        trainings. The trainings are read once, in chunks, from the oldest to the
+        most recent so the first training reaching a record keeps it.
+        It returns the number of records created
+        """
+
+        records = {}
+        trainings = Training.objects.filter(performance_value__isnull=False).exclude(
+            performance_value=0).select_related('exercise').order_by('date', 'pk')
+        for training in trainings.iterator():
+            goal_type = training.exercise.goal_type
+            key = (training.founder_id, training.exercise_id)
+            record = records.get(key)
+            if not self._has_record(goal_type):
+                continue
+            if record is None or self._is_better_performance(goal_type,
+                                                             training.performance_value,
+                                                             record.performance_value):
+                records[key] = PersonalRecord(user_id=training.founder_id,
+                                              exercise_id=training.exercise_id,
+                                              training_id=training.pk,
+                                              performance_value=training.performance_value,
+                                              date=training.date)
+
+        with transaction.atomic():
+            PersonalRecord.objects.all().delete()
+            PersonalRecord.objects.bulk_create(records.values(), batch_size=500)
+
+        return len(records)
+
+    def get_one_personal_record_value(self, exercise, user):
+        """
+        This method returns the personal record of a user for an exercise
+        or 0 if there is none
+        """
+
+        record = PersonalRecord.objects.filter(user=user, exercise=exercise).values_list('performance_value', flat=True).first()
+        return record or 0
+
+    def get_all_personal_records_values(self, user):
+        """
+        This method returns all the personal records of a user
+        in a dict {exercise_pk: performance_value}
+        """
+
+        return dict(PersonalRecord.objects.filter(user=user).values_list('exercise_id', 'performance_value'))
+
+    def count_personal_records_from_one_user(self, user):
+
+        return PersonalRecord.objects.filter(user=user).count()
+
+    async def acount_personal_records_from_one_user(self, user):
+        """
+        Async counterpart of count_personal_records_from_one_user
+        """
+
+        return await database_sync_to_async(self.count_personal_records_from_one_user)(user)
+
+class DBTrainingRollup:
+    """
+    This class manages all the interactions with the database concerning the
+    daily (TrainingDailyRollup) and weekly (TrainingWeeklyRollup) summaries
+    of the trainings done. A rollup holds:
+        - the number of trainings done
+        - the total time of the trainings done with 'duree' as performance_type
+        - the number of trainings done per exercise type
+    """
+
+    def _get_week(self, day):
+        """
+        This private method returns the monday of the ISO week of a day
+        """
+        return day - timedelta(days=day.weekday())
+
+    def _get_daily_values(self, trainings):
+        """
+        This private method summarizes a queryset of trainings done with one
+        grouped query and returns {(user_pk, day): rollup values}
+        """
+
+        rows = trainings.values(
+            'founder',
+            'exercise__exercise_type',
+            day=Trunc('date', 'day', output_field=DateField()),
+        ).annotate(
+            trainings_done=Count('pk'),
+            total_time=Sum('performance_value', filter=Q(performance_type=Training.TIME)),
+        ).order_by()
+
+        days = {}
+        for row in rows:
+            values = days.setdefault((row['founder'], row['day']), {
+                "trainings_done": 0, "total_time": 0, "exercise_types": {},
+            })
+            self._add_values(values, {
+                "trainings_done": row['trainings_done'],
+                "total_time": row['total_time'] or 0,
+                "exercise_types": {row['exercise__exercise_type']: row['trainings_done']},
+            })
+        return days
+
+    def _add_values(self, values, other_values):
+        """
+        This private method adds the rollup values other_values to values
+        """
+        values["trainings_done"] += other_values["trainings_done"]
+        values["total_time"] += other_values["total_time"]
+        for exercise_type, number in other_values["exercise_types"].items():
+            values["exercise_types"][exercise_type] = values["exercise_types"].get(exercise_type, 0) + number
+
+    def _get_weekly_values(self, days):
+        """
+        This private method sums the daily values of _get_daily_values by
+        ISO week and returns {(user_pk, monday): rollup values}
+        """
+
+        weeks = {}
+        for (user_pk, day), values in days.items():
+            week_values = weeks.setdefault((user_pk, self._get_week(day)), {
+                "trainings_done": 0, "total_time": 0, "exercise_types": {},
+            })
+            self._add_values(week_values, values)
+        return weeks
+
+    def refresh_trainings_rollups(self, user_pk, date):
+        """
+        This method computes again the daily and weekly rollups of a user
+        containing a date (used each time a training is saved or deleted).
+        Only the trainings of the week are read, with one grouped query.
+        The rollups without training done are removed
+        """
+
+        day = date.date() if isinstance(date, datetime) else date
+        week = self._get_week(day)
+        days = self._get_daily_values(Training.objects.filter(
+            founder_id=user_pk, done=True, date__gte=week, date__lt=week + timedelta(days=7)))
+        weeks = self._get_weekly_values(days)
+
+        with transaction.atomic():
+            self._set_rollup(TrainingDailyRollup, user_pk, {"day": day}, days.get((user_pk, day)))
+            self._set_rollup(TrainingWeeklyRollup, user_pk, {"week": week}, weeks.get((user_pk, week)))
+
+    def _set_rollup(self, model, user_pk, period, values):
+        """
+        This private method registers the values of one rollup or deletes it
+        if values is None
+        """
+
+        rollups = model.objects.filter(user_id=user_pk, **period)
+        if values is None:
+            rollups.delete()
+        # The write comes first (no update_or_create, which reads in a
+        # savepoint): on SQLite the transaction gets the write lock at once
+        # instead of failing to upgrade a read lock under concurrent writes
+        elif not rollups.update(**values):
+            model.objects.create(user_id=user_pk, **period, **values)
+
+    def rebuild_trainings_rollups(self, user=None):
+        """
+        This method deletes and builds again the daily and weekly rollups of a
+        user (or of all the users if None) from the trainings, with one grouped
+        query. It returns the numbers of daily and weekly rollups created
+        """
+
+        trainings = Training.objects.filter(done=True)
+        daily_rollups = TrainingDailyRollup.objects.all()
+        weekly_rollups = TrainingWeeklyRollup.objects.all()
+        if user is not None:
+            trainings = trainings.filter(founder=user)
+            daily_rollups = daily_rollups.filter(user=user)
+            weekly_rollups = weekly_rollups.filter(user=user)
+
+        days = self._get_daily_values(trainings)
+        weeks = self._get_weekly_values(days)
+
+        with transaction.atomic():
+            daily_rollups.delete()
+            weekly_rollups.delete()
+            TrainingDailyRollup.objects.bulk_create(
+                [TrainingDailyRollup(user_id=user_pk, day=day, **values)
+                 for (user_pk, day), values in days.items()], batch_size=500)
+            TrainingWeeklyRollup.objects.bulk_create(
+                [TrainingWeeklyRollup(user_id=user_pk, week=week, **values)
+                 for (user_pk, week), values in weeks.items()], batch_size=500)
+
+        return len(days), len(weeks)
+
+    def get_daily_rollups_from_one_user(self, user, start=None, end=None):
+        """
+        This method gets the daily rollups of a user, from the oldest to the
+        most recent, optionally between two dates (included)
+        """
+
+        rollups = TrainingDailyRollup.objects.filter(user=user).order_by('day')
+        if start is not None:
+            rollups = rollups.filter(day__gte=start)
+        if end is not None:
+            rollups = rollups.filter(day__lte=end)
+        return rollups
+
+    def get_weekly_rollups_from_one_user(self, user, start=None, end=None):
+        """
+        This method gets the weekly rollups of a user, from the oldest to the
+        most recent, optionally between two dates (included)
+        """
+
+        rollups = TrainingWeeklyRollup.objects.filter(user=user).order_by('week')
+        if start is not None:
+            rollups = rollups.filter(week__gte=self._get_week(start))
+        if end is not None:
+            rollups = rollups.filter(week__lte=end)
+        return rollups
+
+class DBTombstone:
+    """
+    This class manages the tombstones left by the deleted exercises and
+    trainings, read by the sync API
+    """
+
+    def set_tombstone(self, model_name, object_pk, user_pk):
+        """
+        This method records the deletion of an object, user_pk is None
+        when the deletion concerns all the users (default exercise)
+        """
+
+        return Tombstone.objects.create(model_name=model_name, object_pk=object_pk, user_id=user_pk)
+
+    def get_deleted_pks_since(self, user, since):
+        """
+        This method returns the primary keys of the objects deleted after
+        the datetime since for a user, per model name:
+            {
+                "exercise": [pk, ...],
+                "training": [pk, ...],
+            }
+        """
+
+        deleted = {model_name: [] for model_name, label in Tombstone.MODEL_NAMES}
+        tombstones = Tombstone.objects.filter(Q(user=user) | Q(user__isnull=True), deleted_at__gt=since)
+        for model_name, object_pk in tombstones.order_by('pk').values_list('model_name', 'object_pk'):
+            deleted[model_name].append(object_pk)
+
+        return deleted
+
+    def del_tombstones_before(self, before):
+        """
+        This method deletes the tombstones older than the datetime before
+        """
+
+        return Tombstone.objects.filter(deleted_at__lt=before).delete()
+
 class DBInteractions:
     """
     This class manages all the interactions with the database:
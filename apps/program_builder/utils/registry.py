@@ -0,0 +1,127 @@
+#! /usr/bin/env python3
+# coding: utf-8
+import uuid
+from django.core.cache import cache
+from ..models import MovementSettings, Equipment
+
+
+class LookupTables:
+    """
+    This class keeps in the memory of the process the small tables which
+    almost never change: MovementSettings (five rows) and Equipment (about
+    a dozen rows). Each table is loaded once with one query, then an object
+    is found in O(1) from its name or its primary key (so the name from the
+    primary key and the primary key from the name).
+    The tables are loaded again:
+        - after a save or a delete in any process: the signals (see
+          signals.py) change the version kept in the cache of Django, and
+          each process compares it with the version of its tables
+        - when a name or a primary key is unknown, since another process
+          may have added it without signal
+    The objects are shared by all the requests and must not be modified
+    """
+
+    MODELS = (MovementSettings, Equipment)
+    VERSION_CACHE_KEY = "program_builder:lookup_tables_version"
+
+    # ("version", {model: {"pk": {pk: object}, "name": {name: object}}})
+    _tables = None
+
+    def get_setting_by_name(self, name):
+        return self._get(MovementSettings, "name", name)
+
+    def get_setting_by_pk(self, setting_pk):
+        return self._get(MovementSettings, "pk", setting_pk)
+
+    def get_settings_by_names(self, names):
+        """
+        This method returns the movement settings with the given names
+        in a dict {name: setting}.
+        It raises MovementSettings.DoesNotExist if one name is unknown, the
+        unknown names are in its attribute names
+        """
+        return self._get_many(MovementSettings, names)
+
+    def get_equipment_by_name(self, name):
+        return self._get(Equipment, "name", name)
+
+    def get_equipment_by_pk(self, equipment_pk):
+        return self._get(Equipment, "pk", equipment_pk)
+
+    @classmethod
+    def invalidate(cls):
+        """
+        This method forgets the tables and changes the shared version, so
+        they are loaded again on the next lookup in every process
+        """
+        cls._tables = None
+        cache.set(cls.VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+    def _get(self, model, index, key):
+        """
+        This private method returns the object of model whose field index
+        ("pk" or "name") is key, the tables are loaded again once if it
+        is unknown. It raises model.DoesNotExist if it is still unknown
+        """
+        obj = self._get_tables()[model][index].get(key)
+        if obj is None:
+            obj = self._load()[model][index].get(key)
+        if obj is None:
+            raise model.DoesNotExist(
+                "Unknown {}: {}".format(model._meta.verbose_name, key)
+            )
+        return obj
+
+    def _get_many(self, model, names):
+        names = set(names)
+        objects = self._get_tables()[model]["name"]
+        if not names.issubset(objects):
+            objects = self._load()[model]["name"]
+        unknown_names = sorted(names - set(objects))
+        if unknown_names:
+            error = model.DoesNotExist(
+                "Unknown {}: {}".format(
+                    model._meta.verbose_name, ", ".join(unknown_names)
+                )
+            )
+            error.names = unknown_names
+            raise error
+        return {name: objects[name] for name in names}
+
+    def _get_tables(self):
+        """
+        This private method returns the tables of the process, loaded again
+        if they are older than the shared version
+        """
+        loaded = LookupTables._tables
+        if loaded is None or loaded[0] != self._get_version():
+            return self._load()
+        return loaded[1]
+
+    def _get_version(self):
+        """
+        This private method returns the shared version of the tables, a
+        new one if the cache lost it (so the tables are loaded again)
+        """
+        return cache.get_or_set(
+            self.VERSION_CACHE_KEY, lambda: uuid.uuid4().hex, None
+        )
+
+    def _load(self):
+        """
+        This private method reads the tables (one query per model) and
+        replaces the previous ones in one assignment, so a concurrent
+        lookup sees either the old tables or the new ones. The version is
+        read first: a change during the load makes the next lookup load
+        the tables again
+        """
+        version = self._get_version()
+        tables = {}
+        for model in self.MODELS:
+            objects = list(model.objects.all())
+            tables[model] = {
+                "pk": {obj.pk: obj for obj in objects},
+                "name": {obj.name: obj for obj in objects},
+            }
+        LookupTables._tables = (version, tables)
+        return tables
@@ -1,5 +1,8 @@
 #! /usr/bin/env python3
 # coding: utf-8
+import base64
+import csv
+import json
 from datetime import datetime, timedelta
 
 
@@ -18,11 +21,107 @@ class Tools:
         convert a string time with %H:%M:%S format into an integer which represents
         the seconds
         """
-        print(string_time)
         if len(string_time.split(":")) < 3:
             string_time = f'{string_time}:00'
 
-        print(string_time)
         result = datetime.strptime(string_time, '%H:%M:%S')
         result = result.hour * 3600 + result.minute * 60 + result.second
-        return result
\ No newline at end of file
+        return result
+
+    def encode_cursor(self, date, pk):
+        """
+        Convert the date and the primary key of the last element of a page
+        into an opaque string usable in an url
+        """
+        cursor = "{}|{}".format(date.isoformat(), pk)
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """
+        Convert a cursor built by encode_cursor into a tuple (date, pk).
+        Returns None if the cursor is not valid, as well as for a date with
+        an offset: the dates of the database are naive (USE_TZ=False)
+        """
+        try:
+            date, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            date, pk = datetime.fromisoformat(date), int(pk)
+        except (ValueError, TypeError, UnicodeDecodeError):
+            return None
+        return (date, pk) if date.tzinfo is None else None
+
+    def encode_sync_cursor(self, moment):
+        """
+        Convert the datetime of a sync into an opaque string usable in an url
+        """
+        return base64.urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+    def decode_sync_cursor(self, cursor):
+        """
+        Convert a cursor built by encode_sync_cursor into a datetime.
+        Returns None if the cursor is not valid, as well as for a datetime
+        with an offset: the dates of the database are naive (USE_TZ=False)
+        """
+        try:
+            moment = datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, TypeError, UnicodeDecodeError):
+            return None
+        return moment if moment.tzinfo is None else None
+
+    def iter_file_rows(self, text_file, file_format):
+        """
+        Yields one by one the rows of a CSV file (with a header line) or the
+        objects of a JSON list as dictionnaries.
+        file_format is "csv" or "json"
+        """
+        if file_format == "csv":
+            return csv.DictReader(text_file)
+        if file_format == "json":
+            return self._iter_json_list(text_file)
+        raise ValueError("Format de fichier inconnu: {}".format(file_format))
+
+    def _iter_json_list(self, text_file, chunk_size=65536):
+        """
+        Yields the objects of a JSON list while reading the file by chunks,
+        so the whole file is never loaded in memory
+        """
+        decoder = json.JSONDecoder()
+        buffer, position = "", 0
+        expected = "["
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position == len(buffer):
+                chunk = text_file.read(chunk_size)
+                if not chunk:
+                    raise ValueError("La liste JSON est incomplète")
+                buffer, position = chunk, 0
+                continue
+
+            character = buffer[position]
+            if expected == "[":
+                if character != "[":
+                    raise ValueError("Le fichier JSON doit contenir une liste")
+                position += 1
+                expected = "first"
+            elif character == "]" and expected in ("first", "next"):
+                return
+            elif expected == "next":
+                if character != ",":
+                    raise ValueError("Séparateur JSON attendu: ','")
+                position += 1
+                expected = "value"
+            else:
+                try:
+                    value, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # The object may be cut by the end of the chunk
+                    chunk = text_file.read(chunk_size)
+                    if not chunk:
+                        raise ValueError("Le fichier JSON n'est pas valide")
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+                if not isinstance(value, dict):
+                    raise ValueError("La liste JSON doit contenir des objets")
+                yield value
+                buffer, position = buffer[position:], 0
+                expected = "next"
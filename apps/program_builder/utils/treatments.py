@@ -1,9 +1,31 @@
 #! /usr/bin/env python3
 # coding: utf-8
+import asyncio
 import math
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from .tools import Tools
-from .db_interactions import DBMovement, DBExercise, DBTraining
-from ..models import Training, Exercise
+from .registry import LookupTables
+from .db_interactions import DBMovement, DBExercise, DBTraining, DBPersonalRecord, DBTrainingRollup, DBTombstone, database_sync_to_async
+from ..models import Training, Exercise, Tombstone, Movement, MovementSettings
+
+class UnknownNamesError(ValueError):
+    """
+    This exception is raised when an exercise refers to movements or
+    settings which do not exist, names is the dict of the unknown names:
+        {
+            "movements": ["movement_name", ...],
+            "settings": ["setting_name", ...],
+        }
+    """
+
+    def __init__(self, names):
+        super().__init__("Noms inconnus: {}".format(
+            ", ".join(name for kind_names in names.values() for name in kind_names)))
+        self.names = names
+
 
 class DataTreatment:
     """
@@ -13,10 +35,24 @@ class DataTreatment:
     To reach its goals, the call use all the classes from db_interactions
     """
 
+    TRAININGS_EXPORT_FIELDS = (
+        "id",
+        "date",
+        "exercise",
+        "exercise_type",
+        "done",
+        "performance_type",
+        "performance_value",
+    )
+
     def __init__(self):
         self.db_mvt = DBMovement()
         self.db_exercise = DBExercise()
         self.db_training = DBTraining()
+        self.db_record = DBPersonalRecord()
+        self.db_rollup = DBTrainingRollup()
+        self.db_tombstone = DBTombstone()
+        self.lookup_tables = LookupTables()
         self.tools = Tools()
 
     def get_all_movements_in_dict(self):
@@ -33,13 +69,16 @@ class DataTreatment:
         """
         mvts_list = []
         mvts_queryset = self.db_mvt.get_all_movements()
-        
+        settings_pks = self.db_mvt.get_settings_pks_per_movement()
+
+        # The equipments and the settings come from the in-process LookupTables
         for mvt in mvts_queryset:
             mvt_dict = {
                 "id": mvt.pk,
                 "name": mvt.name,
-                "equipement": mvt.equipment.name,
-                "settings": [setting.name for setting in mvt.settings.all()]
+                "equipement": self.lookup_tables.get_equipment_by_pk(mvt.equipment_id).name,
+                "settings": [self.lookup_tables.get_setting_by_pk(setting_pk).name
+                             for setting_pk in settings_pks.get(mvt.pk, [])]
             }
             mvts_list.append(mvt_dict)
         
@@ -71,28 +110,63 @@ class DataTreatment:
                 ...
             ]
         }
+        The exercise and all its associations are registered in one transaction:
+        nothing is saved if a movement or a setting is unknown (UnknownNamesError)
         """
         goal_value_converted = self._manage_goal_value_to_register(exercise_dict["goalType"], exercise_dict["goalValue"])
-        exercise = self.db_exercise.set_exercise(exercise_dict["name"],
-                                                exercise_dict["exerciseType"],
-                                                exercise_dict["description"],
-                                                exercise_dict["goalType"],
-                                                goal_value_converted,
-                                                user)
-        if exercise:
-            for movement_dict in exercise_dict["movements"]:
-                movement = self.db_mvt.get_one_movement(movement_dict["name"])
-                movement_associated = self.db_exercise.set_movement_to_exercise(exercise, 
-                                                          movement,
-                                                          movement_dict["order"])
-                for setting_dict in movement_dict["settings"]:
-                    setting = self.db_mvt.get_one_movement_setting(setting_dict["name"])
-                    setting_associated = self.db_exercise.set_settings_value_to_movement_linked_to_exercise(movement_associated,
-                                                                                                            setting,
-                                                                                                            setting_dict["value"])
+        movements_dict = exercise_dict["movements"]
+        if movements_dict:
+            movements, settings = self._get_movements_and_settings_by_names(movements_dict)
+
+        with transaction.atomic():
+            exercise = self.db_exercise.set_exercise(exercise_dict["name"],
+                                                    exercise_dict["exerciseType"],
+                                                    exercise_dict["description"],
+                                                    exercise_dict["goalType"],
+                                                    goal_value_converted,
+                                                    user)
+            if exercise and movements_dict:
+                movements_associated = self.db_exercise.set_movements_to_exercise(
+                    exercise,
+                    [(movements[movement_dict["name"]], movement_dict["order"]) for movement_dict in movements_dict])
+
+                settings_values = []
+                for movement_dict, movement_associated in zip(movements_dict, movements_associated):
+                    for setting_dict in movement_dict["settings"]:
+                        settings_values.append((movement_associated,
+                                                settings[setting_dict["name"]],
+                                                setting_dict["value"]))
+                self.db_exercise.set_settings_values_to_movements_linked_to_exercise(settings_values)
+                # The bulk inserts do not send the signals rebuilding the document
+                self.db_exercise.refresh_movements_documents(pk=exercise.pk)
 
         return exercise
 
+    def _get_movements_and_settings_by_names(self, movements_dict):
+        """
+        This private method returns the movements and the settings named in
+        the movements of an exercise dict, in two dicts {name: object}
+        (one query for the movements, the settings come from LookupTables).
+        It raises UnknownNamesError with all the unknown names
+        """
+        unknown_names = {}
+        movements = settings = None
+        try:
+            movements = self.db_mvt.get_movements_by_names(
+                [movement_dict["name"] for movement_dict in movements_dict])
+        except Movement.DoesNotExist as e:
+            unknown_names["movements"] = e.names
+        try:
+            settings = self.db_mvt.get_movement_settings_by_names(
+                [setting_dict["name"] for movement_dict in movements_dict
+                 for setting_dict in movement_dict["settings"]])
+        except MovementSettings.DoesNotExist as e:
+            unknown_names["settings"] = e.names
+
+        if unknown_names:
+            raise UnknownNamesError(unknown_names)
+        return movements, settings
+
     def _manage_goal_value_to_register(self, goal_type, goal_value):
         """
         This private method ensure securiy and logic before registering numerical
@@ -118,6 +192,7 @@ class DataTreatment:
                     "goal_type": "goal_type",
                     "goal_value": "goal_value",
                     "is_default": False,
+                    "movements_version": "version of the movements block",
                     "done": "False or True",
                     "pb: "best performance_value",
                     "movements" : [
@@ -137,13 +212,10 @@ class DataTreatment:
                 }
             ]
         """       
-        exercises = self.db_exercise.get_all_user_exercises(user)
-        exercise_list = []
-        for exercise in exercises:
-            exercise_dict = self.get_one_exercise_in_dict_linked_to_one_user(exercise.pk, user)
-            if exercise_dict:
-                exercise_list.append(exercise_dict)
-        return exercise_list
+        exercises = list(self.db_exercise.get_all_user_exercises(user))
+        pbs = self.get_all_pb_linked_to_one_user(user)
+        exercises_dict = self._get_exercises_dict_linked_to_one_user(exercises, user, pbs)
+        return [exercises_dict[exercise.pk] for exercise in exercises if exercise.pk in exercises_dict]
 
     def get_one_exercise_in_dict_linked_to_one_user(self, exercise_pk, user):
         """
@@ -157,6 +229,7 @@ class DataTreatment:
                 "goal_type": "goal_type",
                 "goal_value": "goal_value",
                 "is_default": False,
+                "movements_version": "version of the movements block",
                 "done": "False or True",
                 "pb: "best performance_value",
                 "movements" : [
@@ -176,8 +249,60 @@ class DataTreatment:
             }
         """
 
-        completed = True
         exercise = self.db_exercise.get_one_exercise_by_pk(exercise_pk)
+        pbs = {exercise.pk: self._define_pb_for_one_exercise(exercise, user)}
+        return self._get_exercises_dict_linked_to_one_user([exercise], user, pbs).get(exercise.pk)
+
+    async def aget_all_exercises_dict_linked_to_one_user(self, user):
+        """
+        Async counterpart of get_all_exercises_dict_linked_to_one_user,
+        the exercises and the personal records are read concurrently
+        """
+        exercises, pbs = await asyncio.gather(
+            database_sync_to_async(lambda: list(self.db_exercise.get_all_user_exercises(user)))(),
+            database_sync_to_async(self.get_all_pb_linked_to_one_user)(user),
+        )
+        exercises_dict = await database_sync_to_async(self._get_exercises_dict_linked_to_one_user)(exercises, user, pbs)
+        return [exercises_dict[exercise.pk] for exercise in exercises if exercise.pk in exercises_dict]
+
+    async def aget_one_exercise_in_dict_linked_to_one_user(self, exercise_pk, user):
+        """
+        Async counterpart of get_one_exercise_in_dict_linked_to_one_user,
+        the exercise and its personal record are read concurrently
+        """
+        exercise, pb = await asyncio.gather(
+            database_sync_to_async(self.db_exercise.get_one_exercise_by_pk)(exercise_pk),
+            database_sync_to_async(self.db_record.get_one_personal_record_value)(exercise_pk, user),
+        )
+        exercises_dict = await database_sync_to_async(self._get_exercises_dict_linked_to_one_user)(
+            [exercise], user, {exercise.pk: pb}
+        )
+        return exercises_dict.get(exercise.pk)
+
+    def _get_exercises_dict_linked_to_one_user(self, exercises, user, pbs):
+        """
+        This private method transforms exercises into a dict
+        {exercise_pk: exercise_dict} without any query: the movements come
+        from the movements_document of each exercise and the pb from pbs
+        """
+
+        exercises_dict = {}
+        for exercise in exercises:
+            exercise_dict = self._get_exercise_dict_linked_to_one_user(exercise, user, pbs)
+            if exercise_dict:
+                exercises_dict[exercise.pk] = exercise_dict
+        return exercises_dict
+
+    def _get_exercise_dict_linked_to_one_user(self, exercise, user, pbs=None):
+        """
+        This private method transforms an exercise into a dictionnary
+        (see get_one_exercise_in_dict_linked_to_one_user for the structure).
+        The movements come from the movements_document of the exercise.
+        pbs is the dict {exercise_pk: pb} given by get_all_pb_linked_to_one_user,
+        if None the personal record is computed for this exercise only
+        """
+
+        completed = True
         exercise_dict = {
             "id": "",
             "name": "",
@@ -186,6 +311,7 @@ class DataTreatment:
             "goal_type": "",
             "goal_value": 0,
             "is_default": False,
+            "movements_version": 0,
             "pb": 0,
             "movements": []
         }
@@ -198,8 +324,12 @@ class DataTreatment:
             exercise_dict["goal_type"] = exercise.goal_type
             exercise_dict["goal_value"] = exercise.goal_value
             exercise_dict["is_default"] = exercise.is_default
-            exercise_dict["pb"] = self._define_pb_for_one_exercise(exercise, user)
-            exercise_dict["movements"] = self._get_movements_dict_linked_to_exercise(exercise)
+            exercise_dict["movements_version"] = exercise.movements_version
+            if pbs is None:
+                exercise_dict["pb"] = self._define_pb_for_one_exercise(exercise, user)
+            else:
+                exercise_dict["pb"] = pbs.get(exercise.pk, 0)
+            exercise_dict["movements"] = exercise.movements_document
         except Exception as e:
             completed = False
             print("type error: " + str(e))
@@ -225,73 +355,18 @@ class DataTreatment:
         """
         This private method return a personal record if the user register a training with this exercise
         """
-        trainings = self.db_training.get_all_trainings_from_one_user_from_one_exercise(exercise, user)
-        pb = 0
-        if trainings and exercise.goal_type == Exercise.TIME:  
-            for training in trainings:
-                if training.performance_value and training.performance_value > pb:
-                    pb = training.performance_value
-
-        elif trainings and (exercise.goal_type == Exercise.ROUND or exercise.goal_type == Exercise.DISTANCE):
-            for training in trainings:
-                if training.performance_value and pb == 0:
-                    pb = training.performance_value
-                elif training.performance_value and training.performance_value < pb:
-                    pb = training.performance_value
-                else:
-                    pass
-        else:
-            pass
-        return pb
+        return self.db_record.get_one_personal_record_value(exercise, user)
 
-    def _get_movements_dict_linked_to_exercise(self,exercise):
-        """
-        This private method gets all the movements linked to an exercise,
-        transforms them into dict and push them in a list
+    def get_all_pb_linked_to_one_user(self, user):
         """
-        
-        completed = True
-        movements_list = []
-        # We Get all movements linked to the exercise
-        movements_linked = self.db_exercise.get_all_movements_linked_to_exercise(exercise)
-        for movement_linked in movements_linked:
-            movement_dict = {
-                "id": "",
-                "name": "",
-                "order": "",
-                "settings": [],
+        This method returns the personal records of a user for all the exercises
+        he trained on, read from the personal records table:
+            {
+                "exercise primary_key": "best performance_value",
+                ...
             }
-
-            try:
-                movement_dict["id"] = movement_linked.movement.pk
-                movement_dict["name"] = movement_linked.movement.name
-                movement_dict["order"] = movement_linked.movement_number
-            except Exception as e:
-                completed = False
-                print("type error: " + str(e))
-                        
-            # We get all settings linked to a movement
-            settings_linked = self.db_exercise.get_all_settings_linked_to_movement_linked_to_exercise(movement_linked)
-            for setting_linked in settings_linked:
-                setting_dict = {
-                    "name": "",
-                    "value": "",
-                }
-
-                try:
-                    setting_dict["name"] = setting_linked.setting.name
-                    setting_dict["value"] = setting_linked.setting_value
-                except Exception as e:
-                    completed = False
-                    print("type error: " + str(e))
-
-                movement_dict["settings"].append(setting_dict)                
-            movements_list.append(movement_dict)
-            
-        if completed:
-            return movements_list
-        else:
-            return None
+        """
+        return self.db_record.get_all_personal_records_values(user)
 
     def get_one_training_in_dict(self, training_pk, user):
         """
@@ -311,6 +386,7 @@ class DataTreatment:
                     "goal_type": "goal_type",
                     "goal_value": "goal_value",
                     "is_default": False,
+                    "movements_version": "version of the movements block",
                     "pb": "personal best record",
                     "movements" : [
                         {
@@ -329,8 +405,19 @@ class DataTreatment:
                 }
             }
         """
-        completed = True
         training = self.db_training.get_one_training_from_pk(training_pk)
+        return self._get_training_dict(training, user)
+
+    def _get_training_dict(self, training, user, pbs=None, exercises_dict=None):
+        """
+        This private method transforms a training into a dictionnary
+        (see get_one_training_in_dict for the structure).
+        pbs is the dict {exercise_pk: pb} given by get_all_pb_linked_to_one_user.
+        exercises_dict is the dict {exercise_pk: exercise_dict} of the exercises
+        already serialized, if None the exercise is fetched and serialized
+        """
+
+        completed = True
         training_dict = {
             "id": "",
             "date": "",
@@ -346,7 +433,12 @@ class DataTreatment:
             training_dict["done"] = training.done
             training_dict["performance_type"] = training.performance_type
             training_dict["performance_value"] = training.performance_value
-            training_dict["exercise"] = self.get_one_exercise_in_dict_linked_to_one_user(training.exercise.pk, user)
+            if exercises_dict is None:
+                exercise = self.db_exercise.get_one_exercise_by_pk(training.exercise_id)
+                training_dict["exercise"] = self._get_exercise_dict_linked_to_one_user(exercise, user, pbs)
+            else:
+                # Each training gets its own copy because the views modify it (pb format)
+                training_dict["exercise"] = dict(exercises_dict[training.exercise_id])
         except Exception as e:
             completed = False
             print("type error: " + str(e))
@@ -356,6 +448,27 @@ class DataTreatment:
         else:
             return None
 
+    def _get_trainings_dict_list(self, trainings, user, pbs):
+        """
+        This private method transforms a list of trainings into a list of dictionnaries.
+        Each distinct exercise is serialized only once (see
+        _get_exercises_dict_linked_to_one_user), then shared between its trainings
+        """
+
+        trainings = list(trainings)
+        exercises = self.db_exercise.get_exercises_by_pks(
+            {training.exercise_id for training in trainings}
+        )
+        exercises_dict = self._get_exercises_dict_linked_to_one_user(list(exercises), user, pbs)
+
+        training_list = []
+        for training in trainings:
+            training_dict = self._get_training_dict(training, user, pbs, exercises_dict)
+            if training_dict:
+                training_list.append(training_dict)
+
+        return training_list
+
     def _manage_performance_value_to_get(self, performance_type, performance_value):
 
         if performance_type == Training.TIME:
@@ -382,6 +495,7 @@ class DataTreatment:
                         "goal_type": "goal_type",
                         "goal_value": "goal_value",
                         "is_default": False,
+                        "movements_version": "version of the movements block",
                         "pb": "pb",
                         "movements" : [
                             {
@@ -402,14 +516,358 @@ class DataTreatment:
                 ...
             ]
         """
-        training_list= []
         trainings = self.db_training.get_all_trainings_from_one_user(user)
+        pbs = self.get_all_pb_linked_to_one_user(user)
+
+        return self._get_trainings_dict_list(trainings, user, pbs)
+
+    def get_trainings_page_per_user_in_dict(self, user, cursor=None, page_size=20):
+        """
+        This method returns one page of the trainings realized from a user
+        (same structure as get_all_trainings_per_user_in_dict) and the cursor
+        of the next page (None if this is the last page):
+            (
+                [training_dict, ...],
+                "next cursor",
+            )
+        cursor is the string given with the previous page (see Tools.encode_cursor)
+        """
+        trainings, next_cursor = self._get_trainings_page(user, cursor, page_size)
+        pbs = self.get_all_pb_linked_to_one_user(user)
+        return self._get_trainings_dict_list(trainings, user, pbs), next_cursor
+
+    async def aget_trainings_page_per_user_in_dict(self, user, cursor=None, page_size=20):
+        """
+        Async counterpart of get_trainings_page_per_user_in_dict,
+        the page of trainings and the personal records are read concurrently
+        """
+        (trainings, next_cursor), pbs = await asyncio.gather(
+            database_sync_to_async(self._get_trainings_page)(user, cursor, page_size),
+            database_sync_to_async(self.get_all_pb_linked_to_one_user)(user),
+        )
+        trainings_dict = await database_sync_to_async(self._get_trainings_dict_list)(trainings, user, pbs)
+        return trainings_dict, next_cursor
+
+    def _get_trainings_page(self, user, cursor, page_size):
+        """
+        This private method returns the trainings (instances) of one page
+        and the cursor of the next page (None if this is the last page)
+        """
+        decoded_cursor = self.tools.decode_cursor(cursor) if cursor else None
+        trainings = list(self.db_training.get_all_trainings_from_one_user(user, decoded_cursor)[:page_size + 1])
+
+        next_cursor = None
+        if len(trainings) > page_size:
+            trainings = trainings[:page_size]
+            next_cursor = self.tools.encode_cursor(trainings[-1].date, trainings[-1].pk)
+
+        return trainings, next_cursor
+
+    def get_changes_since(self, user, cursor=None):
+        """
+        This method returns what changed for a user since the sync which
+        gave cursor (see Tools.encode_sync_cursor), everything if cursor is
+        None, too old or not valid ("full" is then True):
+            {
+                "cursor": "cursor of the next sync",
+                "full": "False or True",
+                "exercises": [exercise_dict, ...],
+                "trainings": [training_dict, ...],
+                "personal_records": {
+                    "exercise primary_key": "best performance_value",
+                    ...
+                },
+                "deleted": {
+                    "exercise": [exercise primary_key, ...],
+                    "training": [training primary_key, ...],
+                },
+            }
+        exercise_dict is described in get_all_exercises_dict_linked_to_one_user
+        and training_dict in DBTraining.get_trainings_changed_since_from_one_user.
+        A change of the movements of an exercise renews its updated_at, so
+        only the exercises and the trainings are compared with the cursor.
+        The next cursor is a bit before now (SYNC_CURSOR_OVERLAP) so a row
+        written during this sync is sent again: the client has to apply
+        the changes by primary key
+        """
+        now = timezone.now()
+        since = self.tools.decode_sync_cursor(cursor) if cursor else None
+        if since and since < now - timedelta(days=settings.SYNC_TOMBSTONES_RETENTION):
+            since = None
+
+        if since:
+            exercises = list(self.db_exercise.get_user_exercises_changed_since(user, since))
+            deleted = self.db_tombstone.get_deleted_pks_since(user, since)
+        else:
+            exercises = list(self.db_exercise.get_all_user_exercises(user))
+            deleted = {model_name: [] for model_name, label in Tombstone.MODEL_NAMES}
+        pbs = self.get_all_pb_linked_to_one_user(user)
+        exercises_dict = self._get_exercises_dict_linked_to_one_user(exercises, user, pbs)
+
+        return {
+            "cursor": self.tools.encode_sync_cursor(now - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP)),
+            "full": since is None,
+            "exercises": [exercises_dict[exercise.pk] for exercise in exercises if exercise.pk in exercises_dict],
+            "trainings": list(self.db_training.get_trainings_changed_since_from_one_user(user, since)),
+            "personal_records": pbs,
+            "deleted": deleted,
+        }
+
+    def iter_trainings_export_per_user(self, user):
+        """
+        This method yields the trainings realized from a user, one flat dict
+        per training (keys in TRAININGS_EXPORT_FIELDS), from the most recent
+        to the oldest:
+            {
+                "id": "training primary_key",
+                "date": "training date in ISO 8601",
+                "exercise": "exercise name",
+                "exercise_type": "exercise type",
+                "done": "training boolean",
+                "performance_type": "training perf_type",
+                "performance_value": "training perf_value (H:MM:SS for 'duree')",
+            }
+        The trainings are read by chunks and never gathered in a list
+        """
+        for row in self.db_training.iter_trainings_to_export_from_one_user(user):
+            training = dict(zip(self.TRAININGS_EXPORT_FIELDS, row))
+            training["date"] = training["date"].isoformat()
+            if training["performance_value"] and training["performance_type"] == Training.TIME:
+                training["performance_value"] = self.tools.convert_seconds_into_time(
+                    training["performance_value"]
+                )
+            yield training
+
+    def get_progression_per_user_linked_to_an_exercise(self, exercise_pk, user, period="week"):
+        """
+        This method returns the performances of a user for one exercise
+        grouped by period ('day', 'week' or 'month'), computed by the database:
+            [
+                {
+                    "date": "first day of the period in ISO 8601",
+                    "best": "best performance_value of the period",
+                    "worst": "worst performance_value of the period",
+                    "average": "average performance_value (1 decimal)",
+                    "count": "number of performances",
+                },
+                ...
+            ]
+        The best performance is the highest for the exercises with 'duree' as
+        goal_type, the lowest for the other ones (see DBPersonalRecord)
+        """
+        series = []
+        for bucket in self.db_training.get_progression_from_one_user(exercise_pk, user, period):
+            highest_is_best = bucket["goal_type"] not in (Exercise.ROUND, Exercise.DISTANCE)
+            series.append({
+                "date": bucket["period"].isoformat(),
+                "best": bucket["highest"] if highest_is_best else bucket["lowest"],
+                "worst": bucket["lowest"] if highest_is_best else bucket["highest"],
+                "average": round(bucket["average"], 1),
+                "count": bucket["count"],
+            })
+        return series
+
+    def import_trainings_from_file(self, text_file, file_format, user, batch_size=1000):
+        """
+        This method imports the trainings of a CSV or JSON file (see
+        Tools.iter_file_rows) for a user and returns the number of trainings
+        imported. Each row is a dict with the keys of TRAININGS_EXPORT_FIELDS
+        ("id" and "exercise_type" are ignored):
+            {
+                "date": "ISO 8601 date without offset (now if empty)",
+                "exercise": "exercise name (one of the user or a default one)",
+                "done": "boolean (True if a performance_value is given)",
+                "performance_type": "one of Training.PERFORMANCE_TYPE (from the exercise if empty)",
+                "performance_value": "integer or H:MM:SS for 'duree'",
+            }
+        The rows are read one by one and inserted by batches of batch_size in
+        one transaction: nothing is imported if a row is not valid (ValueError)
+        """
+        exercises = self._get_exercises_by_lower_name(user)
+        performance_types = dict(Training.PERFORMANCE_TYPE)
+        exercise_pks = set()
+        trainings = []
+        imported_number = 0
+
+        with transaction.atomic():
+            rows = self.tools.iter_file_rows(text_file, file_format)
+            for row_number, row in enumerate(rows, start=1):
+                try:
+                    training = self._get_training_from_import_row(row, user, exercises, performance_types)
+                except (ValueError, TypeError) as e:
+                    raise ValueError("Entraînement {}: {}".format(row_number, e))
+                trainings.append(training)
+                exercise_pks.add(training.exercise_id)
+                if len(trainings) == batch_size:
+                    imported_number += len(self.db_training.set_trainings(trainings, batch_size))
+                    trainings = []
+            if trainings:
+                imported_number += len(self.db_training.set_trainings(trainings, batch_size))
+
+            # bulk_create does not send post_save: the records and the
+            # rollups are refreshed here
+            for exercise_pk in exercise_pks:
+                self.db_record.refresh_personal_record(user.pk, exercise_pk)
+            self.db_rollup.rebuild_trainings_rollups(user)
+
+        return imported_number
+
+    def _get_exercises_by_lower_name(self, user):
+        """
+        This private method returns the dict {exercise name in lower case: exercise}
+        of the exercises available for a user, his own exercises first
+        """
+        exercises = {}
+        for exercise in self.db_exercise.get_all_user_exercises(user).only("pk", "name", "exercise_type", "founder"):
+            name = exercise.name.lower()
+            if name not in exercises or exercise.founder_id == user.pk:
+                exercises[name] = exercise
+        return exercises
+
+    def _get_training_from_import_row(self, row, user, exercises, performance_types):
+        """
+        This private method checks an imported row and transforms it into an
+        unsaved training
+        """
+        exercise_name = (row.get("exercise") or "").strip()
+        exercise = exercises.get(exercise_name.lower())
+        if exercise is None:
+            raise ValueError("exercice inconnu '{}'".format(exercise_name))
+
+        performance_type = row.get("performance_type") or self.db_training._set_performance_type(exercise)
+        if performance_type not in performance_types:
+            raise ValueError("type de performance inconnu '{}'".format(performance_type))
+
+        performance_value = self._manage_performance_value_to_register(performance_type, row.get("performance_value"))
+
+        date = row.get("date")
+        date = datetime.fromisoformat(date) if date else timezone.now()
+        # The dates of the database are naive (USE_TZ=False)
+        if date.tzinfo is not None:
+            raise ValueError("date avec fuseau horaire non acceptée '{}'".format(row["date"]))
+
+        done = row.get("done")
+        if done in (None, ""):
+            done = performance_value is not None
+        elif isinstance(done, str):
+            done = done.strip().lower() in ("1", "true", "yes", "oui")
+
+        return Training(
+            founder=user,
+            exercise_id=exercise.pk,
+            date=date,
+            done=bool(done),
+            performance_type=performance_type,
+            performance_value=performance_value,
+        )
+
+    def _manage_performance_value_to_register(self, performance_type, performance_value):
+        """
+        This private method converts a performance_value given by the user
+        (integer, or H:MM:SS / H:MM for 'duree') into an integer, None if
+        it is empty. It raises ValueError if it is not valid
+        """
+        if performance_value in (None, ""):
+            return None
+        if performance_type == Training.TIME and ":" in str(performance_value):
+            return self.tools.convert_string_time_into_int_seconds(performance_value)
+        return int(performance_value)
+
+    def _check_performance_value(self, performance_value):
+        """
+        This private method returns a performance_value to record, it
+        raises ValueError if it is empty (the training would be done
+        without result) or a number with decimals (int() would cut it)
+        """
+        if performance_value in (None, ""):
+            raise ValueError("performance_value vide")
+        if isinstance(performance_value, float) and not performance_value.is_integer():
+            raise ValueError("performance_value non entière: {}".format(performance_value))
+        return performance_value
+
+    def record_performances_from_list(self, performances, user):
+        """
+        This method registers the performances of several trainings of a
+        user at once from a list of dict:
+            [
+                {
+                    "training_pk": "training primary_key",
+                    "performance_value": "integer or H:MM:SS for 'duree'",
+                },
+                ...
+            ]
+        The trainings are read with one query and updated with one
+        bulk_update in a transaction, then their personal records and
+        rollups are refreshed. Nothing is registered if one entry is not
+        valid (no performance_value, decimals) or is not a training of the
+        user (ValueError).
+        It returns the registered trainings and the personal records of
+        their exercises:
+            {
+                "trainings": [
+                    {
+                        "id": "training primary_key",
+                        "exercise_id": "exercise primary_key",
+                        "done": True,
+                        "performance_type": "performance_type",
+                        "performance_value": "performance_value",
+                    },
+                    ...
+                ],
+                "personal_records": {
+                    "exercise primary_key": "best performance_value",
+                    ...
+                },
+            }
+        """
+        values = {}
+        for entry_number, performance in enumerate(performances, start=1):
+            try:
+                values[int(performance["training_pk"])] = self._check_performance_value(
+                    performance["performance_value"])
+            except (KeyError, ValueError, TypeError) as e:
+                raise ValueError("Entrée {}: entrée non valide ({})".format(entry_number, e))
+
+        trainings = list(self.db_training.get_trainings_by_pks_from_one_user(user, values))
+        unknown_pks = set(values) - {training.pk for training in trainings}
+        if unknown_pks:
+            raise ValueError("Entraînement inconnu: {}".format(", ".join(str(pk) for pk in sorted(unknown_pks))))
+
+        now = timezone.now()
         for training in trainings:
-            training_dict = self.get_one_training_in_dict(training.pk, user)
-            if training_dict:
-                training_list.append(training_dict)
+            try:
+                training.performance_value = self._manage_performance_value_to_register(
+                    training.performance_type, values[training.pk])
+            except (ValueError, TypeError) as e:
+                raise ValueError("Entraînement {}: {}".format(training.pk, e))
+            training.done = True
+            training.updated_at = now
 
-        return training_list
+        exercise_pks = {training.exercise_id for training in trainings}
+        with transaction.atomic():
+            self.db_training.set_performances(trainings)
+
+            # bulk_update does not send post_save: the records and the
+            # rollups are refreshed here
+            for exercise_pk in exercise_pks:
+                self.db_record.refresh_personal_record(user.pk, exercise_pk)
+            for day in {training.date.date() for training in trainings}:
+                self.db_rollup.refresh_trainings_rollups(user.pk, day)
+
+        pbs = self.get_all_pb_linked_to_one_user(user)
+        return {
+            "trainings": [
+                {
+                    "id": training.pk,
+                    "exercise_id": training.exercise_id,
+                    "done": training.done,
+                    "performance_type": training.performance_type,
+                    "performance_value": training.performance_value,
+                }
+                for training in trainings
+            ],
+            "personal_records": {exercise_pk: pbs.get(exercise_pk, 0) for exercise_pk in exercise_pks},
+        }
 
     def get_all_trainings_per_user_linked_to_an_exercise(self, exercise, user):
         """
@@ -430,6 +888,7 @@ class DataTreatment:
                         "goal_type": "goal_type",
                         "goal_value": "goal_value",
                         "is_default": False,
+                        "movements_version": "version of the movements block",
                         "pb": "personal best record",
                         "movements" : [
                             {
@@ -450,11 +909,7 @@ class DataTreatment:
                 ...
             ]
         """
-        training_list= []
         trainings = self.db_training.get_all_trainings_from_one_user_from_one_exercise(exercise, user)
-        for training in trainings:
-            training_dict = self.get_one_training_in_dict(training.pk, user)
-            if training_dict:
-                training_list.append(training_dict)
+        pbs = {exercise.pk: self._define_pb_for_one_exercise(exercise, user)}
 
-        return training_list
\ No newline at end of file
+        return self._get_trainings_dict_list(trainings, user, pbs)
\ No newline at end of file
@@ -1,17 +1,43 @@
+import asyncio
+import csv
+import functools
+import io
 import json
+import os
+from calendar import timegm
 from datetime import time, datetime
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.urls import reverse
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import (
+    condition,
+    require_GET,
+    require_POST,
+)
+from django.views.decorators.cache import cache_control
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.models import User
 from .forms import RegisterExerciseStep1, PasswordChangeCustomForm
-from .utils.db_interactions import DBMovement, DBExercise, DBTraining
-from .utils.treatments import DataTreatment
+from .utils.db_interactions import (
+    DBMovement,
+    DBExercise,
+    DBTraining,
+    DBPersonalRecord,
+)
+from .utils.treatments import DataTreatment, UnknownNamesError
 from .utils.tools import Tools
+from .utils.caches import MovementsCatalogue
+
+TRAININGS_PAGE_SIZE = 20
+# Most performances registered by one call of api_record_performances
+PERFORMANCES_BATCH_MAX = 500
 
 
 def index(request):
@@ -21,15 +47,39 @@ def index(request):
         return redirect(reverse("users:log_in"), locals())
 
 
+def _get_movements_catalogue(request):
+    """
+    This function returns the movements catalogue, read once per request
+    for the ETag, the Last-Modified and the response
+    """
+    if not hasattr(request, "movements_catalogue"):
+        request.movements_catalogue = MovementsCatalogue().get()
+    return request.movements_catalogue
+
+
+def _movements_catalogue_etag(request):
+    return _get_movements_catalogue(request)["etag"]
+
+
+def _movements_catalogue_last_modified(request):
+    return _get_movements_catalogue(request)["last_modified"]
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=_movements_catalogue_etag,
+    last_modified_func=_movements_catalogue_last_modified,
+)
 def ajax_all_movements(request):
     """
     This view returns all the movements in JSON
     For JSON structure -> see JSONTreatments class > def get_all_movements
     in utils.treatments.py
+    The movements come from the cached catalogue (see utils.caches.py), the
+    browser gets a 304 response while the catalogue does not change
     """
-    treatment = DataTreatment()
-    movements = treatment.get_all_movements_in_dict()
+    movements = _get_movements_catalogue(request)["movements"]
 
     return JsonResponse(movements, safe=False)
 
@@ -42,26 +92,30 @@ def exercises_list(request):
         - print a list of exercise
         - create an exercise and redirect on the exercise page to finalize
     """
-    tools = Tools()
     db = DataTreatment()
     exercises = db.get_all_exercises_dict_linked_to_one_user(request.user)
+    pb_number = DBPersonalRecord().count_personal_records_from_one_user(
+        request.user
+    )
+    context = _get_exercises_list_context(exercises, pb_number)
+    return render(request, 'exercises_list.html', context)
+
+
+def _get_exercises_list_context(exercises, pb_number):
+    tools = Tools()
     for exercise in exercises:
         if exercise["pb"] != 0 and exercise["goal_type"] != "duree":
             exercise["pb"] = tools.convert_seconds_into_time(exercise["pb"])
-    new_exercise_form = RegisterExerciseStep1()
-    context = {
+    return {
         'exercises': exercises,
         'exercises_number': len(exercises),
         'custom_exercises_number': len(
             [exercise for exercise in exercises if not exercise["is_default"]]
         ),
-        'pb_number': len(
-            [exercise for exercise in exercises if exercise["pb"] != 0]
-        ),
-        'new_exercise_form': new_exercise_form,
+        'pb_number': pb_number,
+        'new_exercise_form': RegisterExerciseStep1(),
         'title': 'exercises',
     }
-    return render(request, 'exercises_list.html', context)
 
 
 @csrf_protect
@@ -71,9 +125,14 @@ def add_exercise(request):
         treatment = DataTreatment()
         exercise_dict = json.loads(request.body)
 
-        new_exercise = treatment.register_exercise_from_dict(
-            exercise_dict, request.user
-        )
+        try:
+            new_exercise = treatment.register_exercise_from_dict(
+                exercise_dict, request.user
+            )
+        except UnknownNamesError as e:
+            return JsonResponse(
+                {"error": str(e), "unknown_names": e.names}, status=400
+            )
         return JsonResponse(new_exercise.pk, safe=False)
     else:
         messages.error(request, """Un problème a été rencontré.""")
@@ -129,6 +188,42 @@ def delete_exercise(request, exercise_pk):
     return redirect(referer, locals())
 
 
+@login_required
+@require_GET
+def ajax_exercise_progression(request, exercise_pk):
+    """
+    This view returns in JSON the performances of the user for one exercise
+    grouped by day, week or month (GET parameter "period", week by default)
+    For JSON structure -> see DataTreatment class >
+    def get_progression_per_user_linked_to_an_exercise in utils.treatments.py
+    """
+    period = request.GET.get("period", "week")
+    if period not in DBTraining.PROGRESSION_PERIODS:
+        return JsonResponse({"error": "Période inconnue"}, status=400)
+
+    series = DataTreatment().get_progression_per_user_linked_to_an_exercise(
+        exercise_pk, request.user, period
+    )
+    return JsonResponse(series, safe=False)
+
+
+@login_required
+@require_GET
+def api_sync(request):
+    """
+    This view returns in JSON what changed for the user since the cursor
+    given by the previous sync of the user (GET parameter "since"), everything
+    without it.
+    For JSON structure -> see DataTreatment class >
+    def get_changes_since in utils.treatments.py
+    """
+    cursor = request.GET.get("since")
+    if cursor and Tools().decode_sync_cursor(cursor) is None:
+        return JsonResponse({"error": "Curseur invalide"}, status=400)
+
+    return JsonResponse(DataTreatment().get_changes_since(request.user, cursor))
+
+
 @login_required
 def trainings_list(request):
 
@@ -152,8 +247,61 @@ def trainings_list(request):
             training.save()
 
     db = DataTreatment()
-    trainings = db.get_all_trainings_per_user_in_dict(request.user)
+    db_training = DBTraining()
+    cursor = request.GET.get("cursor")
+    trainings, next_cursor = db.get_trainings_page_per_user_in_dict(
+        request.user, cursor, TRAININGS_PAGE_SIZE
+    )
+    counters = db_training.count_trainings_from_one_user(request.user)
+    pb_number = db_training.count_trainings_with_pb_from_one_user(
+        request.user
+    )
+    context = _get_trainings_list_context(
+        trainings, cursor, next_cursor, counters, pb_number
+    )
+    return render(request, "trainings_list.html", context)
+
+
+@csrf_protect
+@login_required
+@require_POST
+def api_record_performances(request):
+    """
+    This view registers the performances of several trainings at once from
+    a JSON list of {"training_pk": ..., "performance_value": ...} and returns
+    in JSON the trainings and the personal records of their exercises.
+    For JSON structure -> see DataTreatment class >
+    def record_performances_from_list in utils.treatments.py
+    """
+    try:
+        performances = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "JSON non valide"}, status=400)
+    if not isinstance(performances, list):
+        return JsonResponse({"error": "Une liste est attendue"}, status=400)
+    if len(performances) > PERFORMANCES_BATCH_MAX:
+        return JsonResponse(
+            {
+                "error": "Au plus {} performances par envoi".format(
+                    PERFORMANCES_BATCH_MAX
+                )
+            },
+            status=400,
+        )
+
+    try:
+        result = DataTreatment().record_performances_from_list(
+            performances, request.user
+        )
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse(result)
+
 
+def _get_trainings_list_context(
+    trainings, cursor, next_cursor, counters, pb_number
+):
+    tools = Tools()
     # For trainings with time as performance_type, we convert performance_value and pb in time
     for training in trainings:
         if (
@@ -167,23 +315,15 @@ def trainings_list(request):
                 training["exercise"]["pb"]
             )
 
-    context = {
+    return {
         "title": 'trainings',
         "trainings": trainings,
-        "trainings_number": len(trainings),
-        "trainings_done_number": len(
-            [training for training in trainings if training["done"]]
-        ),
-        "pb_number": len(
-            [
-                training
-                for training in trainings
-                if training["performance_value"]
-                and training["performance_value"] == training["exercise"]["pb"]
-            ]
-        ),
+        "cursor": cursor,
+        "next_cursor": next_cursor,
+        "trainings_number": counters["trainings_number"],
+        "trainings_done_number": counters["trainings_done_number"],
+        "pb_number": pb_number,
     }
-    return render(request, "trainings_list.html", context)
 
 
 @login_required
@@ -201,4 +341,205 @@ def profile(request):
         form = PasswordChangeCustomForm(request.user)
     user = User.objects.get(pk=request.user.pk)
     context = {'user': user, 'title': 'profile', 'form': form}
-    return render(request, "profile.html", context)
\ No newline at end of file
+    return render(request, "profile.html", context)
+
+
+class _Echo:
+    """
+    File-like object whose write returns the value, so csv.writer
+    produces the lines one by one instead of storing them
+    """
+
+    def write(self, value):
+        return value
+
+
+def _trainings_csv_lines(trainings):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(DataTreatment.TRAININGS_EXPORT_FIELDS)
+    for training in trainings:
+        yield writer.writerow(
+            [training[field] for field in DataTreatment.TRAININGS_EXPORT_FIELDS]
+        )
+
+
+def _trainings_json_chunks(trainings):
+    yield "["
+    separator = "\n"
+    for training in trainings:
+        yield separator + json.dumps(training)
+        separator = ",\n"
+    yield "\n]\n"
+
+
+@login_required
+@require_GET
+def trainings_export_csv(request):
+    """
+    This view streams all the trainings of the user in CSV
+    (see DataTreatment.iter_trainings_export_per_user for the columns)
+    """
+    trainings = DataTreatment().iter_trainings_export_per_user(request.user)
+    response = StreamingHttpResponse(
+        _trainings_csv_lines(trainings), content_type="text/csv"
+    )
+    response["Content-Disposition"] = 'attachment; filename="trainings.csv"'
+    return response
+
+
+@login_required
+@require_GET
+def trainings_export_json(request):
+    """
+    This view streams all the trainings of the user in a JSON list
+    (see DataTreatment.iter_trainings_export_per_user for the structure)
+    """
+    trainings = DataTreatment().iter_trainings_export_per_user(request.user)
+    response = StreamingHttpResponse(
+        _trainings_json_chunks(trainings), content_type="application/json"
+    )
+    response["Content-Disposition"] = 'attachment; filename="trainings.json"'
+    return response
+
+
+@csrf_protect
+@login_required
+@require_POST
+def trainings_import(request):
+    """
+    This view imports the trainings of an uploaded CSV or JSON file
+    (same columns as the export, see
+    DataTreatment.import_trainings_from_file)
+    """
+    uploaded_file = request.FILES.get("file")
+    if uploaded_file is None:
+        messages.error(request, "Aucun fichier n'a été envoyé.")
+        return redirect("program_builder:trainings_list")
+
+    file_format = os.path.splitext(uploaded_file.name)[1].lstrip(".").lower()
+    text_file = io.TextIOWrapper(
+        uploaded_file.file, encoding="utf-8-sig", newline=""
+    )
+    try:
+        imported_number = DataTreatment().import_trainings_from_file(
+            text_file, file_format, request.user
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        messages.error(request, "L'import a échoué. {}".format(e))
+    else:
+        messages.success(
+            request,
+            "{} entraînements ont été importés.".format(imported_number),
+        )
+    return redirect("program_builder:trainings_list")
+
+
+# Async versions of the read-heavy views, served without blocking a worker
+# when the project runs under ASGI (fitlg_project/asgi.py). Their
+# independent reads run concurrently (see database_sync_to_async in
+# utils/db_interactions.py); the forms they display are still handled by
+# the synchronous views.
+
+
+def async_login_required(view):
+    """
+    login_required for the async views: the user of the session is loaded
+    in a thread since the ORM cannot be called from the event loop
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(
+            lambda: request.user.is_authenticated
+        )()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@async_login_required
+async def async_ajax_all_movements(request):
+    """
+    Async version of ajax_all_movements, with the same ETag and
+    Last-Modified validation
+    """
+    catalogue = await MovementsCatalogue().aget()
+    etag = quote_etag(catalogue["etag"])
+    last_modified = timegm(catalogue["last_modified"].utctimetuple())
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = JsonResponse(catalogue["movements"], safe=False)
+    if request.method in ('GET', 'HEAD'):
+        response['Last-Modified'] = http_date(last_modified)
+        response.setdefault('ETag', etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@async_login_required
+async def async_exercises_list(request):
+    """
+    Async version of exercises_list
+    """
+    if request.method != "GET":
+        return await sync_to_async(exercises_list)(request)
+
+    exercises, pb_number = await asyncio.gather(
+        DataTreatment().aget_all_exercises_dict_linked_to_one_user(
+            request.user
+        ),
+        DBPersonalRecord().acount_personal_records_from_one_user(request.user),
+    )
+    context = _get_exercises_list_context(exercises, pb_number)
+    return await sync_to_async(render)(request, 'exercises_list.html', context)
+
+
+@async_login_required
+async def async_exercise_page(request, exercise_pk):
+    """
+    Async version of exercise_page, the creation of a training (POST)
+    is done by exercise_page
+    """
+    if request.method != "GET":
+        return await sync_to_async(exercise_page)(request, exercise_pk)
+
+    exercise_dict = (
+        await DataTreatment().aget_one_exercise_in_dict_linked_to_one_user(
+            exercise_pk, request.user
+        )
+    )
+    context = {
+        'exercise_dict': exercise_dict,
+        'title': 'exercises',
+        'date': datetime.now(),
+    }
+    return await sync_to_async(render)(request, 'exercise_page.html', context)
+
+
+@async_login_required
+async def async_trainings_list(request):
+    """
+    Async version of trainings_list, the performances (POST) are
+    registered by trainings_list
+    """
+    if request.method != "GET":
+        return await sync_to_async(trainings_list)(request)
+
+    db_training = DBTraining()
+    cursor = request.GET.get("cursor")
+    (trainings, next_cursor), counters, pb_number = await asyncio.gather(
+        DataTreatment().aget_trainings_page_per_user_in_dict(
+            request.user, cursor, TRAININGS_PAGE_SIZE
+        ),
+        db_training.acount_trainings_from_one_user(request.user),
+        db_training.acount_trainings_with_pb_from_one_user(request.user),
+    )
+    context = _get_trainings_list_context(
+        trainings, cursor, next_cursor, counters, pb_number
+    )
+    return await sync_to_async(render)(request, "trainings_list.html", context)
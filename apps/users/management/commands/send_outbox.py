@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from ...utils.outbox import Outbox
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails en attente dans la boîte d'envoi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help="Nombre d'emails envoyés par connexion au serveur",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Continue à envoyer les nouveaux emails jusqu'à l'arrêt",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help="Secondes d'attente quand la boîte d'envoi est vide (--loop)",
+        )
+
+    def handle(self, *args, **options):
+        outbox = Outbox()
+        while True:
+            sent_number, failed_number = outbox.send_pending(
+                options['batch_size']
+            )
+            if sent_number or failed_number or not options['loop']:
+                self.stdout.write(
+                    "{} emails envoyés, {} en échec".format(
+                        sent_number, failed_number
+                    )
+                )
+            if not options['loop']:
+                return
+            # A full batch means more emails are probably waiting
+            if sent_number + failed_number < options['batch_size']:
+                time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='claim_token',
+            field=models.UUIDField(blank=True, null=True, verbose_name='the token of the send_outbox worker sending the email'),
+        ),
+    ]
@@ -1,2 +1,38 @@
 from django.db import models
-from django.contrib.auth.models import User
\ No newline at end of file
+from django.db.models import Q
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class EmailOutbox(models.Model):
+    """
+    This class represents an email waiting to be sent. The views register
+    the emails here and the send_outbox command sends them, so the requests
+    do not depend on the mail server
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    to = models.JSONField(verbose_name="the recipients' addresses")
+    created_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    claim_token = models.UUIDField(
+        null=True, blank=True,
+        verbose_name="the token of the send_outbox worker sending the email")
+
+    class Meta:
+        verbose_name = 'email en attente'
+        indexes = [
+            # Emails still to send (send_outbox)
+            models.Index(
+                fields=['next_attempt_at'],
+                name='outbox_pending_idx',
+                condition=Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return "{} - {}".format(", ".join(self.to), self.subject)
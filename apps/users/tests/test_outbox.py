@@ -0,0 +1,120 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import EmailOutbox
+from users.utils.outbox import Outbox
+
+
+class OutboxTestCase(TestCase):
+    """
+    This class tests the Outbox class
+    """
+
+    def setUp(self):
+        self.outbox = Outbox()
+        for number in range(3):
+            self.outbox.enqueue(
+                'subject {}'.format(number),
+                'body',
+                ['user{}@test.com'.format(number)],
+            )
+
+    def test_send_pending(self):
+        """
+        This method tests the pending emails are sent over one connection
+        and marked as sent
+        """
+        with mock.patch(
+            'users.utils.outbox.get_connection', wraps=mail.get_connection
+        ) as get_connection:
+            self.assertEqual(self.outbox.send_pending(), (3, 0))
+
+        get_connection.assert_called_once_with()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, ['user0@test.com'])
+        self.assertFalse(
+            EmailOutbox.objects.filter(sent_at__isnull=True).exists()
+        )
+        self.assertEqual(self.outbox.send_pending(), (0, 0))
+
+    @override_settings(EMAIL_OUTBOX_RETRY_DELAY=60)
+    def test_send_pending_failure_is_retried_later(self):
+        """
+        This method tests a failed email gets an exponential backoff
+        and is sent at a later attempt
+        """
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('mail server unavailable'),
+        ):
+            self.assertEqual(Outbox().send_pending(), (0, 3))
+            email = EmailOutbox.objects.get(subject='subject 0')
+            self.assertEqual(email.attempts, 1)
+            self.assertEqual(email.last_error, 'mail server unavailable')
+            first_delay = email.next_attempt_at - timezone.now()
+            self.assertEqual(Outbox().send_pending(), (0, 0))
+
+            EmailOutbox.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(Outbox().send_pending(), (0, 3))
+            email.refresh_from_db()
+            second_delay = email.next_attempt_at - timezone.now()
+
+        self.assertGreater(first_delay, timedelta(seconds=50))
+        self.assertGreater(second_delay, timedelta(seconds=110))
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(Outbox().send_pending(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_claimed_emails_are_sent_once(self):
+        """
+        This method tests an email claimed by a worker is not claimed by
+        another one, even if it was pending when the other one selected it
+        """
+        first_outbox, second_outbox = Outbox(), Outbox()
+        self.assertEqual(len(first_outbox.claim_pending_emails(2)), 2)
+
+        # The second worker selected the emails before the first one claimed them
+        with mock.patch.object(
+            second_outbox, 'get_pending_emails',
+            return_value=EmailOutbox.objects.all(),
+        ):
+            self.assertEqual(second_outbox.send_pending(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['user2@test.com'])
+
+    @override_settings(EMAIL_OUTBOX_CLAIM_TIMEOUT=60)
+    def test_claimed_emails_are_due_again_after_claim_timeout(self):
+        """
+        This method tests the emails claimed by a stopped worker are sent
+        after the claim timeout
+        """
+        self.assertEqual(len(Outbox().claim_pending_emails()), 3)
+        self.assertEqual(Outbox().send_pending(), (0, 0))
+
+        EmailOutbox.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(Outbox().send_pending(), (3, 0))
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=1)
+    def test_send_pending_gives_up_after_max_attempts(self):
+        """
+        This method tests an email is left aside after max attempts
+        """
+        EmailOutbox.objects.update(attempts=1)
+        self.assertEqual(Outbox().send_pending(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_send_outbox_command(self):
+        """
+        This method tests the send_outbox command sends the pending emails
+        """
+        out = StringIO()
+        call_command('send_outbox', batch_size=2, stdout=out)
+        self.assertIn('2 emails envoyés, 0 en échec', out.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
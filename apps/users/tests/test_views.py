@@ -1,8 +1,10 @@
 from django.test import TestCase
+from django.core import mail
 from django.urls import reverse
 from django.db.models import Q
 from django.contrib import auth
 from django.contrib.auth.models import User
+from users.models import EmailOutbox
 
 
 class RegisterPageTestCase(TestCase):
@@ -38,6 +40,26 @@ class RegisterPageTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse('users:log_in'))
 
+    def test_register_page_enqueues_the_activation_email(self):
+        """
+        This method tests the activation email is registered in the outbox
+        instead of being sent during the request
+        """
+
+        data = {
+            'username': 'test-page',
+            'mail': 'unit-test@register.com',
+            'password': 'unit-test-view',
+            'password_check': 'unit-test-view',
+        }
+
+        self.client.post(reverse('users:register'), data)
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.to, ['unit-test@register.com'])
+        self.assertEqual(email.subject, 'Activez votre compte')
+        self.assertIsNone(email.sent_at)
+        self.assertEqual(len(mail.outbox), 0)
+
     def test_register_page_fail_registration(self):
         """
         This method tests the fact that ny user is created when we want to
@@ -173,6 +195,11 @@ class PasswordForgottenPageTestCase(TestCase):
         }
 
         response = self.client.post(reverse('users:password_forgotten'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(EmailOutbox.objects.values_list('to', flat=True)),
+            [['test-ref@register.com']],
+        )
 
     # test page post wrong email
     def test_password_forgotten_page_post_wrong_email(self):
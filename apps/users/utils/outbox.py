@@ -0,0 +1,119 @@
+#! /usr/bin/env python3
+# coding: utf-8
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from ..models import EmailOutbox
+
+
+class Outbox:
+    """
+    This class manages the emails waiting in EmailOutbox:
+        - enqueue registers an email to send
+        - send_pending claims the emails due, sends them over one connection
+        to the mail server, and delays the failed ones with an exponential
+        backoff
+    """
+
+    def __init__(self):
+        self.max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_delay = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+        self.claim_timeout = getattr(settings, 'EMAIL_OUTBOX_CLAIM_TIMEOUT', 600)
+
+    def enqueue(self, subject, body, to):
+        """
+        This method registers an email to send to the list of addresses to
+        """
+
+        return EmailOutbox.objects.create(subject=subject, body=body, to=list(to))
+
+    def get_pending_emails(self, limit=100):
+        """
+        This method gets the emails not sent yet whose next attempt is due,
+        from the oldest one. The emails which failed max_attempts times are
+        left aside
+        """
+
+        return EmailOutbox.objects.filter(sent_at__isnull=True,
+                                          next_attempt_at__lte=timezone.now(),
+                                          attempts__lt=self.max_attempts).order_by('next_attempt_at', 'pk')[:limit]
+
+    def _get_next_attempt(self, attempts):
+        """
+        This private method returns the date of the next attempt after a
+        failure: the delay doubles with each attempt
+        """
+
+        return timezone.now() + timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+
+    def claim_pending_emails(self, limit=100):
+        """
+        This method claims the pending emails (see get_pending_emails) with a
+        conditional UPDATE and returns the ones claimed: an email taken by
+        another worker between the SELECT and the UPDATE is not due any more,
+        so it is sent once. The claim moves next_attempt_at after
+        claim_timeout, so the emails of a stopped worker are due again later
+        """
+
+        now = timezone.now()
+        pending_pks = list(self.get_pending_emails(limit).values_list('pk', flat=True))
+        if not pending_pks:
+            return []
+
+        claim_token = uuid.uuid4()
+        EmailOutbox.objects.filter(pk__in=pending_pks,
+                                   sent_at__isnull=True,
+                                   next_attempt_at__lte=now).update(
+            claim_token=claim_token,
+            next_attempt_at=now + timedelta(seconds=self.claim_timeout))
+        return list(EmailOutbox.objects.filter(claim_token=claim_token).order_by('pk'))
+
+    def send_pending(self, limit=100):
+        """
+        This method sends the pending emails it claims (see
+        claim_pending_emails) over one connection and returns the numbers of
+        emails sent and failed
+        """
+
+        emails = self.claim_pending_emails(limit)
+        if not emails:
+            return 0, 0
+
+        sent_number = failed_number = 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for email in emails:
+                self._set_failure(email, e)
+            return 0, len(emails)
+
+        try:
+            for email in emails:
+                try:
+                    EmailMessage(email.subject, email.body, to=email.to, connection=connection).send()
+                except Exception as e:
+                    self._set_failure(email, e)
+                    failed_number += 1
+                else:
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ""
+                    email.save(update_fields=['attempts', 'sent_at', 'last_error'])
+                    sent_number += 1
+        finally:
+            connection.close()
+
+        return sent_number, failed_number
+
+    def _set_failure(self, email, error):
+        """
+        This private method registers a failed attempt to send an email
+        """
+
+        email.attempts += 1
+        email.last_error = str(error)
+        email.next_attempt_at = self._get_next_attempt(email.attempts)
+        email.save(update_fields=['attempts', 'last_error', 'next_attempt_at'])
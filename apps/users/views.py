@@ -4,14 +4,15 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.contrib.sites.shortcuts import get_current_site
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_text
-from django.core.mail import EmailMessage
 from .forms import LoginForm, RegisterForm, PasswordResetMail, PasswordResetNew
 from .tokens import account_activation_token
+from .utils.outbox import Outbox
 
 
 def log_in(request):
@@ -61,24 +62,26 @@ def register(request):
                 and not mail_already_exist
                 and password == password_check
             ):
-                user = User.objects.create_user(
-                    username, mail, password, is_active=False
-                )
+                # The user is not created if the email cannot be registered
+                with transaction.atomic():
+                    user = User.objects.create_user(
+                        username, mail, password, is_active=False
+                    )
 
-                current_site = get_current_site(request)
-                mail_subject = "Activez votre compte"
-                message = render_to_string(
-                    'acc_activate_email.html',
-                    {
-                        'user': user,
-                        'domain': current_site.domain,
-                        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
-                        'token': account_activation_token.make_token(user),
-                    },
-                )
-                to_email = mail
-                email = EmailMessage(mail_subject, message, to=[to_email])
-                email.send()
+                    current_site = get_current_site(request)
+                    mail_subject = "Activez votre compte"
+                    message = render_to_string(
+                        'acc_activate_email.html',
+                        {
+                            'user': user,
+                            'domain': current_site.domain,
+                            'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+                            'token': account_activation_token.make_token(user),
+                        },
+                    )
+                    to_email = mail
+                    # The email is sent by the send_outbox command
+                    Outbox().enqueue(mail_subject, message, [to_email])
 
                 messages.success(
                     request,
@@ -173,8 +176,8 @@ def password_forgotten(request):
                     },
                 )
                 to_email = mail
-                email = EmailMessage(mail_subject, message, to=[to_email])
-                email.send()
+                # The email is sent by the send_outbox command
+                Outbox().enqueue(mail_subject, message, [to_email])
 
                 messages.success(
                     request,
@@ -0,0 +1,317 @@
+"""
+Opt-in performance instrumentation and profiling of the requests.
+
+PerformanceInstrumentationMiddleware records for each request:
+    - the number of SQL queries, their total duration and the slowest ones
+    - the time spent inside the public methods of DataTreatment
+    - the time spent rendering the templates
+and exposes them in a Server-Timing header. The requests slower than
+PERFORMANCE_SLOW_REQUEST_MS are logged in JSON by the logger
+'fitlg.performance'.
+
+The DataTreatment methods and Template.render are wrapped only when the
+middleware is loaded, so nothing is measured (and nothing costs) otherwise.
+The generator methods are left out: their work happens while the response
+is iterated, not when they are called.
+The queries of the async views, run in the threads of
+program_builder.utils.db_interactions.database_sync_to_async, are recorded
+too: the record of the request follows them in its context variable.
+
+ProfilingMiddleware runs the requests of the staff users under cProfile
+when they ask for it with the "X-Profile: 1" header or the "profile=1"
+query parameter. The .prof dump and a text summary of the top cumulative
+functions are written in PROFILING_DIR.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import pstats
+import re
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+logger = logging.getLogger('fitlg.performance')
+
+_current_record = contextvars.ContextVar('performance_record', default=None)
+
+# Depth of the nested timed calls per section, per thread: the threads of
+# database_sync_to_async of one request run at the same time
+_depths = threading.local()
+
+
+class RequestRecord:
+    """
+    This class gathers the measures of one request
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.durations = {'treatment': 0.0, 'template': 0.0}
+
+    @property
+    def db_time(self):
+        return sum(duration for sql, duration in self.queries)
+
+    def slowest_queries(self, number):
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[
+            :number
+        ]
+
+
+def _timed(section, function):
+    """
+    Wrap a function to add its duration to the section of the current
+    request. Only the outermost call of each thread is counted when calls
+    are nested
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        record = _current_record.get()
+        if record is None:
+            return function(*args, **kwargs)
+        depth = getattr(_depths, section, 0)
+        setattr(_depths, section, depth + 1)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            setattr(_depths, section, depth)
+            if not depth:
+                record.durations[section] += time.perf_counter() - start
+
+    wrapper._performance_timed = True
+    return wrapper
+
+
+@contextlib.contextmanager
+def _recording_queries(record):
+    """
+    Record in record the queries of the connections of the current thread
+    """
+
+    def record_query(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            record.queries.append((sql, time.perf_counter() - start))
+
+    with contextlib.ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(
+                connections[alias].execute_wrapper(record_query)
+            )
+        yield
+
+
+def _recording_thread_queries():
+    """
+    Record the queries of a thread of database_sync_to_async in the record
+    of the request which started it, if any
+    """
+    record = _current_record.get()
+    if record is None:
+        return contextlib.nullcontext()
+    return _recording_queries(record)
+
+
+def _install_wrappers():
+    """
+    Wrap (once) the public methods of DataTreatment (except the coroutine
+    and generator ones) and Template.render, and record the queries of the
+    threads of database_sync_to_async
+    """
+    from program_builder.utils.treatments import DataTreatment
+    from program_builder.utils.db_interactions import DATABASE_THREAD_WRAPPERS
+
+    if _recording_thread_queries not in DATABASE_THREAD_WRAPPERS:
+        DATABASE_THREAD_WRAPPERS.append(_recording_thread_queries)
+
+    for name, method in list(vars(DataTreatment).items()):
+        if (
+            callable(method)
+            and not name.startswith('_')
+            and not asyncio.iscoroutinefunction(method)
+            and not inspect.isgeneratorfunction(method)
+            and not getattr(method, '_performance_timed', False)
+        ):
+            setattr(DataTreatment, name, _timed('treatment', method))
+
+    if not getattr(Template.render, '_performance_timed', False):
+        Template.render = _timed('template', Template.render)
+
+
+class PerformanceInstrumentationMiddleware:
+    """
+    Add it first in MIDDLEWARE so the queries of the other middlewares
+    (sessions, authentication) are counted too
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_request_ms = getattr(
+            settings, 'PERFORMANCE_SLOW_REQUEST_MS', 500
+        )
+        self.slowest_queries_number = getattr(
+            settings, 'PERFORMANCE_SLOWEST_QUERIES', 5
+        )
+        _install_wrappers()
+
+    def __call__(self, request):
+        record = RequestRecord()
+        token = _current_record.set(record)
+
+        start = time.perf_counter()
+        try:
+            with _recording_queries(record):
+                response = self.get_response(request)
+        finally:
+            _current_record.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = self._server_timing(record, total)
+        if total * 1000 >= self.slow_request_ms:
+            self._log_slow_request(request, response, record, total)
+        return response
+
+    def _server_timing(self, record, total):
+        return ', '.join(
+            [
+                'db;dur={:.1f};desc="{} queries"'.format(
+                    record.db_time * 1000, len(record.queries)
+                ),
+                'treatment;dur={:.1f}'.format(
+                    record.durations['treatment'] * 1000
+                ),
+                'template;dur={:.1f}'.format(
+                    record.durations['template'] * 1000
+                ),
+                'total;dur={:.1f}'.format(total * 1000),
+            ]
+        )
+
+    def _log_slow_request(self, request, response, record, total):
+        user = getattr(request, 'user', None)
+        logger.warning(
+            json.dumps(
+                {
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'user': user.pk if user is not None else None,
+                    'total_ms': round(total * 1000, 1),
+                    'queries': len(record.queries),
+                    'db_ms': round(record.db_time * 1000, 1),
+                    'treatment_ms': round(
+                        record.durations['treatment'] * 1000, 1
+                    ),
+                    'template_ms': round(
+                        record.durations['template'] * 1000, 1
+                    ),
+                    'slowest_queries': [
+                        {'sql': sql, 'ms': round(duration * 1000, 2)}
+                        for sql, duration in record.slowest_queries(
+                            self.slowest_queries_number
+                        )
+                    ],
+                }
+            )
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Add it after AuthenticationMiddleware so the staff users are known.
+    It supports both modes, so under ASGI the async views are not sent
+    to a thread because of it. In async mode, cProfile only sees the
+    event loop thread, where the other requests run at the same time
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.directory = Path(
+            getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles')
+        )
+        self.top_functions = getattr(settings, 'PROFILING_TOP_FUNCTIONS', 40)
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Marks the instance as a coroutine function for the handler
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self._is_requested(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        self._dump(request, profiler)
+        return response
+
+    async def __acall__(self, request):
+        if not self._is_asked(request) or not await sync_to_async(
+            self._is_requested
+        )(request):
+            return await self.get_response(request)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        await sync_to_async(self._dump)(request, profiler)
+        return response
+
+    def _is_asked(self, request):
+        return (
+            request.headers.get('X-Profile') == '1'
+            or request.GET.get('profile') == '1'
+        )
+
+    def _is_requested(self, request):
+        # The user (loaded lazily) is only checked when a profile is asked
+        if not self._is_asked(request):
+            return False
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def _dump(self, request, profiler):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = '{}_{}_{}_user{}'.format(
+            timezone.now().strftime('%Y%m%d-%H%M%S-%f'),
+            request.method,
+            re.sub(r'[^\w-]+', '-', request.path).strip('-') or 'index',
+            request.user.pk,
+        )
+        profiler.dump_stats(str(self.directory / (name + '.prof')))
+
+        summary = io.StringIO()
+        summary.write(
+            '{} {}\n\n'.format(request.method, request.get_full_path())
+        )
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats('cumulative').print_stats(self.top_functions)
+        (self.directory / (name + '.txt')).write_text(summary.getvalue())
@@ -54,10 +54,31 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'fitlg_project.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Performance instrumentation (SQL, treatments and templates timings in a
+# Server-Timing header), enabled with PERFORMANCE_INSTRUMENTATION=1
+if os.getenv('PERFORMANCE_INSTRUMENTATION') == '1':
+    MIDDLEWARE.insert(
+        0, 'fitlg_project.middleware.PerformanceInstrumentationMiddleware'
+    )
+
+# Requests slower than this (milliseconds) are logged by 'fitlg.performance'
+PERFORMANCE_SLOW_REQUEST_MS = int(
+    os.getenv('PERFORMANCE_SLOW_REQUEST_MS', '500')
+)
+# Number of slowest SQL statements written in a slow request log
+PERFORMANCE_SLOWEST_QUERIES = 5
+
+# Directory of the cProfile dumps asked by the staff users with the
+# "X-Profile: 1" header or the "profile=1" query parameter
+PROFILING_DIR = Path(os.getenv('PROFILING_DIR', BASE_DIR / 'profiles'))
+# Number of functions written in the text summary of a dump
+PROFILING_TOP_FUNCTIONS = 40
+
 SITE_ID = 1
 
 ROOT_URLCONF = 'fitlg_project.urls'
@@ -98,9 +119,50 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # The connections are kept between the requests (and between the
+        # reads of the async views, see database_sync_to_async) instead of
+        # being opened, with their PRAGMA, for each one
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# PRAGMA applied to each new SQLite connection (see program_builder.signals):
+# WAL lets the readers work while a training is written, busy_timeout makes
+# the concurrent writers wait instead of failing with "database is locked"
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# The processes share the movements catalogue and the version of the lookup
+# tables through this cache: with several processes use a shared backend
+# (memcached, redis, database cache) instead of the local memory one
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fitlg',
+    }
+}
+
+# Lifetime (seconds) of the movements catalogue in the cache
+MOVEMENTS_CATALOGUE_TIMEOUT = 3600
+
+# Sync API: seconds subtracted from the time of a sync to build the next
+# cursor, so a row written during the sync is sent again next time
+SYNC_CURSOR_OVERLAP = 5
+
+# Sync API: days the tombstones of the deleted objects are kept (see the
+# purge_tombstones command), an older cursor gets a full sync
+SYNC_TOMBSTONES_RETENTION = 90
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -148,6 +210,13 @@ STATICFILES_DIRS = [
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'hello@fitlg.com'
 
+# Email outbox (sent by 'manage.py send_outbox'): attempts before giving up
+# and delay (seconds) before the first retry, doubled after each failure
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+# Delay (seconds) after which the emails claimed by a stopped worker are due again
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 600
+
 # Messages configuration with boostrap class
 
 MESSAGE_TAGS = {
@@ -159,4 +228,22 @@ MESSAGE_TAGS = {
 }
 
 # Login URL
-LOGIN_URL = 'users:log_in'
\ No newline at end of file
+LOGIN_URL = 'users:log_in'
+
+# Logging configuration
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'fitlg.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}